@@ -0,0 +1,15 @@
+"""
+Корневой URLconf с асинхронным чтением независимо от ASYNC_READ_VIEWS.
+
+Нужен тестам и команде benchasgi, чтобы в одном процессе сравнивать
+синхронные и асинхронные представления.
+"""
+from django.urls import include, path
+
+from api.urls import api_patterns, app_name, build_router
+
+urlpatterns = [
+    path('api/', include(
+        (api_patterns(build_router(async_reads=True)), app_name)
+    )),
+]
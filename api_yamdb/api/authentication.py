@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from .cache import get_cache
+
+REVOKED = -1
+
+
+def access_token_for(user):
+    """Создаёт токен доступа с ролью и версией токенов пользователя."""
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['token_version'] = user.token_version
+    return token
+
+
+def _version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def remember_token_version(user_id, version):
+    get_cache().set(
+        _version_key(user_id), version, settings.TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def current_token_version(user_id):
+    """
+    Действующая версия токенов пользователя.
+
+    Версия берётся из кэша и только при промахе из БД. Для удалённого
+    пользователя возвращается REVOKED.
+    """
+    version = get_cache().get(_version_key(user_id))
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is None:
+            version = REVOKED
+        remember_token_version(user_id, version)
+    return version
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из утверждений токена без запроса к БД."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'user')
+
+
+def author_for(user):
+    """
+    Пользователь запроса как объект User для внешних ключей.
+
+    Пользователь из токена превращается в неполный User с id и username:
+    этого хватает для сохранения и вывода автора без запроса к БД.
+    """
+    if isinstance(user, ClaimsUser):
+        return User(pk=user.id, username=user.username)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без чтения пользователя из БД.
+
+    Роль и права берутся из токена. Версия токена сверяется с текущей,
+    поэтому смена роли, блокировка или удаление пользователя отзывают
+    ранее выданные токены. Токены без версии проверяются по-старому, через БД.
+    """
+
+    def get_user(self, validated_token):
+        version = validated_token.get('token_version')
+        if version is None:
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        if version != current_token_version(user.id):
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return user
@@ -0,0 +1,336 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from reviews.changes import record_changes
+from reviews.models import Category, Change, Genre, TitleGenre, TitleStats
+from .cache import invalidate
+
+NOT_FOUND = 'Объект не найден.'
+INVALID_KEY = 'Неверное значение.'
+# Адрес пакетной записи стоит в маршрутах раньше /<ресурс>/<slug>/,
+# поэтому жанр или категорию с таким слагом нельзя было бы удалить.
+BULK_PATH = 'bulk'
+
+
+def reject_reserved_slug(value):
+    """Запрещает слаг, совпадающий с адресом пакетной записи."""
+    if value == BULK_PATH:
+        raise serializers.ValidationError(
+            f'Слаг «{value}» зарезервирован.'
+        )
+    return value
+
+
+class CatalogItemSerializer(serializers.Serializer):
+    """Элемент пакета жанров или категорий, проверяется без запросов к БД."""
+
+    name = serializers.CharField(max_length=256)
+    slug = serializers.SlugField(
+        max_length=50, validators=[reject_reserved_slug]
+    )
+
+
+class TitleItemSerializer(serializers.Serializer):
+    """Элемент пакета произведений: категория и жанры заданы слагами."""
+
+    name = serializers.CharField(max_length=250)
+    year = serializers.IntegerField(min_value=0, max_value=32767)
+    description = serializers.CharField(allow_blank=True, required=False)
+    category = serializers.SlugField(max_length=50)
+    genre = serializers.ListField(
+        child=serializers.SlugField(max_length=50),
+        required=False
+    )
+
+
+def resolve_slugs(model, slugs):
+    """Объекты по набору слагов одним запросом IN."""
+    return model.objects.in_bulk(set(slugs), field_name='slug')
+
+
+def create_all(model, objects):
+    """
+    bulk_create, после которого у объектов есть id.
+
+    Если БД не возвращает id из пакетной вставки (SQLite), объекты
+    сохраняются по одному. raw=True, как и у bulk_create, отключает
+    обработчики сигналов приложения reviews.
+    """
+    if connections[model.objects.db].features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objects)
+    for obj in objects:
+        obj.save_base(raw=True)
+    return objects
+
+
+class BulkWriteMixin:
+    """
+    Пакетная запись через /<ресурс>/bulk/.
+
+    POST создаёт объекты из массива, PATCH изменяет найденные
+    по bulk_lookup_field, DELETE удаляет массив значений bulk_lookup_field.
+    Весь массив проверяется за один проход, связанные слаги разрешаются
+    одним запросом IN на модель. Если хотя бы один элемент неверен,
+    ничего не записывается, а ответ 400 содержит ошибки каждого элемента
+    в том же порядке. Запись идёт одной транзакцией через bulk_create
+    и bulk_update в обход сигналов, поэтому пространства имён кэша
+    bulk_namespaces сбрасываются здесь.
+    """
+
+    bulk_serializer_class = None
+    bulk_lookup_field = 'slug'
+    bulk_namespaces = ()
+
+    @action(
+        detail=False, methods=['post', 'patch', 'delete'],
+        url_path=BULK_PATH
+    )
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not (
+            0 < len(items) <= settings.BULK_MAX_ITEMS
+        ):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Передайте массив от 1 до {settings.BULK_MAX_ITEMS} '
+                'элементов.'
+            ]})
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_delete,
+        }[request.method]
+        with transaction.atomic():
+            response = handler(items)
+        invalidate(*self.bulk_namespaces)
+        return response
+
+    def bulk_validate(self, items, partial=False):
+        """Проверяет все элементы и возвращает их данные или ошибку 400."""
+        values, errors = [], []
+        for item in items:
+            serializer = self.bulk_serializer_class(
+                data=item, partial=partial
+            )
+            valid = serializer.is_valid()
+            values.append(serializer.validated_data if valid else None)
+            errors.append({} if valid else serializer.errors)
+        self.bulk_resolve(values, errors)
+        if any(errors):
+            raise ValidationError(errors)
+        return values
+
+    def bulk_find(self, keys):
+        """Объекты по значениям bulk_lookup_field одним запросом."""
+        model = self.get_queryset().model
+        found = model.objects.in_bulk(keys, field_name=self.bulk_lookup_field)
+        errors = [
+            {} if key in found else {self.bulk_lookup_field: [NOT_FOUND]}
+            for key in keys
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        return [found[key] for key in keys]
+
+    def bulk_lookup(self, items):
+        """Значения bulk_lookup_field элементов, приведённые к типу поля."""
+        keys = [
+            item.get(self.bulk_lookup_field) if isinstance(item, dict)
+            else None
+            for item in items
+        ]
+        if not all(isinstance(key, (str, int)) for key in keys):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Укажите {self.bulk_lookup_field} каждого элемента.'
+            ]})
+        # Ключи приводятся к типу поля, как при поиске по URL, иначе
+        # id «abc» дошёл бы до in_bulk и закончился ошибкой 500.
+        field = self.get_queryset().model._meta.get_field(
+            self.bulk_lookup_field
+        )
+        errors = []
+        for index, key in enumerate(keys):
+            try:
+                keys[index] = field.to_python(key)
+            except DjangoValidationError:
+                errors.append({self.bulk_lookup_field: [INVALID_KEY]})
+            else:
+                errors.append({})
+        if any(errors):
+            raise ValidationError(errors)
+        if len(set(keys)) != len(keys):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Значения {self.bulk_lookup_field} повторяются.'
+            ]})
+        return keys
+
+    def bulk_create(self, items):
+        values = self.bulk_validate(items)
+        objects = create_all(
+            self.get_queryset().model,
+            [self.bulk_build(data) for data in values]
+        )
+        self.bulk_created(objects, values)
+        return Response(
+            self.bulk_outputs(objects, values), status=status.HTTP_201_CREATED
+        )
+
+    def bulk_update(self, items):
+        keys = self.bulk_lookup(items)
+        objects = self.bulk_find(keys)
+        values = self.bulk_validate(items, partial=True)
+        fields = set()
+        for obj, data in zip(objects, values):
+            fields |= self.bulk_apply(obj, data)
+        if fields:
+            self.get_queryset().model.objects.bulk_update(objects, fields)
+        self.bulk_updated(objects, values)
+        return Response(self.bulk_outputs(objects, values))
+
+    def bulk_delete(self, keys):
+        objects = self.bulk_find(self.bulk_lookup(
+            [{self.bulk_lookup_field: key} for key in keys]
+        ))
+        self.get_queryset().model.objects.filter(
+            pk__in=[obj.pk for obj in objects]
+        ).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def bulk_resolve(self, values, errors):
+        """Разрешает ссылки всех элементов и дописывает ошибки в errors."""
+
+    def bulk_build(self, data):
+        return self.get_queryset().model(**data)
+
+    def bulk_apply(self, obj, data):
+        """Переносит данные в объект и возвращает изменённые поля."""
+        for name, value in data.items():
+            setattr(obj, name, value)
+        return set(data) - {self.bulk_lookup_field}
+
+    def bulk_created(self, objects, values):
+        pass
+
+    def bulk_updated(self, objects, values):
+        pass
+
+    def bulk_output(self, obj, data):
+        return self.bulk_serializer_class(obj).data
+
+    def bulk_outputs(self, objects, values):
+        return [
+            self.bulk_output(obj, data) for obj, data in zip(objects, values)
+        ]
+
+
+class CatalogBulkMixin(BulkWriteMixin):
+    """Пакетная запись жанров и категорий: слаги не должны повторяться."""
+
+    bulk_serializer_class = CatalogItemSerializer
+
+    def bulk_resolve(self, values, errors):
+        if self.request.method != 'POST':
+            return
+        slugs = [data['slug'] for data in values if data]
+        taken = resolve_slugs(self.get_queryset().model, slugs)
+        seen = set()
+        for data, item_errors in zip(values, errors):
+            if not data:
+                continue
+            if data['slug'] in taken or data['slug'] in seen:
+                item_errors['slug'] = ['Такой slug уже существует.']
+            seen.add(data['slug'])
+
+    def bulk_apply(self, obj, data):
+        # slug служит ключом поиска и в PATCH не меняется.
+        if 'name' in data:
+            obj.name = data['name']
+            return {'name'}
+        return set()
+
+
+class TitleBulkMixin(BulkWriteMixin):
+    """Пакетная запись произведений, поиск при изменении по id."""
+
+    bulk_serializer_class = TitleItemSerializer
+    bulk_lookup_field = 'id'
+
+    def bulk_resolve(self, values, errors):
+        present = [data for data in values if data]
+        self._categories = resolve_slugs(
+            Category, [data['category'] for data in present
+                       if 'category' in data]
+        )
+        self._genres = resolve_slugs(
+            Genre, [slug for data in present for slug in data.get('genre', ())]
+        )
+        for data, item_errors in zip(values, errors):
+            if not data:
+                continue
+            if 'category' in data and (
+                data['category'] not in self._categories
+            ):
+                item_errors['category'] = [NOT_FOUND]
+            missing = [
+                slug for slug in data.get('genre', ())
+                if slug not in self._genres
+            ]
+            if missing:
+                item_errors['genre'] = [
+                    f'Жанры не найдены: {", ".join(missing)}.'
+                ]
+
+    def bulk_build(self, data):
+        return self.get_queryset().model(
+            name=data['name'],
+            year=data['year'],
+            description=data.get('description', ''),
+            category=self._categories[data['category']],
+        )
+
+    def bulk_apply(self, obj, data):
+        fields = set()
+        for name in ('name', 'year', 'description'):
+            if name in data:
+                setattr(obj, name, data[name])
+                fields.add(name)
+        if 'category' in data:
+            obj.category = self._categories[data['category']]
+            fields.add('category')
+        return fields
+
+    def bulk_created(self, objects, values):
+        record_changes(objects, Change.CREATE)
+        TitleStats.objects.bulk_create(
+            [TitleStats(title=title) for title in objects],
+            ignore_conflicts=True
+        )
+        self.set_genres(objects, values)
+
+    def bulk_updated(self, objects, values):
+        record_changes(objects, Change.UPDATE)
+        changed = [
+            (title, data) for title, data in zip(objects, values)
+            if 'genre' in data
+        ]
+        if not changed:
+            return
+        objects, values = zip(*changed)
+        TitleGenre.objects.filter(title__in=objects).delete()
+        self.set_genres(objects, values)
+
+    def set_genres(self, objects, values):
+        TitleGenre.objects.bulk_create([
+            TitleGenre(title=title, genre=self._genres[slug])
+            for title, data in zip(objects, values)
+            for slug in dict.fromkeys(data.get('genre', ()))
+        ])
+
+    def bulk_output(self, obj, data):
+        # При изменении выводятся только переданные поля.
+        return {'id': obj.pk, **data}
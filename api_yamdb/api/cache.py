@@ -0,0 +1,294 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.db.routers import read_from_primary, replica_stale_seconds
+from core.models import CacheVersion
+
+HITS_KEY = 'api:stats:hits'
+MISSES_KEY = 'api:stats:misses'
+
+
+# Кэши в памяти одного процесса. Версии пространств имён в них не видны
+# другим процессам, поэтому при таком кэше ответов они хранятся в БД.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def versions_in_cache():
+    """Хранятся ли версии в самом кэше ответов, а не в БД."""
+    return not isinstance(get_cache(), PROCESS_LOCAL_CACHES)
+
+
+def _version_key(namespace):
+    return f'api:version:{namespace}'
+
+
+# Версии из БД, прочитанные этим процессом: (алиас БД, пространство
+# имён) -> (версия, время чтения по time.monotonic()).
+_local_versions = {}
+
+
+def reset_local_versions():
+    """Забывает версии из БД, прочитанные этим процессом."""
+    _local_versions.clear()
+
+
+def _versions_db():
+    # Версии всегда читаются из основной БД: с отстающей реплики можно
+    # получить версию, которая уже сброшена.
+    return router.db_for_write(CacheVersion)
+
+
+def _stored_versions(namespaces):
+    """
+    Версии из БД, перечитанные не чаще раза в API_CACHE_VERSION_TTL мс.
+
+    Свои изменения процесс видит сразу (см. _bump), изменения других
+    процессов — не позже чем через API_CACHE_VERSION_TTL мс.
+    """
+    alias = _versions_db()
+    now = time.monotonic()
+    ttl = settings.API_CACHE_VERSION_TTL / 1000
+    known = [
+        _local_versions.get((alias, namespace)) for namespace in namespaces
+    ]
+    if all(entry and now - entry[1] < ttl for entry in known):
+        return [version for version, _ in known]
+    stored = dict(
+        CacheVersion.objects.using(alias).filter(
+            namespace__in=namespaces
+        ).values_list('namespace', 'version')
+    )
+    versions = [stored.get(namespace, 0) for namespace in namespaces]
+    for namespace, version in zip(namespaces, versions):
+        _local_versions[(alias, namespace)] = (version, now)
+    return versions
+
+
+def namespace_versions(*namespaces):
+    """
+    Текущие версии пространств имён кэша.
+
+    Версия — время последнего изменения пространства в наносекундах.
+    Версия, потерянная при вытеснении из кэша, создаётся заново
+    из текущего времени, чтобы не совпасть ни с одной из выданных раньше.
+    """
+    if not versions_in_cache():
+        return _stored_versions(namespaces)
+    cache = get_cache()
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(namespaces):
+    now = time.time_ns()
+    if not versions_in_cache():
+        alias = _versions_db()
+        versions = CacheVersion.objects.using(alias)
+        versions.bulk_create(
+            [CacheVersion(namespace=namespace, version=now)
+             for namespace in namespaces],
+            ignore_conflicts=True
+        )
+        versions.filter(namespace__in=namespaces).update(
+            version=Greatest(F('version') + 1, Value(now))
+        )
+        for namespace in namespaces:
+            _local_versions.pop((alias, namespace), None)
+        return
+    cache = get_cache()
+    keys = [_version_key(namespace) for namespace in namespaces]
+    current = cache.get_many(keys)
+    cache.set_many({
+        key: max(now, current.get(key, 0) + 1) for key in keys
+    }, timeout=None)
+
+
+def invalidate(*namespaces):
+    """
+    Сбрасывает всё, что закэшировано в указанных пространствах имён.
+
+    Версии меняются после фиксации текущей транзакции: иначе запрос,
+    прочитавший данные до фиксации, закэшировал бы их под новой версией
+    до конца таймаута.
+    """
+    transaction.on_commit(lambda: _bump(namespaces))
+
+
+def _count(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def cache_stats():
+    """Число попаданий и промахов кэша ответов."""
+    values = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
+
+
+def changed_recently(versions):
+    """Изменялось ли пространство имён, пока реплики могут отставать."""
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return max(versions) > time.time_ns() - replica_stale_seconds() * 10**9
+
+
+def request_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return 'admin' if user.is_superuser else user.role
+
+
+class VersionedReadMixin:
+    """
+    Пространства имён кэша, от которых зависят ответы list и retrieve.
+
+    По умолчанию это общее пространство cache_namespace и пространство
+    списка или конкретного объекта. Их версии сбрасываются сигналами
+    моделей (см. api/signals.py).
+    """
+
+    cache_namespace = None
+
+    def get_read_namespaces(self):
+        if self.action == 'retrieve':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return (self.cache_namespace, f'{self.cache_namespace}:{lookup}')
+        return (self.cache_namespace, f'{self.cache_namespace}:list')
+
+    def get_representation_key(self, request):
+        """
+        Отпечаток представления: версии, путь, параметры, роль, формат.
+
+        Версия — время последнего изменения пространства имён. Пока
+        изменение моложе replica_stale_seconds(), реплика может его
+        не видеть, и запрос читает из основной БД. Если запрос уже читал
+        с реплики, отпечатка нет: ответ под новыми версиями мог бы
+        закэшировать старые данные, поэтому он не кэшируется и не
+        получает ETag.
+        """
+        if not hasattr(self, '_representation_key'):
+            versions = namespace_versions(*self.get_read_namespaces())
+            if changed_recently(versions) and not read_from_primary():
+                self._representation_key = None
+                return None
+            query = sorted(request.query_params.lists())
+            raw = (
+                f'{request.path}|{query}|{request_role(request)}|'
+                f'{request.accepted_renderer.format}|{versions}'
+            )
+            self._representation_key = hashlib.md5(raw.encode()).hexdigest()
+        return self._representation_key
+
+
+class ConditionalGetMixin(VersionedReadMixin):
+    """
+    Сильные ETag для list и retrieve и ответ 304 на If-None-Match.
+
+    ETag считается по версиям пространств имён без сериализации:
+    с общим кэшем — без запросов к БД, с кэшем в памяти процесса —
+    по версиям, которые перечитываются из БД не чаще раза
+    в API_CACHE_VERSION_TTL мс.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def resolve_parents(self):
+        """
+        Проверяет родительские объекты маршрута перед ответом 304.
+
+        Удаление родителя без дочерних объектов не меняет версий,
+        поэтому без проверки на удалённый путь пришёл бы ответ 304,
+        а не 404. Вложенные вьюсеты переопределяют метод.
+        """
+
+    def conditional(self, handler, request, *args, **kwargs):
+        key = self.get_representation_key(request)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        etag = quote_etag(key)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            self.resolve_parents()
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+        return response
+
+
+class CachedReadMixin(VersionedReadMixin):
+    """
+    Кэширует данные ответов list и retrieve.
+
+    Ключ строится из пути, параметров запроса, роли пользователя
+    и версий пространств имён. cache_anonymous_only ограничивает
+    кэширование анонимными запросами.
+    """
+
+    cache_anonymous_only = False
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    def cached(self, handler, request, *args, **kwargs):
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_representation_key(request)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = 'api:response:' + key
+        data = cache.get(key)
+        if data is not None:
+            _count(HITS_KEY)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
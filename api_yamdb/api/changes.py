@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from reviews.models import Change, Comment, Genre, Review, Title
+from . import serializers
+
+SOURCES = {
+    Change.TITLE: (
+        Title.objects.select_related('category').prefetch_related(
+            Prefetch('genre', queryset=Genre.objects.all())
+        ),
+        serializers.TitleReadSerializer,
+    ),
+    Change.REVIEW: (
+        Review.objects.select_related('author'),
+        serializers.ReviewSerializer,
+    ),
+    Change.COMMENT: (
+        Comment.objects.select_related('author', 'review'),
+        serializers.CommentSerializer,
+    ),
+}
+
+
+# Начало самой старой чужой транзакции, которая уже что-то записала:
+# свои незафиксированные записи запрос и так видит.
+OLDEST_WRITE_SQL = (
+    'SELECT min(xact_start) FROM pg_stat_activity '
+    'WHERE datname = current_database() AND backend_xid IS NOT NULL '
+    'AND pid <> pg_backend_pid()'
+)
+
+
+class ChangesGone(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = (
+        'Журнал изменений с этого токена уже очищен, '
+        'синхронизируйте данные заново.'
+    )
+    default_code = 'gone'
+
+
+def latest_token():
+    """Токен, с которого начинается синхронизация после полной загрузки."""
+    return Change.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+def current_data(changes):
+    """Текущее состояние изменённых объектов, один запрос на модель."""
+    ids = defaultdict(set)
+    for change in changes:
+        if change.action != Change.DELETE:
+            ids[change.model].add(change.object_id)
+    data = {}
+    for model, pks in ids.items():
+        queryset, serializer = SOURCES[model]
+        for obj in queryset.filter(pk__in=pks):
+            data[model, obj.pk] = serializer(obj).data
+    return data
+
+
+def settled_before():
+    """
+    Время, раньше которого созданы только зафиксированные записи журнала.
+
+    id выдаются по порядку, а фиксируются транзакции в любом. Запись,
+    созданная раньше начала самой старой незавершённой пишущей
+    транзакции, имеет меньший id, чем всё, что эта транзакция ещё может
+    зафиксировать, поэтому курсор за неё не перескочит. В PostgreSQL
+    начало этой транзакции берётся из pg_stat_activity основной БД,
+    и долгая транзакция задерживает журнал, сколько бы она ни длилась.
+    В SQLite пишущие транзакции идут строго по очереди. Запас
+    CHANGES_SAFETY_LAG покрывает время между created и выдачей id,
+    расхождение часов и отставание реплик.
+    """
+    settled = timezone.now()
+    connection = connections[router.db_for_write(Change)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(OLDEST_WRITE_SQL)
+            oldest_write = cursor.fetchone()[0]
+        if oldest_write is not None:
+            settled = min(settled, oldest_write)
+    return settled - timedelta(seconds=settings.CHANGES_SAFETY_LAG)
+
+
+def changes_since(since, limit):
+    """
+    Не больше limit изменений после токена since.
+
+    Записи, за которыми ещё могут появиться записи с меньшим id
+    из незавершённых транзакций, не отдаются (см. settled_before):
+    иначе клиент пропустил бы такие записи навсегда. Для созданных
+    и изменённых объектов отдаётся их текущее состояние, так что
+    клиенту не нужно запрашивать их отдельно.
+    """
+    oldest = Change.objects.order_by('id').first()
+    if oldest is not None and oldest.action == Change.PRUNED and (
+        since < oldest.id
+    ):
+        raise ChangesGone()
+
+    settled = settled_before()
+    changes = list(
+        Change.objects.filter(id__gt=since, created__lt=settled).exclude(
+            action=Change.PRUNED
+        ).order_by('id')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    data = current_data(changes)
+    return {
+        'changes': [
+            {
+                'id': change.id,
+                'model': change.model,
+                'object_id': change.object_id,
+                'parent_id': change.parent_id,
+                'action': change.action,
+                'data': data.get((change.model, change.object_id)),
+            }
+            for change in changes
+        ],
+        'next': changes[-1].id if changes else since,
+        'has_more': has_more,
+    }
@@ -1,10 +1,18 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connections
+from django.db.models import F, Q
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 
 from reviews.models import Title
+from reviews.rankings import RATING, TRENDING, scope_for
+
+SEARCH_CONFIG = 'russian'
 
 
 class TitleFilter(filters.FilterSet):
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    name = filters.CharFilter(method='search_name')
     category = filters.CharFilter(field_name='category__slug',
                                   lookup_expr='exact')
     genre = filters.CharFilter(field_name='genre__slug', lookup_expr='exact')
@@ -12,3 +20,51 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year',)
+
+    def search_name(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию с ранжированием.
+
+        Подстроки названия находятся через триграммный индекс,
+        такие совпадения ранжируются по похожести названия на запрос.
+        Без PostgreSQL остаётся поиск подстроки без учёта регистра.
+        """
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(name__icontains=value)
+
+        query = SearchQuery(value, config=SEARCH_CONFIG)
+        return queryset.filter(
+            Q(search_vector=query) | Q(name__icontains=value)
+        ).annotate(
+            rank=(
+                SearchRank(F('search_vector'), query)
+                + TrigramSimilarity('name', value)
+            )
+        ).order_by('-rank', 'name', 'id')
+
+
+class RankingOrderingFilter(BaseFilterBackend):
+    """
+    Сортировка ?ordering=rating или ?ordering=trending по готовым местам.
+
+    Места берутся из таблицы TitleRanking по индексу (scope, rank).
+    С фильтром category или genre используется рейтинг внутри категории
+    или жанра. В выдачу попадают только произведения, у которых есть
+    место: с оценками для rating и с недавними отзывами для trending.
+    """
+
+    ordering_param = 'ordering'
+    orderings = (RATING, TRENDING)
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param)
+        if ordering not in self.orderings:
+            return queryset
+        scope = scope_for(
+            ordering,
+            category=request.query_params.get('category'),
+            genre=request.query_params.get('genre'),
+        )
+        return queryset.filter(rankings__scope=scope).order_by(
+            'rankings__rank'
+        )
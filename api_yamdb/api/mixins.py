@@ -1,5 +1,8 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins
 
+from reviews.models import Review, Title
+
 
 class ListCreateDeleteViewSet(mixins.ListModelMixin,
                               mixins.CreateModelMixin,
@@ -14,3 +17,38 @@ class CreateViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     """Вьюсет только для создания объекта."""
 
     pass
+
+
+class NestedLookupMixin:
+    """
+    Родительские объекты маршрута titles/{title_id}/reviews/{review_id}.
+
+    Весь путь проверяется одним запросом по первичному ключу, объекты
+    запоминаются на вьюсете до конца запроса. Если отзыв не относится
+    к произведению из URL, ответ 404.
+    """
+
+    def resolve_parents(self):
+        if 'review_id' in self.kwargs:
+            self.get_review()
+        else:
+            self.get_title()
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            if 'review_id' in self.kwargs:
+                self._title = self.get_review().title
+            else:
+                self._title = get_object_or_404(
+                    Title, pk=self.kwargs['title_id']
+                )
+        return self._title
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id'],
+            )
+        return self._review
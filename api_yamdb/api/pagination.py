@@ -0,0 +1,163 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.executors import fan_out
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с курсорным режимом по запросу.
+
+    С параметром ?pagination=cursor страница выбирается по ключу сортировки
+    (keyset) вместо OFFSET, а общее количество объектов не считается.
+    Поэтому глубокие страницы стоят столько же, сколько первая.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.ordering = self.get_keyset_ordering(queryset)
+        if self.ordering is None:
+            if getattr(request, 'fan_out', False):
+                return self.paginate_in_parallel(queryset, request, view)
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(
+                self.get_position_filter(self.decode_cursor(encoded))
+            )
+        results = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page_results = results[:page_size]
+        return self.page_results
+
+    def paginate_in_parallel(self, queryset, request, view=None):
+        """
+        Номерная страница, общее количество для которой считается
+        параллельно с выборкой строк.
+
+        Номер проверяется после подсчёта, как в Paginator.page, строки
+        лишней страницы отбрасываются. Особые номера (last) и ошибки
+        номера обрабатываются обычной пагинацией.
+        """
+        page_size = self.get_page_size(request)
+        number = request.query_params.get(self.page_query_param, 1)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 0
+        if not page_size or number < 1:
+            return super().paginate_queryset(queryset, request, view)
+
+        count = fan_out(queryset.count)
+        bottom = (number - 1) * page_size
+        rows = list(queryset[bottom:bottom + page_size])
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = count.result()
+        try:
+            self.page = paginator.page(number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=number, message=str(exc)
+            ))
+        self.page.object_list = rows
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.ordering is None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if self.ordering is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page_results[-1]),
+        )
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Сортировка для курсора: поля модели и id в конце для однозначности.
+
+        Если сортировка идёт по связанным полям или выражениям,
+        курсорный режим не применяется.
+        """
+        model = queryset.model
+        ordering = list(queryset.query.order_by or model._meta.ordering)
+        if not ordering or not all(isinstance(f, str) for f in ordering):
+            return None
+        self.fields = []
+        for name in ordering:
+            try:
+                field = model._meta.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.is_relation:
+                return None
+            self.fields.append((field, name.startswith('-')))
+        if not any(field.primary_key for field, _ in self.fields):
+            descending = self.fields[-1][1]
+            self.fields.append((model._meta.pk, descending))
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    def get_position_filter(self, values):
+        """Условие «строго после курсора» для составного ключа сортировки."""
+        conditions = []
+        for index, (field, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending else 'gt'
+            equal = {
+                previous.attname: values[number]
+                for number, (previous, _) in enumerate(self.fields[:index])
+            }
+            conditions.append(
+                Q(**equal, **{f'{field.attname}__{lookup}': values[index]})
+            )
+        first, descending = self.fields[0]
+        bound = Q(**{
+            f'{first.attname}__{"lte" if descending else "gte"}': values[0]
+        })
+        return bound & reduce(lambda left, right: left | right, conditions)
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field, _ in self.fields]
+        return b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, encoded):
+        try:
+            values = json.loads(b64decode(encoded.encode()).decode())
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for (field, _), value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
@@ -35,7 +35,7 @@ class IsStaffOrAuthorOrReadOnly(IsAuthenticatedOrReadOnly):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
             or request.user.role in ('admin', 'moderator')
             or request.user.is_superuser
         )
@@ -47,6 +47,6 @@ class IsUser(IsAuthenticated):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in ('GET', 'HEAD', 'OPTIONS', 'PATCH')
-            and obj == request.user
+            and obj.pk == request.user.id
         )
         # Здесь возможна ошибка из-за приоритетности операций.
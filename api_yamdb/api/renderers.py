@@ -0,0 +1,39 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если он установлен.
+
+    Ответ совпадает с JSONRenderer до байта: компактные разделители,
+    символы не экранируются в ASCII, U+2028 и U+2029 экранируются,
+    даты, Decimal и ленивые строки переводит в JSON кодировщик DRF.
+    Числа с плавающей точкой в экспоненциальной записи orjson пишет
+    иначе (1e16 вместо 1e+16), поэтому рендерер подключается только
+    к представлениям, в ответах которых их нет. Ключи не строками,
+    слишком большие целые и отступы по запросу клиента отдаются
+    обычному JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or (
+            self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,66 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.urls import URLPattern
+from rest_framework import routers
+
+from core.executors import run_in_db_pool
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+READ_ACTIONS = {'list', 'retrieve'}
+
+
+def async_read_view(view):
+    """
+    Асинхронная обёртка представления DRF для работы под ASGI.
+
+    Чтение выполняется вместе с отрисовкой ответа в ограниченном пуле
+    потоков БД, так что медленный запрос не задерживает остальные.
+    Постраничные списки при этом считают общее количество параллельно
+    со страницей (см. api/pagination.py). Изменения идут в общий
+    синхронный поток, как у обычных представлений Django под ASGI.
+    """
+    write = sync_to_async(view)
+
+    def read(request, *args, **kwargs):
+        request.fan_out = True
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await run_in_db_pool(read, request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    return update_wrapper(wrapper, view)
+
+
+class AsyncReadRouter(routers.DefaultRouter):
+    """
+    Роутер, который с async_reads=True делает асинхронными маршруты
+    list и retrieve вьюсетов с атрибутом async_reads.
+    """
+
+    def __init__(self, *args, async_reads=False, **kwargs):
+        self.async_reads = async_reads
+        super().__init__(*args, **kwargs)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        if not self.async_reads:
+            return urls
+        return [self.wrap(url) for url in urls]
+
+    def wrap(self, url):
+        view = url.callback
+        viewset = getattr(view, 'cls', None)
+        actions = getattr(view, 'actions', None) or {}
+        if not getattr(viewset, 'async_reads', False) or not (
+            READ_ACTIONS & set(actions.values())
+        ):
+            return url
+        return URLPattern(
+            url.pattern, async_read_view(view), url.default_args, url.name
+        )
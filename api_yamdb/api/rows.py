@@ -0,0 +1,129 @@
+"""
+Быстрое чтение списков произведений, отзывов и комментариев.
+
+Сериализатор DRF для каждого поля каждой строки вызывает get_attribute
+и to_representation и собирает OrderedDict из экземпляров моделей.
+Здесь строки страницы выбираются кортежами через values_list() и сразу
+превращаются в словари того же вида, что дают TitleReadSerializer,
+ReviewSerializer и CommentSerializer. Ответы совпадают до байта
+(tests/test_rows.py), а команда benchrows сравнивает скорость.
+"""
+from django.conf import settings
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.serializers import DateTimeField
+
+from api.renderers import FastJSONRenderer
+from reviews.models import Genre
+
+datetime_representation = DateTimeField().to_representation
+
+
+class TitleRows:
+    """Строки TitleReadSerializer; жанры страницы — одним запросом."""
+
+    columns = (
+        'id', 'name', 'year', 'rating_sum', 'rating_count', 'description',
+        'category_id', 'category__name', 'category__slug',
+    )
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def to_representation(self, rows):
+        genres = {}
+        if rows:
+            # Тот же порядок, что у Prefetch('genre') в TitleViewSet.
+            for title_id, name, slug in Genre.objects.filter(
+                title__in=[row[0] for row in rows]
+            ).values_list('title', 'name', 'slug'):
+                genres.setdefault(title_id, []).append(
+                    {'name': name, 'slug': slug}
+                )
+        return [
+            {
+                'id': pk,
+                'name': name,
+                'year': year,
+                'rating': (
+                    rating_sum // rating_count if rating_count else None
+                ),
+                'description': description,
+                'genre': genres.get(pk, []),
+                'category': (
+                    {'name': category_name, 'slug': category_slug}
+                    if category_id is not None else None
+                ),
+            }
+            for (pk, name, year, rating_sum, rating_count, description,
+                 category_id, category_name, category_slug) in rows
+        ]
+
+
+class ReviewRows:
+    """Строки ReviewSerializer."""
+
+    columns = ('id', 'text', 'author__username', 'score', 'pub_date')
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, rows):
+        return [
+            {
+                'id': pk,
+                'text': text,
+                'author': author,
+                'score': score,
+                'pub_date': datetime_representation(pub_date),
+            }
+            for pk, text, author, score, pub_date in rows
+        ]
+
+
+class CommentRows:
+    """Строки CommentSerializer."""
+
+    columns = ('id', 'review__text', 'author__username', 'text', 'pub_date')
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, rows):
+        return [
+            {
+                'id': pk,
+                'review': review,
+                'author': author,
+                'text': text,
+                'pub_date': datetime_representation(pub_date),
+            }
+            for pk, review, author, text, pub_date in rows
+        ]
+
+
+class RowListMixin:
+    """
+    list через values_list() и row_class вместо сериализатора.
+
+    Курсорная пагинация строит курсор по экземплярам моделей, поэтому
+    с ?pagination=cursor, как и без FAST_LIST_ROWS, список отдаёт
+    обычный сериализатор. Ответы рендерит FastJSONRenderer.
+    """
+
+    row_class = None
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if not settings.FAST_LIST_ROWS or request.query_params.get(
+            getattr(paginator, 'mode_query_param', None)
+        ) == 'cursor':
+            return super().list(request, *args, **kwargs)
+
+        rows = self.row_class()
+        queryset = rows.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(rows.to_representation(list(queryset)))
+        return self.get_paginated_response(rows.to_representation(page))
@@ -1,9 +1,10 @@
 from datetime import datetime
-from django.forms import ValidationError
 from rest_framework import serializers
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleStats)
 from users.models import User
+from .bulk import reject_reserved_slug
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -13,6 +14,9 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
         model = Category
 
+    def validate_slug(self, value):
+        return reject_reserved_slug(value)
+
 
 class GenreSerializer(serializers.ModelSerializer):
     """Сериализатор жанров."""
@@ -21,6 +25,9 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
         model = Genre
 
+    def validate_slug(self, value):
+        return reject_reserved_slug(value)
+
 
 class GenreForTitle(serializers.ModelSerializer):
     """Сериализатор genre для title."""
@@ -35,7 +42,7 @@ class TitleReadSerializer(serializers.ModelSerializer):
 
     genre = GenreSerializer(read_only=True, many=True)
     category = CategorySerializer(read_only=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         fields = ('id',
@@ -68,7 +75,21 @@ class TitleWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'genre', 'category', 'name', 'year', 'description')
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Сериализатор статистики отзывов произведения."""
+
+    title = serializers.IntegerField(source='title_id')
+    scores = serializers.DictField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta:
+        fields = ('title', 'review_count', 'last_review_date', 'scores')
+        model = TitleStats
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -80,20 +101,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         slug_field='username'
     )
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-
-        user = self.context['request'].user
-        title_id = self.context['view'].kwargs['title_id']
-
-        if Review.objects.filter(author=user, title__id=title_id).exists():
-            raise ValidationError(
-                'Вы уже писали отзыв к данному произведению'
-            )
-
-        return data
-
     class Meta:
         fields = ('id',
                   'text',
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+from .authentication import REVOKED, remember_token_version
+from .cache import invalidate
+
+
+def invalidate_title(title_id):
+    invalidate('titles:list', f'titles:{title_id}')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    invalidate('genres', 'titles')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate('categories', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate_title(instance.pk)
+
+
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def title_part_changed(sender, instance, **kwargs):
+    invalidate_title(instance.title_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    invalidate(f'reviews:title:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate(f'comments:review:{instance.review_id}')
+
+
+def remember_on_commit(user_id, version):
+    # До фиксации версия в кэше разошлась бы с БД при откате.
+    transaction.on_commit(lambda: remember_token_version(user_id, version))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    remember_on_commit(instance.pk, instance.token_version)
+    # Имя автора выводится в отзывах и комментариях.
+    if not created:
+        invalidate('reviews', 'comments')
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    remember_on_commit(instance.pk, REVOKED)
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def title_genres_changed(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Title):
+        invalidate_title(instance.pk)
+    else:
+        invalidate('titles')
@@ -0,0 +1,281 @@
+"""
+Ограничение частоты запросов корзинами жетонов.
+
+Корзина вмещает N жетонов и пополняется со скоростью N за период
+из строки вида «N/период» в settings.THROTTLE_RATES; каждый запрос
+берёт один жетон. Без жетонов ответ 429, а заголовок Retry-After
+говорит, через сколько секунд появится следующий.
+
+Корзины хранятся в памяти процесса или, если задан
+THROTTLE_CACHE_ALIAS, в общем кэше. Корзина, которая успела бы
+наполниться до краёв, ничем не отличается от новой, поэтому её
+можно удалить без потерь: в памяти процесса такие корзины вытесняются
+на каждом обращении, а в кэше истекают сами.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from core.metrics import register_collector
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_stores = {}
+_stores_lock = threading.Lock()
+# Сколько запросов отклонено в каждой области с запуска процесса.
+_throttled = {}
+
+
+def parse_rate(rate):
+    """Ёмкость корзины и секунды на один жетон из строки «N/период»."""
+    try:
+        number, period = rate.split('/')
+        capacity = int(number)
+        seconds = PERIODS[period.strip()[:1]]
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(
+            f'Неверная частота «{rate}»: нужно «число/s|m|h|d».'
+        )
+    if capacity < 1:
+        raise ImproperlyConfigured(
+            f'Неверная частота «{rate}»: число должно быть положительным.'
+        )
+    return capacity, seconds / capacity
+
+
+class LocalBuckets:
+    """
+    Корзины одной области в памяти процесса.
+
+    Корзины лежат в OrderedDict по времени последнего обращения, так что
+    первая всегда та, что не трогали дольше всех. Вытеснение снимает
+    с начала наполнившиеся корзины, а при переполнении max_size — самые
+    старые; каждое обращение в среднем стоит O(1).
+    """
+
+    timer = time.monotonic
+
+    def __init__(self, capacity, interval, max_size):
+        if max_size < 1:
+            raise ImproperlyConfigured(
+                'THROTTLE_MAX_BUCKETS должно быть не меньше 1.'
+            )
+        self.capacity = capacity
+        self.interval = interval
+        self.refill = capacity * interval
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, ident):
+        """Берёт жетон: 0, если он был, иначе секунды до следующего."""
+        now = self.timer()
+        with self._lock:
+            buckets = self._buckets
+            bucket = buckets.get(ident)
+            if bucket is None:
+                bucket = buckets[ident] = [self.capacity, now]
+            else:
+                bucket[0] = min(
+                    self.capacity,
+                    bucket[0] + (now - bucket[1]) / self.interval
+                )
+                bucket[1] = now
+                buckets.move_to_end(ident)
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                wait = 0
+            else:
+                wait = (1 - bucket[0]) * self.interval
+            while len(buckets) > self.max_size:
+                buckets.popitem(last=False)
+            while now - next(iter(buckets.values()))[1] >= self.refill:
+                buckets.popitem(last=False)
+        return wait
+
+
+class CacheBuckets:
+    """
+    Корзины одной области в общем кэше, например в memcached.
+
+    Корзина — пара (жетоны, время) под ключом с таймаутом до полного
+    наполнения. Чтение и запись не атомарны: при одновременных запросах
+    одного клиента из разных процессов он может получить на пару жетонов
+    больше.
+    """
+
+    timer = time.time
+
+    def __init__(self, cache, scope, capacity, interval):
+        self.cache = cache
+        self.prefix = f'throttle:{scope}:'
+        self.capacity = capacity
+        self.interval = interval
+
+    def take(self, ident):
+        """Берёт жетон: 0, если он был, иначе секунды до следующего."""
+        now = self.timer()
+        key = self.prefix + ident
+        bucket = self.cache.get(key)
+        if bucket is None:
+            tokens = self.capacity
+        else:
+            tokens = min(
+                self.capacity, bucket[0] + (now - bucket[1]) / self.interval
+            )
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0
+        else:
+            wait = (1 - tokens) * self.interval
+        self.cache.set(key, (tokens, now), timeout=max(
+            math.ceil((self.capacity - tokens) * self.interval), 1
+        ))
+        return wait
+
+
+def get_buckets(scope):
+    """Хранилище корзин области или None, если для неё нет ограничения."""
+    rate = settings.THROTTLE_RATES.get(scope)
+    if not rate:
+        return None
+    alias = settings.THROTTLE_CACHE_ALIAS
+    key = (scope, rate, alias, settings.THROTTLE_MAX_BUCKETS)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                capacity, interval = parse_rate(rate)
+                if alias:
+                    store = CacheBuckets(
+                        caches[alias], scope, capacity, interval
+                    )
+                else:
+                    store = LocalBuckets(
+                        capacity, interval, settings.THROTTLE_MAX_BUCKETS
+                    )
+                _stores[key] = store
+    return store
+
+
+def reset_throttles():
+    """Забывает корзины в памяти процесса и счётчики отказов."""
+    with _stores_lock:
+        _stores.clear()
+        _throttled.clear()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение области scope по корзине на клиента.
+
+    Клиент по умолчанию — IP-адрес (с учётом NUM_PROXIES); get_key
+    может вернуть None, чтобы не ограничивать запрос.
+    """
+
+    scope = None
+    delay = None
+
+    def get_ident(self, request):
+        # Тот же адрес, что у BaseThrottle, но META берётся у HttpRequest:
+        # через __getattr__ Request из DRF она стоит микросекунды.
+        return super().get_ident(request._request)
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        buckets = get_buckets(self.scope)
+        if buckets is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        self.delay = buckets.take(key)
+        if self.delay:
+            with _stores_lock:
+                _throttled[self.scope] = _throttled.get(self.scope, 0) + 1
+            return False
+        return True
+
+    def wait(self):
+        return self.delay
+
+
+class SignupThrottle(TokenBucketThrottle):
+    """Регистрации с одного адреса."""
+
+    scope = 'signup'
+
+
+class TokenThrottle(TokenBucketThrottle):
+    """Попытки получить токен с одного адреса."""
+
+    scope = 'token'
+
+
+class AnonReadThrottle(TokenBucketThrottle):
+    """Чтение анонимами с одного адреса."""
+
+    scope = 'anon_read'
+
+    def get_key(self, request, view):
+        if request._request.method in SAFE_METHODS and (
+            not request.user.is_authenticated
+        ):
+            return self.get_ident(request)
+        return None
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """Изменения от одного пользователя: отзывы, комментарии и прочие."""
+
+    scope = 'write'
+
+    def get_key(self, request, view):
+        if request._request.method in SAFE_METHODS:
+            return None
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return self.get_ident(request)
+
+
+def throttle_metrics():
+    """Число корзин и отказов по областям в текстовом формате Prometheus."""
+    with _stores_lock:
+        stores = [
+            (key[0], store) for key, store in _stores.items()
+            if isinstance(store, LocalBuckets)
+        ]
+        throttled = sorted(_throttled.items())
+    lines = [
+        '# HELP yamdb_throttle_buckets Корзины в памяти процесса.',
+        '# TYPE yamdb_throttle_buckets gauge',
+    ]
+    lines += [
+        f'yamdb_throttle_buckets{{scope="{scope}"}} {len(store)}'
+        for scope, store in sorted(stores, key=lambda item: item[0])
+    ]
+    lines += [
+        '# HELP yamdb_throttled_total Запросы, отклонённые с ответом 429.',
+        '# TYPE yamdb_throttled_total counter',
+    ]
+    lines += [
+        f'yamdb_throttled_total{{scope="{scope}"}} {count}'
+        for scope, count in throttled
+    ]
+    return lines
+
+
+register_collector(throttle_metrics)
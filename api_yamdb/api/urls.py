@@ -1,32 +1,48 @@
+from django.conf import settings
 from django.urls import include, path
-from rest_framework import routers
 
 from api import views
+from api.routers import AsyncReadRouter
 
 app_name = 'api'
 
-router_v1 = routers.DefaultRouter()
-router_v1.register('auth/signup', views.UserSignup)
-router_v1.register(
-    'users',
-    views.UserViewSet,
-    basename='users'
-)
-router_v1.register(r'titles', views.TitleViewSet, basename='titles')
-router_v1.register('categories', views.CategoryViewSet, basename='сategories')
-router_v1.register('genres', views.GenreViewSet, basename='genres')
-router_v1.register(
-    r'titles/(?P<title_id>\d+)/reviews',
-    views.ReviewViewSet,
-    basename='reviews'
-)
-router_v1.register(
-    r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
-    views.CommentViewSet,
-    basename='comments')
-
-
-urlpatterns = [
-    path('v1/', include(router_v1.urls)),
-    path('v1/auth/token/', views.get_tokens_for_user, name='token')
-]
+
+def build_router(async_reads=False):
+    router = AsyncReadRouter(async_reads=async_reads)
+    router.register('auth/signup', views.UserSignup)
+    router.register(
+        'users',
+        views.UserViewSet,
+        basename='users'
+    )
+    router.register(r'titles', views.TitleViewSet, basename='titles')
+    router.register(
+        'categories', views.CategoryViewSet, basename='сategories'
+    )
+    router.register('genres', views.GenreViewSet, basename='genres')
+    router.register(
+        r'titles/(?P<title_id>\d+)/reviews',
+        views.ReviewViewSet,
+        basename='reviews'
+    )
+    router.register(
+        r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
+        views.CommentViewSet,
+        basename='comments')
+    return router
+
+
+def api_patterns(router):
+    return [
+        path('v1/', include(router.urls)),
+        path('v1/auth/token/', views.get_tokens_for_user, name='token'),
+        path('v1/cache/stats/', views.get_cache_stats, name='cache_stats'),
+        path('v1/export/<str:table>/', views.export_table, name='export'),
+        path('v1/changes/', views.get_changes, name='changes'),
+        path('v1/metrics/', views.get_metrics, name='metrics'),
+    ]
+
+
+router_v1 = build_router(async_reads=settings.ASYNC_READ_VIEWS)
+
+urlpatterns = api_patterns(router_v1)
@@ -1,61 +1,146 @@
-from rest_framework import status, filters, viewsets
+from rest_framework import generics, status, filters, viewsets
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
-from rest_framework.decorators import api_view, permission_classes, action
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.decorators import (
+    api_view, permission_classes, action, throttle_classes
+)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.settings import api_settings
 from django.contrib.auth.tokens import default_token_generator
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg
-
-from reviews.models import Title, Review, Genre, Category
-from api import serializers, permissions, mixins
+from django.db.models import Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+
+from reviews.models import Title, TitleStats, Review, Genre, Category
+from api import serializers, permissions, mixins, throttling
+from api.authentication import access_token_for, author_for
+from api.bulk import CatalogBulkMixin, TitleBulkMixin
+from api.cache import CachedReadMixin, ConditionalGetMixin, cache_stats
+from api.changes import changes_since, latest_token
+from api.rows import CommentRows, ReviewRows, RowListMixin, TitleRows
+from core.export import CONTENT_TYPES, export_lines
+from core.mail import queue_mail
+from core.metrics import render_metrics
+from core.tables import FORMATS, TABLES_BY_NAME
 from users.models import User
-from .filters import TitleFilter
+from .filters import RankingOrderingFilter, TitleFilter
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(TitleBulkMixin, ConditionalGetMixin, CachedReadMixin,
+                   RowListMixin, viewsets.ModelViewSet):
     """
     Обработка операций с произведениями.
     """
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+    queryset = Title.objects.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.all())
+    ).order_by('name', 'id')
     permission_classes = (permissions.IsAdminOrReadOnly, )
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, RankingOrderingFilter)
     filterset_class = TitleFilter
+    cache_namespace = 'titles'
+    async_reads = True
+    query_budget = {'list': 5, 'retrieve': 4, 'stats': 2, 'bulk_stats': 2}
+    cache_anonymous_only = True
+    bulk_namespaces = ('titles',)
+    row_class = TitleRows
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return serializers.TitleReadSerializer
         return serializers.TitleWriteSerializer
 
+    def get_stats_queryset(self):
+        return Title.objects.select_related('stats').only('id', *(
+            f'stats__{field.name}'
+            for field in TitleStats._meta.concrete_fields
+        )).order_by()
+
+    @staticmethod
+    def stats_of(title):
+        # Строки статистики нет у произведений, записанных в обход
+        # сигналов, например через bulk_create: до отзывов она нулевая.
+        try:
+            return title.stats
+        except TitleStats.DoesNotExist:
+            return TitleStats(title=title)
+
+    @action(detail=True, url_path='stats')
+    def stats(self, request, pk=None):
+        """Распределение оценок, число отзывов и дата последнего."""
+        title = generics.get_object_or_404(self.get_stats_queryset(), pk=pk)
+        return Response(
+            serializers.TitleStatsSerializer(self.stats_of(title)).data
+        )
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(detail=False, url_path='stats')
+    def bulk_stats(self, request):
+        """Статистика нескольких произведений: ?ids=1,2,3."""
+        try:
+            ids = [
+                int(value) for value in
+                request.query_params.get('ids', '').split(',') if value
+            ]
+        except ValueError:
+            raise ValidationError({'ids': ['Укажите id через запятую.']})
+        if not ids or len(ids) > settings.TITLE_STATS_MAX_IDS:
+            raise ValidationError({'ids': [
+                f'Укажите от 1 до {settings.TITLE_STATS_MAX_IDS} id.'
+            ]})
+        found = self.get_stats_queryset().in_bulk(ids)
+        return Response(serializers.TitleStatsSerializer(
+            [
+                self.stats_of(found[pk])
+                for pk in dict.fromkeys(ids) if pk in found
+            ],
+            many=True
+        ).data)
+
+
+class ReviewViewSet(mixins.NestedLookupMixin, ConditionalGetMixin,
+                    RowListMixin, viewsets.ModelViewSet):
     """
     Обработка операций с отзывами.
     """
 
     serializer_class = serializers.ReviewSerializer
+    row_class = ReviewRows
     permission_classes = (permissions.IsStaffOrAuthorOrReadOnly, )
+    cache_namespace = 'reviews'
+    async_reads = True
+    query_budget = {'list': 5, 'retrieve': 4}
+
+    def get_read_namespaces(self):
+        return ('reviews', f'reviews:title:{self.kwargs["title_id"]}')
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=get_object_or_404(
-                Title,
-                id=self.kwargs.get('title_id')
+        # Повторный отзыв отсекает ограничение unique_review в БД,
+        # поэтому заранее дубликат не ищется.
+        try:
+            serializer.save(
+                author=author_for(self.request.user),
+                title=self.get_title()
             )
-        )
-
-
-class GenreViewSet(mixins.ListCreateDeleteViewSet):
+        except IntegrityError:
+            if not Review.objects.filter(
+                author_id=self.request.user.id, title=self.get_title()
+            ).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже писали отзыв к данному произведению'
+                ]
+            })
+
+
+class GenreViewSet(CatalogBulkMixin, ConditionalGetMixin, CachedReadMixin,
+                   mixins.ListCreateDeleteViewSet):
     """
     Обработка операций с жанрами.
     """
@@ -66,9 +151,14 @@ class GenreViewSet(mixins.ListCreateDeleteViewSet):
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter, )
     search_fields = ('name',)
+    cache_namespace = 'genres'
+    async_reads = True
+    query_budget = {'list': 4}
+    bulk_namespaces = ('genres', 'titles')
 
 
-class CategoryViewSet(mixins.ListCreateDeleteViewSet):
+class CategoryViewSet(CatalogBulkMixin, ConditionalGetMixin,
+                      CachedReadMixin, mixins.ListCreateDeleteViewSet):
     """
     Обработка операций с категориями.
     """
@@ -79,28 +169,34 @@ class CategoryViewSet(mixins.ListCreateDeleteViewSet):
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    cache_namespace = 'categories'
+    async_reads = True
+    query_budget = {'list': 4}
+    bulk_namespaces = ('categories', 'titles')
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(mixins.NestedLookupMixin, ConditionalGetMixin,
+                     RowListMixin, viewsets.ModelViewSet):
     """
     Обработка операций с комментариями.
     """
 
     serializer_class = serializers.CommentSerializer
+    row_class = CommentRows
     permission_classes = (permissions.IsStaffOrAuthorOrReadOnly, )
+    cache_namespace = 'comments'
+    query_budget = {'list': 5, 'retrieve': 4}
+
+    def get_read_namespaces(self):
+        return ('comments', f'comments:review:{self.kwargs["review_id"]}')
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        if review.title == title:
-            return review.comments.all()
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
-            review=get_object_or_404(Review, id=self.kwargs.get('review_id'))
+            author=author_for(self.request.user),
+            review=self.get_review()
         )
 
 
@@ -111,6 +207,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.UserSerializer
     lookup_field = 'username'
+    query_budget = {'list': 3, 'retrieve': 2}
 
     def get_queryset(self):
         if self.request.path == '/api/v1/users/me/':
@@ -155,7 +252,7 @@ class UserViewSet(viewsets.ModelViewSet):
             return self.update(request, *args, **kwargs)
 
     @action(detail=True, methods=['get', 'patch'], url_path='me')
-    def my_profile(self, request):
+    def my_profile(self, request, username=None):
         user = User.objects.get(id=self.request.user.id)
         serializer = self.get_serializer(user)
         return Response(serializer.data)
@@ -166,32 +263,37 @@ class UserSignup(mixins.CreateViewSet):
     serializer_class = serializers.UserSignupSerializer
     queryset = User.objects.all()
     permission_classes = (AllowAny, )
+    throttle_classes = (throttling.SignupThrottle, )
     http_method_names = ['post']
 
     def create(self, request):
-        """Обработка пост запроса."""
+        """
+        Обработка пост запроса.
+
+        Пользователь с кодом и письмо с ним записываются одной транзакцией,
+        а отправляет письмо команда sendqueuedmail.
+        """
 
         serializer = serializers.UserSignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        user = User.objects.get(
-            username=serializer.validated_data['username']
-        )
-        code = default_token_generator.make_token(user)
-        user.confirmation_code = code
-        user.save()
-        user_email = user.email
-        send_mail(
-            'Код подтверждения',
-            f'Используй этот код {code}',
-            'auth@yamdb.ru',
-            [f'{user_email}'],
-        )
+        with transaction.atomic():
+            user = serializer.save()
+            # Код от генератора токенов Django зависит от сохранённого
+            # пользователя, поэтому записывается вторым запросом, без
+            # сигналов сохранения.
+            code = default_token_generator.make_token(user)
+            User.objects.filter(pk=user.pk).update(confirmation_code=code)
+            queue_mail(
+                'Код подтверждения',
+                f'Используй этот код {code}',
+                [user.email],
+            )
         return Response(serializer.data)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([throttling.TokenThrottle])
 def get_tokens_for_user(request):
     """Создание JWT-токена."""
     if 'username' in request.data:
@@ -202,7 +304,75 @@ def get_tokens_for_user(request):
         if 'confirmation_code' in request.data:
             confirmation_code = request.data['confirmation_code']
             if confirmation_code == user.confirmation_code:
-                access = AccessToken.for_user(user)
+                access = access_token_for(user)
                 return Response({'token': str(access), })
         return Response(request.data, status=status.HTTP_400_BAD_REQUEST)
     return Response(request.data, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_table(request, table):
+    """
+    Потоковая выгрузка таблицы в ndjson или csv (?output=csv).
+
+    Файл совпадает с тем, что пишет команда dumpyamdbdata.
+    """
+    if table not in TABLES_BY_NAME:
+        raise NotFound('Нет такой таблицы.')
+    output = request.query_params.get('output', 'ndjson')
+    if output not in FORMATS:
+        raise ValidationError({'output': [
+            f'Допустимые форматы: {", ".join(FORMATS)}.'
+        ]})
+    response = StreamingHttpResponse(
+        export_lines(TABLES_BY_NAME[table], output),
+        content_type=CONTENT_TYPES[output]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{output}"'
+    )
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_changes(request):
+    """
+    Журнал изменений произведений, отзывов и комментариев.
+
+    Без since возвращается только текущий токен. С ?since=<токен>
+    возвращаются следующие изменения пачкой до ?limit= штук и токен
+    next для следующего запроса.
+    """
+    if 'since' not in request.query_params:
+        return Response({'next': latest_token()})
+    try:
+        since = int(request.query_params['since'])
+        limit = int(request.query_params.get(
+            'limit', settings.CHANGES_PAGE_SIZE
+        ))
+    except ValueError:
+        raise ValidationError('since и limit должны быть целыми числами.')
+    if since < 0 or not 0 < limit <= settings.CHANGES_MAX_PAGE_SIZE:
+        raise ValidationError(
+            f'since не может быть отрицательным, limit — от 1 '
+            f'до {settings.CHANGES_MAX_PAGE_SIZE}.'
+        )
+    return Response(changes_since(since, limit))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def get_cache_stats(request):
+    """Статистика попаданий в кэш ответов."""
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def get_metrics(request):
+    """Гистограммы запросов этого процесса в формате Prometheus."""
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -33,6 +34,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,18 +70,69 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# DB_ENGINE=core.db.postgresql включает пул соединений внутри процесса
+# (настройки POOL); вместе с ним CONN_MAX_AGE оставляют равным 0, чтобы
+# соединение возвращалось в пул после каждого запроса.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Сколько секунд держать соединение открытым между запросами:
+        # 0 — закрывать после каждого, пусто — не закрывать.
+        'CONN_MAX_AGE': (
+            int(os.getenv('DB_CONN_MAX_AGE', 0))
+            if os.getenv('DB_CONN_MAX_AGE', '0') else None
+        ),
+        'POOL': {
+            # Соединения, открываемые при запуске процесса gunicorn.
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            # Сколько секунд ждать свободного соединения.
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            # Простоявшее дольше стольких секунд соединение проверяется
+            # перед выдачей.
+            'CHECK_INTERVAL': float(os.getenv('DB_POOL_CHECK_INTERVAL', 30)),
+            # Через сколько секунд соединение заменяется новым.
+            'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        },
     }
 }
 
 
+# Реплики для чтения: через запятую хосты PostgreSQL (host или host:port),
+# для SQLite — файлы БД. Остальные параметры берутся из default.
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    replica = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if replica['ENGINE'].endswith('sqlite3'):
+        replica['NAME'] = location
+    else:
+        replica['HOST'], _, port = location.partition(':')
+        replica['PORT'] = port or replica['PORT']
+    DATABASES[alias] = replica
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Реплика, отставшая больше стольких секунд, не используется.
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 2))
+
+# Как часто процесс заново проверяет отставание реплики, в секундах.
+DATABASE_REPLICA_LAG_CHECK = 1
+
+# Сколько секунд после записи клиент читает из основной БД.
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
+
+READ_YOUR_WRITES_COOKIE = 'yamdb_primary'
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -128,20 +183,130 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageNumberOrCursorPagination',
     'PAGE_SIZE': 10,
+    # Сколько прокси стоит перед gunicorn: адрес клиента для ограничения
+    # частоты берётся из X-Forwarded-For, который дописал последний из них.
+    # Без прокси заголовок подделывает сам клиент, поэтому по умолчанию 0.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.AnonReadThrottle',
+        'api.throttling.WriteThrottle',
+    ),
+}
+
+# Частота запросов по областям (api/throttling.py): «число/период»,
+# где период s, m, h или d. Пустое значение снимает ограничение.
+THROTTLE_RATES = {
+    'signup': os.getenv('THROTTLE_SIGNUP', '5/h'),
+    'token': os.getenv('THROTTLE_TOKEN', '20/h'),
+    'write': os.getenv('THROTTLE_WRITE', '60/m'),
+    'anon_read': os.getenv('THROTTLE_ANON_READ', '600/m'),
 }
 
+# Алиас общего кэша для корзин ограничения частоты, чтобы процессы
+# gunicorn делили их. Пустое значение — корзины в памяти процесса.
+THROTTLE_CACHE_ALIAS = os.getenv('THROTTLE_CACHE_ALIAS', '')
+
+# Сколько корзин одной области держать в памяти процесса, не меньше 1.
+THROTTLE_MAX_BUCKETS = int(os.getenv('THROTTLE_MAX_BUCKETS', 100000))
+
+# Списки произведений, отзывов и комментариев собираются из строк
+# values_list() без сериализаторов DRF (api/rows.py).
+FAST_LIST_ROWS = os.getenv('FAST_LIST_ROWS', 'true').lower() == 'true'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Сколько секунд версия токенов пользователя хранится в кэше. С локальным
+# кэшем это предел, через который отзыв токена дойдёт до всех процессов.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кэш ответов API. В памяти процесса (по умолчанию) версии
+    # пространств имён, которые сбрасывают кэш при изменениях, хранятся
+    # в БД, чтобы их видели все процессы. С общим бэкендом, например
+    # django.core.cache.backends.memcached, версии хранятся в нём.
+    'api': {
+        'BACKEND': os.getenv(
+            'API_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', 'api'),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+API_CACHE_ALIAS = 'api'
+
+# Сколько миллисекунд процесс верит версиям пространств имён, прочитанным
+# из БД, прежде чем перечитать их. Это предел, через который изменение
+# из другого процесса сбросит кэш ответов в памяти этого; 0 — читать
+# версии на каждый запрос.
+API_CACHE_VERSION_TTL = int(os.getenv('API_CACHE_VERSION_TTL', 1000))
+
+# Сколько произведений можно запросить в /titles/stats/?ids=.
+TITLE_STATS_MAX_IDS = 100
+
+# Сколько элементов принимают пакетные запросы /<ресурс>/bulk/.
+BULK_MAX_ITEMS = 1000
+
+# Журнал изменений /api/v1/changes/: размер пачки, запас в секундах
+# к моменту, до которого записи уже зафиксированы (api/changes.py),
+# и сколько дней записи хранятся до prunechanges.
+CHANGES_PAGE_SIZE = 100
+
+CHANGES_MAX_PAGE_SIZE = 1000
+
+CHANGES_SAFETY_LAG = 5
+
+CHANGES_RETENTION_DAYS = 30
+
+# Асинхронное чтение под ASGI (api/routers.py): включается в api_yamdb/asgi.py.
+# Размеры пула потоков для запросов к БД и пула для независимых запросов
+# внутри одного ответа.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'false').lower() == 'true'
+
+ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', 8))
+
+ASYNC_FAN_OUT_THREADS = int(os.getenv('ASYNC_FAN_OUT_THREADS', 4))
+
+# Сбор метрик запросов для /api/v1/metrics/, по умолчанию выключен.
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', 'false').lower() == 'true'
+
+# Поиск повторяющихся (N+1) и медленных запросов к БД для разработки
+# и тестового стенда: сколько одинаковых запросов за запрос считать
+# повтором и сколько миллисекунд — медленным запросом.
+QUERY_INSPECTOR = os.getenv('QUERY_INSPECTOR', 'false').lower() == 'true'
+
+QUERY_REPEAT_THRESHOLD = 3
+
+SLOW_QUERY_MS = 100
+
+# За сколько последних дней считаются отзывы для ?ordering=trending.
+TRENDING_WINDOW_DAYS = 7
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+DEFAULT_FROM_EMAIL = 'auth@yamdb.ru'
+
+# Очередь писем (core.mail): сколько раз пробовать отправить письмо
+# и пауза перед повтором, которая удваивается после каждой неудачи.
+OUTBOX_MAX_ATTEMPTS = 5
+
+OUTBOX_RETRY_DELAY = 30
+
 ROLES = ('admin', 'moderator', 'user')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import OutgoingEmail
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'subject', 'recipients', 'created', 'attempts', 'sent')
+    list_filter = ('sent',)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
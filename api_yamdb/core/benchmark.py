@@ -0,0 +1,445 @@
+import json
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from io import StringIO
+from time import perf_counter
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.contrib.auth.models import AnonymousUser
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases
+)
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import rows, serializers
+from api.authentication import access_token_for
+from api.renderers import FastJSONRenderer
+from api.throttling import AnonReadThrottle, get_buckets, reset_throttles
+from api.views import TitleViewSet
+from core.executors import shutdown_executors
+from core.queries import log_queries
+from core.synthetic import SyntheticDataset
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+ANONYMOUS = 'anonymous'
+USER = 'user'
+ADMIN = 'admin'
+READERS = (ANONYMOUS, USER)
+CONFIRMATION_CODE = 'benchmark'
+# Запас к допуску при сравнении p95: на быстрых маршрутах доли
+# миллисекунды — это шум.
+SLACK_MS = 0.5
+SIZES = (
+    'users', 'categories', 'genres', 'titles',
+    'genres_per_title', 'reviews_per_title', 'comments_per_review',
+)
+
+
+@contextmanager
+def synthetic_database(sizes, seed=0):
+    """
+    Отдельная тестовая БД с синтетической выгрузкой размера sizes.
+
+    БД создаётся как при запуске тестов и удаляется при выходе из блока.
+    Ограничение частоты запросов на это время снимается: бенчмарки шлют
+    сотни запросов с одного адреса.
+    """
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data')
+            SyntheticDataset(seed=seed, **sizes).write(path)
+            call_command('loadyamdbdata', path=path, stdout=StringIO())
+        with override_settings(THROTTLE_RATES={}):
+            yield
+    finally:
+        shutdown_executors()
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0)
+
+
+@contextmanager
+def simulated_db_latency(seconds):
+    """
+    Добавляет задержку к каждому запросу к БД во всех потоках.
+
+    Заменяет сетевую задержку удалённой БД, когда прогон идёт
+    на локальной SQLite или PostgreSQL.
+    """
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    for connection in connections.all():
+        install(connection)
+    connection_created.connect(install, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for connection in connections.all():
+            if delay in connection.execute_wrappers:
+                connection.execute_wrappers.remove(delay)
+
+
+class Sample:
+    """Объекты выгрузки, к которым обращаются маршруты прогона."""
+
+    def __init__(self):
+        self.review = Review.objects.filter(
+            comments__isnull=False
+        ).select_related('title').order_by('pk').first()
+        if self.review is None:
+            raise ValueError('В БД нет отзывов с комментариями.')
+        self.title = self.review.title
+        self.comment = self.review.comments.order_by('pk').first()
+        self.genre = Genre.objects.order_by('pk').first()
+        self.category = Category.objects.order_by('pk').first()
+        users = User.objects.order_by('pk')
+        self.user, self.admin = users[0], users[1]
+        User.objects.filter(pk=self.user.pk).update(
+            role='user', confirmation_code=CONFIRMATION_CODE
+        )
+        User.objects.filter(pk=self.admin.pk).update(role='admin')
+        self.user.role, self.admin.role = 'user', 'admin'
+        self.free_title = Title.objects.exclude(
+            reviews__author=self.user
+        ).order_by('pk').first()
+        self.tokens = {
+            USER: f'Bearer {access_token_for(self.user)}',
+            ADMIN: f'Bearer {access_token_for(self.admin)}',
+        }
+
+
+class Route:
+    """
+    Запрос к маршруту api: имя URL, метод, роли и данные.
+
+    kwargs и data — функции от Sample и номера запроса. Запросы
+    с изменениями выполняются в транзакции, которая откатывается,
+    поэтому каждый повтор видит одни и те же данные.
+    """
+
+    def __init__(self, name, method='get', roles=READERS, kwargs=None,
+                 query='', data=None):
+        self.name = name
+        self.method = method
+        self.roles = roles
+        self.kwargs = kwargs or (lambda sample: {})
+        self.query = query
+        self.data = data
+
+    def key(self, role):
+        query = f'?{self.query}' if self.query else ''
+        return f'{self.method.upper()} {self.name}{query} {role}'
+
+    def url(self, sample):
+        url = reverse(f'api:{self.name}', kwargs=self.kwargs(sample))
+        if self.query:
+            url = f'{url}?{self.query.format(sample=sample)}'
+        return url
+
+    def request(self, client, sample, role, number):
+        headers = {}
+        if role != ANONYMOUS:
+            headers['HTTP_AUTHORIZATION'] = sample.tokens[role]
+        url = self.url(sample)
+        if self.method == 'get':
+            response = client.get(url, **headers)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response
+        data = self.data(sample, number) if self.data else None
+        with transaction.atomic():
+            response = getattr(client, self.method)(
+                url, json.dumps(data), content_type='application/json',
+                **headers
+            )
+            transaction.set_rollback(True)
+        return response
+
+
+def _title(sample):
+    return {'pk': sample.title.pk}
+
+
+def _review(sample):
+    return {'title_id': sample.title.pk, 'pk': sample.review.pk}
+
+
+def _comments(sample):
+    return {'title_id': sample.title.pk, 'review_id': sample.review.pk}
+
+
+def _comment(sample):
+    return {**_comments(sample), 'pk': sample.comment.pk}
+
+
+def _new_title(sample, number):
+    return {
+        'name': f'Бенчмарк {number}',
+        'year': 2000,
+        'category': sample.category.slug,
+        'genre': [sample.genre.slug],
+    }
+
+
+def _new_slug(sample, number):
+    return {'name': f'Бенчмарк {number}', 'slug': f'bench-{number}'}
+
+
+ROUTES = (
+    Route('api-root', roles=(USER,)),
+    Route('titles-list'),
+    Route('titles-list', query='ordering=rating'),
+    Route('titles-list', query='genre={sample.genre.slug}'),
+    Route('titles-list', 'post', (ADMIN,), data=_new_title),
+    Route('titles-detail', kwargs=_title),
+    Route('titles-detail', 'patch', (ADMIN,), _title,
+          data=lambda sample, number: {'name': f'Бенчмарк {number}'}),
+    Route('titles-detail', 'delete', (ADMIN,), _title),
+    Route('titles-stats', kwargs=_title),
+    Route('titles-bulk-stats', query='ids={sample.title.pk}'),
+    Route('titles-bulk', 'post', (ADMIN,),
+          data=lambda sample, number: [_new_title(sample, number)]),
+    Route('genres-list'),
+    Route('genres-list', 'post', (ADMIN,), data=_new_slug),
+    Route('genres-detail', 'delete', (ADMIN,),
+          lambda sample: {'slug': sample.genre.slug}),
+    Route('genres-bulk', 'post', (ADMIN,),
+          data=lambda sample, number: [_new_slug(sample, number)]),
+    Route('сategories-list'),
+    Route('сategories-list', 'post', (ADMIN,), data=_new_slug),
+    Route('сategories-detail', 'delete', (ADMIN,),
+          lambda sample: {'slug': sample.category.slug}),
+    Route('сategories-bulk', 'post', (ADMIN,),
+          data=lambda sample, number: [_new_slug(sample, number)]),
+    Route('reviews-list', kwargs=lambda sample: {
+        'title_id': sample.title.pk
+    }),
+    Route('reviews-list', 'post', (USER,),
+          lambda sample: {'title_id': sample.free_title.pk},
+          data=lambda sample, number: {'text': 'Бенчмарк', 'score': 7}),
+    Route('reviews-detail', kwargs=_review),
+    Route('reviews-detail', 'patch', (ADMIN,), _review,
+          data=lambda sample, number: {'text': f'Бенчмарк {number}'}),
+    Route('reviews-detail', 'delete', (ADMIN,), _review),
+    Route('comments-list', kwargs=_comments),
+    Route('comments-list', 'post', (USER,), _comments,
+          data=lambda sample, number: {'text': 'Бенчмарк'}),
+    Route('comments-detail', kwargs=_comment),
+    Route('comments-detail', 'patch', (ADMIN,), _comment,
+          data=lambda sample, number: {'text': f'Бенчмарк {number}'}),
+    Route('comments-detail', 'delete', (ADMIN,), _comment),
+    Route('users-list', roles=(ADMIN,)),
+    Route('users-detail', roles=(ADMIN,),
+          kwargs=lambda sample: {'username': sample.user.username}),
+    Route('users-detail', 'patch', (ADMIN,),
+          lambda sample: {'username': sample.user.username},
+          data=lambda sample, number: {'bio': f'Бенчмарк {number}'}),
+    Route('users-detail', roles=(USER,),
+          kwargs=lambda sample: {'username': 'me'}),
+    Route('users-my-profile', roles=(ADMIN,),
+          kwargs=lambda sample: {'username': sample.user.username}),
+    Route('user-list', 'post', (ANONYMOUS,), data=lambda sample, number: {
+        'username': f'bench{number}', 'email': f'bench{number}@yamdb.fake'
+    }),
+    Route('token', 'post', (ANONYMOUS,), data=lambda sample, number: {
+        'username': sample.user.username,
+        'confirmation_code': CONFIRMATION_CODE,
+    }),
+    Route('cache_stats', roles=(ADMIN,)),
+    Route('export', roles=(ADMIN,), kwargs=lambda sample: {'table': 'genre'}),
+    Route('changes', query='since=0'),
+    Route('metrics', roles=(ADMIN,)),
+)
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def run_routes(requests=20, cold=False, routes=ROUTES):
+    """
+    Выполняет каждый маршрут requests раз от каждой его роли.
+
+    Первый запрос прогревает кэши и не учитывается. С cold=True кэши
+    очищаются перед каждым запросом. Возвращает задержки, число запросов
+    к БД, пропускную способность и число ответов с ошибкой по маршрутам.
+    """
+    sample = Sample()
+    client = Client()
+    results = {}
+    for route in routes:
+        for role in route.roles:
+            route.request(client, sample, role, 0)
+            timings, queries, errors = [], 0, 0
+            for number in range(1, requests + 1):
+                if cold:
+                    for cache in caches.all():
+                        cache.clear()
+                with log_queries() as log:
+                    started = perf_counter()
+                    response = route.request(client, sample, role, number)
+                    timings.append(perf_counter() - started)
+                queries += log.count
+                errors += response.status_code >= 400
+            total = sum(timings)
+            timings = sorted(timing * 1000 for timing in timings)
+            results[route.key(role)] = {
+                'requests': requests,
+                'errors': errors,
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'queries': round(queries / requests, 2),
+                'throughput_rps': round(requests / total, 1),
+            }
+    return results
+
+
+def compare(results, baseline, tolerance=0.5):
+    """
+    Ухудшения относительно базового прогона.
+
+    Маршрут хуже, если его p95 вырос больше чем на tolerance
+    (и на SLACK_MS), либо выросло число запросов к БД.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = base['p95_ms'] * (1 + tolerance) + SLACK_MS
+        if result['p95_ms'] > limit:
+            regressions.append(
+                f'{key}: p95 {result["p95_ms"]} мс, '
+                f'было {base["p95_ms"]} мс'
+            )
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{key}: запросов к БД {result["queries"]}, '
+                f'было {base["queries"]}'
+            )
+    return regressions
+
+
+def list_paths(sample):
+    """Страницы списков: запрос, сериализатор DRF и строки api.rows."""
+    return (
+        ('titles', TitleViewSet.queryset,
+         serializers.TitleReadSerializer, rows.TitleRows),
+        ('reviews', sample.title.reviews.select_related('author'),
+         serializers.ReviewSerializer, rows.ReviewRows),
+        ('comments', sample.review.comments.select_related('author'),
+         serializers.CommentSerializer, rows.CommentRows),
+    )
+
+
+def compare_list_paths(iterations=200, page_size=10):
+    """
+    Время выборки и рендеринга одной страницы списка сериализатором DRF
+    и через api.rows, без HTTP, кэшей и пагинации.
+
+    Для каждого списка проверяется, что ответы совпадают до байта.
+    """
+    sample = Sample()
+    results = {}
+    for name, queryset, serializer_class, rows_class in list_paths(sample):
+        def serializer_path():
+            page = list(queryset[:page_size])
+            return JSONRenderer().render(
+                serializer_class(page, many=True).data
+            )
+
+        def rows_path():
+            row_serializer = rows_class()
+            page = list(row_serializer.values(queryset)[:page_size])
+            return FastJSONRenderer().render(
+                row_serializer.to_representation(page)
+            )
+
+        result = {'identical': serializer_path() == rows_path()}
+        for path, run in (('serializer', serializer_path),
+                          ('rows', rows_path)):
+            timings = []
+            for _ in range(iterations):
+                started = perf_counter()
+                run()
+                timings.append(perf_counter() - started)
+            timings = sorted(timing * 1000 for timing in timings)
+            result[path] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+            }
+        result['speedup_p50'] = round(
+            result['serializer']['p50_ms'] / result['rows']['p50_ms'], 1
+        )
+        results[name] = result
+    return results
+
+
+def throttle_overhead(iterations=100000, clients=1000, batches=20):
+    """
+    Время проверки AnonReadThrottle на один запрос в микросекундах.
+
+    Запросы приходят по кругу с clients адресов, и частота подобрана так,
+    чтобы никто не упёрся в ограничение: меряется только учёт жетонов.
+    Корзины хранятся в памяти процесса (memory) и в кэше default (cache).
+    """
+    factory = APIRequestFactory()
+    requests = []
+    for number in range(clients):
+        request = Request(factory.get(
+            '/api/v1/titles/',
+            REMOTE_ADDR=f'10.{number >> 16 & 255}.{number >> 8 & 255}.'
+                        f'{number & 255}'
+        ))
+        request.user = AnonymousUser()
+        requests.append(request)
+    batch_size = max(iterations // batches, 1)
+    results = {}
+    for name, alias in (('memory', ''), ('cache', 'default')):
+        with override_settings(
+            THROTTLE_RATES={'anon_read': f'{iterations}/s'},
+            THROTTLE_CACHE_ALIAS=alias,
+        ):
+            reset_throttles()
+            allowed = 0
+            timings = []
+            for batch in range(batches):
+                started = perf_counter()
+                for number in range(batch * batch_size,
+                                    (batch + 1) * batch_size):
+                    allowed += AnonReadThrottle().allow_request(
+                        requests[number % clients], None
+                    )
+                timings.append((perf_counter() - started) / batch_size)
+            timings = sorted(timing * 1e6 for timing in timings)
+            results[name] = {
+                'p50_us': round(percentile(timings, 50), 3),
+                'p95_us': round(percentile(timings, 95), 3),
+                'throttled': batches * batch_size - allowed,
+            }
+            if not alias:
+                results[name]['buckets'] = len(get_buckets('anon_read'))
+            reset_throttles()
+    return results
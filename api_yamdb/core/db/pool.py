@@ -0,0 +1,249 @@
+import os
+import threading
+from collections import deque
+from time import monotonic
+
+from django.db import connections
+
+from core import metrics
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не появилось за отведённое время."""
+
+
+class ConnectionPool:
+    """
+    Пул соединений с БД внутри процесса.
+
+    Открывает не больше max_size соединений; когда все заняты, следующий
+    запрос ждёт освобождения до timeout секунд. Соединение, простоявшее
+    дольше check_interval секунд, перед выдачей проверяется запросом
+    SELECT 1, а прожившее дольше max_lifetime закрывается и заменяется
+    новым. Свободные соединения выдаются в обратном порядке, так что
+    реже используемые стареют и закрываются.
+    """
+
+    def __init__(self, connect, min_size=0, max_size=10, timeout=10,
+                 check_interval=30, max_lifetime=None):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.max_lifetime = max_lifetime
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._born = {}
+        self.size = 0
+        self.waiting = 0
+        self.created = 0
+        self.discarded = 0
+
+    def acquire(self):
+        deadline = monotonic() + self.timeout
+        while True:
+            with self._condition:
+                candidate = self._take(deadline)
+            if candidate is None:
+                return self._open()
+            connection, last_used = candidate
+            if self._healthy(connection, last_used):
+                return connection
+            self._discard(connection)
+
+    def _take(self, deadline):
+        """Свободное соединение, либо None, если можно открыть новое."""
+        while True:
+            if self._idle:
+                return self._idle.pop()
+            if self.size < self.max_size:
+                self.size += 1
+                return None
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise PoolTimeout(
+                    f'Все {self.max_size} соединений пула заняты.'
+                )
+            self.waiting += 1
+            try:
+                self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self.size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+            self._born[id(connection)] = monotonic()
+        return connection
+
+    def _healthy(self, connection, last_used):
+        if connection.closed:
+            return False
+        now = monotonic()
+        born = self._born.get(id(connection), now)
+        if self.max_lifetime and now - born > self.max_lifetime:
+            return False
+        if now - last_used < self.check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def release(self, connection):
+        """Возвращает соединение в пул, откатив незавершённую транзакцию."""
+        if not connection.closed:
+            try:
+                connection.rollback()
+            except Exception:
+                connection.close()
+        if connection.closed:
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, monotonic()))
+            self._condition.notify()
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._born.pop(id(connection), None)
+            self.size -= 1
+            self.discarded += 1
+            self._condition.notify()
+
+    def fill(self):
+        """Открывает соединения до min_size заранее."""
+        opened = []
+        while True:
+            with self._condition:
+                if self.size >= self.min_size:
+                    break
+                self.size += 1
+            opened.append(self._open())
+        for connection in opened:
+            self.release(connection)
+
+    def close(self):
+        """Закрывает свободные соединения; занятые закроются при возврате."""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'in_use': self.size - len(self._idle),
+                'idle': len(self._idle),
+                'waiting': self.waiting,
+                'created': self.created,
+                'discarded': self.discarded,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Пулы, унаследованные дочерним процессом при fork: их соединения
+# принадлежат родителю, поэтому ссылки на них хранятся до выхода, чтобы
+# сборщик мусора не закрыл чужие сокеты.
+_inherited = []
+
+
+def _forget_pools():
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+def get_pool(key, create):
+    """
+    Пул по ключу (псевдоним БД, имя БД, настройки пула); create() создаёт
+    его при первом обращении.
+    """
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = create()
+        return _pools[key]
+
+
+def close_pools(name=None):
+    """Закрывает свободные соединения пулов БД name или всех пулов."""
+    with _pools_lock:
+        pools = [
+            pool for (_, database, _), pool in _pools.items()
+            if name is None or database == name
+        ]
+    for pool in pools:
+        pool.close()
+
+
+def prewarm_connections():
+    """
+    Открывает соединения заранее, при запуске процесса.
+
+    Бэкенд с пулом заполняет его до MIN_SIZE, для постоянных соединений
+    (CONN_MAX_AGE) открывается соединение текущего потока.
+    """
+    for connection in connections.all():
+        if hasattr(connection, 'prewarm'):
+            connection.prewarm()
+        elif connection.settings_dict['CONN_MAX_AGE'] != 0:
+            connection.ensure_connection()
+
+
+def pool_metrics():
+    """Состояние пулов в текстовом формате Prometheus."""
+    with _pools_lock:
+        pools = [
+            (key[0], _pools[key].stats()) for key in sorted(_pools, key=repr)
+        ]
+    lines = [
+        '# HELP yamdb_db_pool_connections Соединения пула по состоянию.',
+        '# TYPE yamdb_db_pool_connections gauge',
+    ]
+    for alias, stats in pools:
+        for state in ('in_use', 'idle'):
+            lines.append(
+                f'yamdb_db_pool_connections{{database="{alias}",'
+                f'state="{state}"}} {stats[state]}'
+            )
+    for name, kind, description in (
+        ('waiting', 'gauge', 'Запросы, ждущие свободного соединения.'),
+        ('created', 'counter', 'Открыто соединений с запуска процесса.'),
+        ('discarded', 'counter', 'Закрыто неисправных и старых соединений.'),
+    ):
+        metric = f'yamdb_db_pool_{name}'
+        if kind == 'counter':
+            metric += '_total'
+        lines += [
+            f'# HELP {metric} {description}',
+            f'# TYPE {metric} {kind}',
+        ]
+        lines += [
+            f'{metric}{{database="{alias}"}} {stats[name]}'
+            for alias, stats in pools
+        ]
+    return lines
+
+
+metrics.register_collector(pool_metrics)
@@ -0,0 +1,92 @@
+"""
+PostgreSQL с пулом соединений внутри процесса.
+
+Подключается через DB_ENGINE=core.db.postgresql. Закрытие соединения
+Django (в конце запроса при CONN_MAX_AGE=0 или после вызова в пуле
+потоков core.executors) возвращает его в пул, а следующее открытие
+берёт свободное соединение из пула вместо нового подключения.
+Параметры пула берутся из ключа POOL настроек БД.
+"""
+import psycopg2.extras
+from django.db.backends.postgresql import base, creation
+
+from core.db.pool import ConnectionPool, close_pools, get_pool
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 0,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'CHECK_INTERVAL': 30,
+    'MAX_LIFETIME': None,
+}
+
+
+def connect(conn_params, isolation_level=None):
+    connection = base.Database.connect(**conn_params)
+    # Как у стандартного бэкенда: OPTIONS['isolation_level'] задаётся
+    # соединению один раз, при подключении.
+    if isolation_level is not None and (
+        connection.isolation_level != isolation_level
+    ):
+        connection.set_session(isolation_level=isolation_level)
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection, loads=lambda x: x
+    )
+    return connection
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Свободные соединения пула не дают удалить тестовую БД.
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool_options(self):
+        return {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+
+    @property
+    def isolation_level_option(self):
+        return self.settings_dict['OPTIONS'].get('isolation_level')
+
+    @property
+    def pool(self):
+        # Обёртки с одинаковыми БД, уровнем изоляции и настройками пула
+        # делят один пул.
+        key = (
+            self.alias, self.settings_dict['NAME'],
+            (self.isolation_level_option,
+             *sorted(self.pool_options.items())),
+        )
+        return get_pool(key, self._create_pool)
+
+    def _create_pool(self):
+        options = self.pool_options
+        conn_params = self.get_connection_params()
+        isolation_level = self.isolation_level_option
+        return ConnectionPool(
+            lambda: connect(conn_params, isolation_level),
+            min_size=options['MIN_SIZE'],
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            check_interval=options['CHECK_INTERVAL'],
+            max_lifetime=options['MAX_LIFETIME'],
+        )
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire()
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
+
+    def prewarm(self):
+        self.pool.fill()
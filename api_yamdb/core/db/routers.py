@@ -0,0 +1,131 @@
+"""
+Чтение с реплик БД.
+
+ReplicaRoutingMiddleware разрешает запросам безопасных методов читать
+с реплик из DATABASE_REPLICAS, а ReplicaRouter направляет на выбранную
+реплику чтение таких запросов; запись и всё остальное идёт в default.
+Реплика выбирается один раз на запрос, чтобы все его чтения видели одно
+состояние, и только из тех, чьё отставание не больше
+DATABASE_REPLICA_MAX_LAG секунд.
+"""
+import random
+import threading
+from contextvars import ContextVar
+from time import monotonic
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Отставание реплики PostgreSQL в секундах; 0, если она догнала
+# основную БД или сама не является репликой.
+LAG_SQL = {
+    'postgresql': (
+        'SELECT CASE WHEN NOT pg_is_in_recovery() '
+        'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) '
+        'END'
+    ),
+}
+
+
+class ReadRouting:
+    """Разрешение текущего запроса читать с реплики и выбранная реплика."""
+
+    def __init__(self):
+        self.alias = None
+
+
+read_routing = ContextVar('read_routing', default=None)
+
+_lags = {}
+_lags_lock = threading.Lock()
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах; недоступная отстаёт бесконечно."""
+    connection = connections[alias]
+    sql = LAG_SQL.get(connection.vendor)
+    if sql is None:
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return float(cursor.fetchone()[0] or 0)
+    except DatabaseError:
+        return float('inf')
+
+
+def current_lag(alias):
+    """Отставание, проверяемое не чаще DATABASE_REPLICA_LAG_CHECK секунд."""
+    now = monotonic()
+    with _lags_lock:
+        checked = _lags.get(alias)
+    if checked and now - checked[0] < settings.DATABASE_REPLICA_LAG_CHECK:
+        return checked[1]
+    lag = replica_lag(alias)
+    with _lags_lock:
+        _lags[alias] = (now, lag)
+    return lag
+
+
+def reset_lags():
+    with _lags_lock:
+        _lags.clear()
+
+
+def choose_replica():
+    """Случайная реплика с допустимым отставанием или основная БД."""
+    fresh = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if current_lag(alias) <= settings.DATABASE_REPLICA_MAX_LAG
+    ]
+    return random.choice(fresh) if fresh else DEFAULT_DB_ALIAS
+
+
+def replica_stale_seconds():
+    """
+    Сколько секунд после записи реплика может её не видеть.
+
+    Отставание выбранной реплики не больше DATABASE_REPLICA_MAX_LAG
+    на момент проверки, а проверяется оно раз в
+    DATABASE_REPLICA_LAG_CHECK секунд.
+    """
+    return (
+        settings.DATABASE_REPLICA_MAX_LAG + settings.DATABASE_REPLICA_LAG_CHECK
+    )
+
+
+def read_from_primary():
+    """
+    Направляет оставшиеся чтения запроса в основную БД.
+
+    Возвращает False, если запрос уже читал с реплики: её выбор
+    не меняется, чтобы все чтения запроса видели одно состояние.
+    """
+    routing = read_routing.get()
+    if routing is None:
+        return True
+    if routing.alias is None:
+        routing.alias = DEFAULT_DB_ALIAS
+    return routing.alias == DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        routing = read_routing.get()
+        if routing is None:
+            return None
+        if routing.alias is None:
+            routing.alias = choose_replica()
+        return routing.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики получают схему от основной БД.
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def _executor(name, size):
+    """Пул потоков, создаваемый при первом обращении."""
+    with _lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=size, thread_name_prefix=f'yamdb-{name}'
+            )
+        return _executors[name]
+
+
+def _call(func, args, kwargs):
+    # У каждого потока пула своё соединение с БД: после вызова оно
+    # закрывается или остаётся открытым по CONN_MAX_AGE, как после запроса.
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def shutdown_executors():
+    """
+    Останавливает пулы потоков.
+
+    Соединения с БД, открытые потоками пулов при CONN_MAX_AGE > 0,
+    закрываются вместе с потоками: это нужно перед удалением тестовой БД.
+    """
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+    gc.collect()
+
+
+async def run_in_db_pool(func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию с запросами к БД в пуле потоков.
+
+    Пул ограничен ASYNC_DB_THREADS: лишние вызовы ждут в очереди,
+    не занимая цикл событий.
+    """
+    executor = _executor('db', settings.ASYNC_DB_THREADS)
+    # В отличие от sync_to_async, run_in_executor не переносит в поток
+    # контекстные переменные запроса (например, выбор реплики БД).
+    context = contextvars.copy_context()
+    return await asyncio.get_event_loop().run_in_executor(
+        executor, partial(context.run, _call, func, args, kwargs)
+    )
+
+
+def fan_out(func, *args, **kwargs):
+    """
+    Запускает независимый запрос в отдельном потоке и возвращает Future.
+
+    Отдельный пул ASYNC_FAN_OUT_THREADS не ждёт других задач, поэтому
+    поток пула БД может дожидаться результата без риска взаимной
+    блокировки.
+    """
+    executor = _executor('fan-out', settings.ASYNC_FAN_OUT_THREADS)
+    return executor.submit(
+        contextvars.copy_context().run, _call, func, args, kwargs
+    )
@@ -0,0 +1,60 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку, не храня её."""
+
+    def write(self, value):
+        return value
+
+
+def table_rows(table):
+    """
+    Строки таблицы с колонками файла выгрузки.
+
+    Читаются серверным курсором пачками по EXPORT_CHUNK_SIZE, поэтому
+    память не зависит от размера таблицы.
+    """
+    columns = list(table.columns)
+    rows = table.model.objects.order_by('pk').values_list(
+        *[table.fields[column].attname for column in columns]
+    )
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield dict(zip(columns, row))
+
+
+def _csv_value(value, encoder=DjangoJSONEncoder()):
+    if value is None:
+        return ''
+    if isinstance(value, (str, int)):
+        return value
+    return encoder.default(value)
+
+
+def export_lines(table, file_format):
+    """
+    Строки файла выгрузки в формате csv или ndjson.
+
+    Формат совпадает с тем, что читает loadyamdbdata.
+    """
+    if file_format == 'ndjson':
+        for row in table_rows(table):
+            yield json.dumps(
+                row, cls=DjangoJSONEncoder, ensure_ascii=False
+            ) + '\n'
+        return
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(table.columns))
+    for row in table_rows(table):
+        yield writer.writerow([_csv_value(value) for value in row.values()])
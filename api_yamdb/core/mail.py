@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import OutgoingEmail
+
+
+def queue_mail(subject, body, recipients, from_email=None):
+    """
+    Ставит письмо в очередь вместо отправки.
+
+    Вызывается внутри транзакции, создающей объект: если она откатится,
+    письмо тоже не уйдёт.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(recipients),
+    )
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой: удваивается после каждой неудачи."""
+    return timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def deliver_queued(batch_size=100):
+    """
+    Отправляет одну пачку писем, время которых пришло.
+
+    Строки блокируются с пропуском занятых (SKIP LOCKED), поэтому
+    несколько обработчиков не отправят одно письмо дважды. Неудачная
+    попытка откладывает письмо, после OUTBOX_MAX_ATTEMPTS попыток
+    оно больше не отправляется. Возвращает число отправленных
+    и неотправленных писем.
+    """
+    now = timezone.now()
+    sent = failed = 0
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                sent__isnull=True,
+                next_attempt__lte=now,
+                attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+            ).order_by('next_attempt', 'id')[:batch_size]
+        )
+        if not batch:
+            return sent, failed
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception:
+            # Ошибка повторится при отправке и запишется в каждое письмо.
+            pass
+        try:
+            for email in batch:
+                email.attempts += 1
+                try:
+                    EmailMessage(
+                        email.subject,
+                        email.body,
+                        email.from_email,
+                        email.recipients.split('\n'),
+                        connection=connection,
+                    ).send()
+                except Exception as error:
+                    email.last_error = f'{type(error).__name__}: {error}'
+                    email.next_attempt = now + retry_delay(email.attempts)
+                    failed += 1
+                else:
+                    email.sent = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+        OutgoingEmail.objects.bulk_update(
+            batch, ['attempts', 'last_error', 'next_attempt', 'sent']
+        )
+    return sent, failed
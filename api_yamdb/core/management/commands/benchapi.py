@@ -0,0 +1,96 @@
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmark import SIZES, compare, run_routes, synthetic_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все маршруты api в процессе на синтетических данных '
+        'и выводит задержки, число запросов к БД и пропускную способность '
+        'в JSON. Данные загружаются в отдельную тестовую БД, которая '
+        'удаляется после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--genres-per-title', type=int, default=2)
+        parser.add_argument('--reviews-per-title', type=int, default=5)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Сколько раз выполнить каждый маршрут от каждой роли.'
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кэши перед каждым запросом.'
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+        parser.add_argument(
+            '--baseline',
+            help='Файл прошлого прогона: ухудшения завершат команду ошибкой.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help='Допустимый рост p95 относительно базового прогона.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Число запросов должно быть положительным.')
+        sizes = {name: options[name] for name in SIZES}
+        with synthetic_database(sizes, options['seed']):
+            started = perf_counter()
+            results = run_routes(options['requests'], options['cold'])
+            elapsed = perf_counter() - started
+
+        requests = sum(result['requests'] for result in results.values())
+        report = {
+            'database': connection.vendor,
+            'dataset': {**sizes, 'seed': options['seed']},
+            'cold': options['cold'],
+            'total': {
+                'requests': requests,
+                'seconds': round(elapsed, 2),
+                'throughput_rps': round(requests / elapsed, 1),
+            },
+            'routes': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            self.check_baseline(report, options)
+
+    def check_baseline(self, report, options):
+        with open(options['baseline'], encoding='utf8') as file:
+            baseline = json.load(file)
+        if (baseline['database'], baseline['dataset']) != (
+            report['database'], report['dataset']
+        ):
+            self.stderr.write(
+                'Базовый прогон сделан на другой БД или других данных.'
+            )
+        regressions = compare(
+            report['routes'], baseline['routes'], options['tolerance']
+        )
+        for regression in regressions:
+            self.stderr.write(regression)
+        if regressions:
+            raise CommandError('Результаты хуже базового прогона.')
+        self.stderr.write('Ухудшений относительно базового прогона нет.')
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import resource
+import tracemalloc
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+from core.benchmark import (SIZES, Sample, percentile, simulated_db_latency,
+                            synthetic_database)
+
+NO_API_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+
+def read_urls(sample):
+    title, review = sample.title.pk, sample.review.pk
+    return [
+        '/api/v1/titles/',
+        f'/api/v1/titles/{title}/',
+        '/api/v1/genres/',
+        '/api/v1/categories/',
+        f'/api/v1/titles/{title}/reviews/',
+        f'/api/v1/titles/{title}/reviews/{review}/',
+    ]
+
+
+def summary(timings, elapsed, errors):
+    timings = sorted(timing * 1000 for timing in timings)
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'throughput_rps': round(len(timings) / elapsed, 1),
+    }
+
+
+def traced(run):
+    """Прирост выделенной памяти Python в пике выполнения run, в КБ."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (peak - before) / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает синхронное чтение (WSGI, один запрос на процесс) '
+        'и асинхронное (ASGI, api.async_urls) на синтетических данных: '
+        'задержки, пропускную способность и память на запрос в обработке. '
+        'Задержка БД имитируется паузой перед каждым запросом к ней.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--genres-per-title', type=int, default=2)
+        parser.add_argument('--reviews-per-title', type=int, default=5)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Сколько запросов ASGI обрабатывается одновременно.'
+        )
+        parser.add_argument(
+            '--db-latency',
+            type=float,
+            default=5,
+            help='Задержка каждого запроса к БД, мс.'
+        )
+        parser.add_argument(
+            '--with-cache',
+            action='store_true',
+            help='Не отключать кэш ответов API.'
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                'Число запросов и одновременных запросов должно быть '
+                'положительным.'
+            )
+        sizes = {name: options[name] for name in SIZES}
+        caches = {} if options['with_cache'] else {'CACHES': NO_API_CACHE}
+        with synthetic_database(sizes, options['seed']), override_settings(
+            **caches
+        ), simulated_db_latency(options['db_latency'] / 1000):
+            urls = read_urls(Sample())
+            wsgi = self.run_wsgi(urls, options)
+            with override_settings(ROOT_URLCONF='api.async_urls'):
+                asgi = self.run_asgi(urls, options)
+        report = {
+            'database': connection.vendor,
+            'dataset': {**sizes, 'seed': options['seed']},
+            'db_latency_ms': options['db_latency'],
+            'wsgi': wsgi,
+            'asgi': asgi,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run_wsgi(self, urls, options):
+        client = Client()
+        for url in urls:
+            client.get(url)
+
+        def run(requests):
+            timings, errors = [], 0
+            for number in range(requests):
+                started = perf_counter()
+                response = client.get(urls[number % len(urls)])
+                timings.append(perf_counter() - started)
+                errors += response.status_code >= 400
+            return timings, errors
+
+        started = perf_counter()
+        timings, errors = run(options['requests'])
+        result = summary(timings, perf_counter() - started, errors)
+        result['concurrency'] = 1
+        result['memory_per_request_kb'] = round(
+            traced(lambda: run(len(urls))) / len(urls), 1
+        )
+        # Каждый одновременный запрос при синхронных процессах gunicorn
+        # занимает отдельный процесс.
+        result['worker_rss_mb'] = round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        )
+        return result
+
+    def run_asgi(self, urls, options):
+        concurrency = options['concurrency']
+
+        async def run(requests):
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+            timings, errors = [], []
+
+            async def one(url):
+                async with semaphore:
+                    started = perf_counter()
+                    response = await client.get(url)
+                    timings.append(perf_counter() - started)
+                    errors.append(response.status_code >= 400)
+
+            await asyncio.gather(*(
+                one(urls[number % len(urls)]) for number in range(requests)
+            ))
+            return timings, sum(errors)
+
+        asyncio.run(run(len(urls)))
+        started = perf_counter()
+        timings, errors = asyncio.run(run(options['requests']))
+        result = summary(timings, perf_counter() - started, errors)
+        result['concurrency'] = concurrency
+        result['memory_per_request_kb'] = round(
+            traced(lambda: asyncio.run(run(concurrency))) / concurrency, 1
+        )
+        return result
@@ -0,0 +1,124 @@
+import json
+import threading
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.utils import load_backend
+
+from core.benchmark import percentile
+from core.db.pool import close_pools
+
+# Режимы работы с соединениями: бэкенд и CONN_MAX_AGE.
+MODES = {
+    'connect': ('django.db.backends.postgresql', 0),
+    'persistent': ('django.db.backends.postgresql', None),
+    'pool': ('core.db.postgresql', 0),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает открытие соединения с PostgreSQL на каждый запрос, '
+        'постоянные соединения (CONN_MAX_AGE) и пул core.db.postgresql. '
+        'Каждый поток, как процесс или поток сервера, выполняет запросы: '
+        'получает соединение, делает --queries запросов к БД и завершает '
+        'запрос так же, как обработчик Django.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=3,
+            help='Запросов к БД на один запрос к API.'
+        )
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=None,
+            help='Размер пула; по умолчанию POOL.MAX_SIZE из настроек.'
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Сравнение возможно только для PostgreSQL.')
+        if min(options['requests'], options['threads']) < 1:
+            raise CommandError(
+                'Число запросов и потоков должно быть положительным.'
+            )
+        settings_dict = dict(connection.settings_dict)
+        if options['pool_size']:
+            settings_dict['POOL'] = {
+                **settings_dict.get('POOL', {}),
+                'MAX_SIZE': options['pool_size'],
+            }
+        report = {
+            'requests': options['requests'],
+            'threads': options['threads'],
+            'queries_per_request': options['queries'],
+        }
+        for mode, (engine, max_age) in MODES.items():
+            report[mode] = self.run(
+                {**settings_dict, 'ENGINE': engine, 'CONN_MAX_AGE': max_age},
+                options
+            )
+        report['speedup_p50'] = {
+            mode: round(
+                report['connect']['p50_ms'] / report[mode]['p50_ms'], 1
+            )
+            for mode in ('persistent', 'pool')
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run(self, settings_dict, options):
+        backend = load_backend(settings_dict['ENGINE'])
+        threads = options['threads']
+        per_thread = -(-options['requests'] // threads)
+        timings, wrappers = [], []
+        lock = threading.Lock()
+
+        def worker():
+            wrapper = backend.DatabaseWrapper(settings_dict)
+            wrappers.append(wrapper)
+            local = []
+            for _ in range(per_thread):
+                started = perf_counter()
+                with wrapper.cursor() as cursor:
+                    for _ in range(options['queries']):
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                # Конец запроса, как сигнал request_finished.
+                wrapper.close_if_unusable_or_obsolete()
+                local.append(perf_counter() - started)
+            wrapper.close()
+            with lock:
+                timings.extend(local)
+
+        started = perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = perf_counter() - started
+
+        timings = sorted(timing * 1000 for timing in timings)
+        result = {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'throughput_rps': round(len(timings) / elapsed, 1),
+        }
+        if hasattr(wrappers[0], 'pool'):
+            stats = wrappers[0].pool.stats()
+            result['pool_created'] = stats['created']
+            close_pools(settings_dict['NAME'])
+        return result
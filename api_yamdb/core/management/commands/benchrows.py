@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import SIZES, compare_list_paths, synthetic_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает выборку и рендеринг страницы списков произведений, '
+        'отзывов и комментариев сериализаторами DRF и через строки '
+        'api.rows на синтетических данных и проверяет, что ответы '
+        'совпадают до байта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--genres-per-title', type=int, default=2)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--comments-per-review', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['page_size'] < 1:
+            raise CommandError(
+                'Число повторов и размер страницы должны быть '
+                'положительными.'
+            )
+        sizes = {name: options[name] for name in SIZES}
+        with synthetic_database(sizes, options['seed']):
+            results = compare_list_paths(
+                options['iterations'], options['page_size']
+            )
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if not all(result['identical'] for result in results.values()):
+            raise CommandError('Ответы сериализаторов и строк различаются.')
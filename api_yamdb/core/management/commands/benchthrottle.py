@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import throttle_overhead
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет, сколько микросекунд на запрос добавляет ограничение '
+        'частоты корзинами жетонов в памяти процесса и в кэше. БД не нужна.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200000)
+        parser.add_argument('--clients', type=int, default=10000)
+        parser.add_argument(
+            '--max-us', type=float,
+            help='Завершиться ошибкой, если p50 в памяти процесса больше.'
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['clients'] < 1:
+            raise CommandError(
+                'Число повторов и клиентов должно быть положительным.'
+            )
+        results = throttle_overhead(options['iterations'], options['clients'])
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        limit = options['max_us']
+        if limit is not None and results['memory']['p50_us'] > limit:
+            raise CommandError(
+                f'Проверка занимает {results["memory"]["p50_us"]} мкс '
+                f'на запрос, допустимо {limit} мкс.'
+            )
@@ -0,0 +1,77 @@
+import random
+from statistics import mean
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.filters import TitleFilter
+from core.synthetic import VOCABULARY, SyntheticDataset
+from core.tables import TABLES_BY_NAME, chunked
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск произведений по названию: прежний contains '
+        'и полнотекстовый поиск TitleFilter. Данные создаются во временной '
+        'транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.fill(options)
+            terms = self.terms(options)
+            self.measure('contains', terms, lambda value: (
+                Title.objects.filter(name__contains=value).order_by('name')
+            ))
+            self.measure('search', terms, lambda value: TitleFilter(
+                {'name': value}, queryset=Title.objects.order_by('name')
+            ).qs)
+            transaction.set_rollback(True)
+
+    def fill(self, options):
+        table = TABLES_BY_NAME['titles']
+        started = perf_counter()
+        rows = SyntheticDataset(
+            titles=options['titles'], seed=options['seed']
+        ).titles_rows()
+        for batch in chunked(rows, options['batch_size']):
+            for row in batch:
+                del row['id'], row['category']
+            Title.objects.bulk_create([table.build(row) for row in batch])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE reviews_title')
+        self.stdout.write(
+            f'Создано {options["titles"]} произведений '
+            f'за {perf_counter() - started:.1f} с'
+        )
+
+    def terms(self, options):
+        generator = random.Random(options['seed'])
+        words = generator.choices(VOCABULARY, k=options['queries'])
+        # Половина запросов ищет целое слово, половина — его часть.
+        return [
+            word if number % 2 else word[1:-1]
+            for number, word in enumerate(words)
+        ]
+
+    def measure(self, name, terms, build):
+        timings = []
+        for value in terms:
+            started = perf_counter()
+            queryset = build(value)
+            queryset.count()
+            list(queryset[:10])
+            timings.append((perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{name}: среднее {mean(timings):.1f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95)]:.1f} мс'
+        )
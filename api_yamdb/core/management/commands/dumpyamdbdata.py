@@ -0,0 +1,47 @@
+import os
+from time import monotonic
+
+from django.core.management.base import BaseCommand
+
+from core.export import export_lines
+from core.tables import FORMATS, TABLES, TABLES_BY_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает таблицы в csv или ndjson, которые снова '
+        'загружаются командой loadyamdbdata.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='export',
+            help='Папка для файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Формат файлов.'
+        )
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=list(TABLES_BY_NAME),
+            help='Какие таблицы выгрузить, по умолчанию все.'
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['path'], exist_ok=True)
+        tables = [
+            TABLES_BY_NAME[name] for name in options['table']
+        ] if options['table'] else TABLES
+        for table in tables:
+            started = monotonic()
+            path = table.path(options['path'], options['format'])
+            with open(path, 'w', encoding='utf8', newline='') as file:
+                file.writelines(export_lines(table, options['format']))
+            self.stdout.write(
+                f'{path}: {monotonic() - started:.2f} с'
+            )
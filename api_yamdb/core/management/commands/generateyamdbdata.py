@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.synthetic import SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = 'Создаёт синтетическую выгрузку csv для loadyamdbdata.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='static/data',
+            help='Папка, в которую записываются файлы csv.'
+        )
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--genres-per-title', type=int, default=2)
+        parser.add_argument('--reviews-per-title', type=int, default=5)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        dataset = SyntheticDataset(
+            users=options['users'],
+            categories=options['categories'],
+            genres=options['genres'],
+            titles=options['titles'],
+            genres_per_title=options['genres_per_title'],
+            reviews_per_title=options['reviews_per_title'],
+            comments_per_review=options['comments_per_review'],
+            seed=options['seed'],
+        )
+        for name, rows in dataset.write(options['path']).items():
+            self.stdout.write(f'{name}: {rows} строк')
@@ -1,85 +1,255 @@
-from django.core.management.base import BaseCommand
-from csv import DictReader
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from multiprocessing import get_context
+from time import monotonic
 
-from reviews.models import Category, Comment, Genre, TitleGenre, Title, Review
-from users.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+
+from core.tables import (FORMATS, TABLES, TABLES_BY_NAME, chunked,
+                         loading_stages, read_rows)
+from reviews.rankings import refresh_rankings
+from reviews.ratings import rebuild_ratings
+
+MAX_REPORTED_ERRORS = 10
+
+
+class Checkpoint:
+    """
+    Число уже загруженных строк таблицы, сохраняемое после каждой пачки.
+
+    Для каждой таблицы свой файл, поэтому параллельные процессы
+    не мешают друг другу.
+    """
+
+    def __init__(self, directory, table):
+        self.path = (
+            os.path.join(directory, f'{table.name}.progress')
+            if directory else None
+        )
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def read(self):
+        if not self.enabled or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as file:
+            return int(file.read() or 0)
+
+    def write(self, rows):
+        if not self.enabled:
+            return
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(str(rows))
+        os.replace(temporary, self.path)
+
+
+def load_table(name, options):
+    """
+    Загружает таблицу пачками по batch_size строк (см. Table.save).
+
+    Без контрольной точки вся таблица пишется одной транзакцией.
+    С ней каждая пачка фиксируется отдельно, а после сбоя загрузка
+    продолжается с первой незафиксированной строки. Пачка, записанная
+    перед самым сбоем, но не отмеченная в контрольной точке, повторно
+    вставляется с пропуском конфликтов.
+    """
+    table = TABLES_BY_NAME[name]
+    checkpoint = Checkpoint(options['checkpoint'], table)
+    done = checkpoint.read()
+    started = monotonic()
+    loaded = 0
+    batches = chunked(
+        islice(
+            read_rows(table.path(options['path'], options['format'])),
+            done, None
+        ),
+        options['batch_size']
+    )
+    whole_table = nullcontext() if checkpoint.enabled else transaction.atomic()
+    with whole_table:
+        for batch in batches:
+            with transaction.atomic(savepoint=False):
+                table.save(
+                    [table.build(row) for row in batch],
+                    ignore_conflicts=bool(done) and not loaded
+                )
+            loaded += len(batch)
+            checkpoint.write(done + loaded)
+    return name, loaded, monotonic() - started
 
 
 class Command(BaseCommand):
-    help = 'Загружает объекты и таблиц csv в БД.'
-
-    def handle(self, *args, **kwargs):
-
-        for row in DictReader(open('static/data/users.csv', encoding="utf8")):
-            user = User(
-                id=row['id'],
-                username=row['username'],
-                email=row['email'],
-                role=row['role'],
-                bio=row['bio'],
-                first_name=row['first_name'],
-                last_name=row['last_name']
-            )
-            user.save()
-
-        for row in DictReader(
-            open('static/data/category.csv', encoding="utf8")
-        ):
-            category = Category(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug']
-            )
-            category.save()
+    help = 'Загружает объекты из таблиц csv или ndjson в БД.'
 
-        for row in DictReader(open('static/data/genre.csv', encoding="utf8")):
-            genre = Genre(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug']
-            )
-            genre.save()
-
-        for row in DictReader(open('static/data/titles.csv', encoding="utf8")):
-            title = Title(
-                id=row['id'],
-                name=row['name'],
-                year=row['year'],
-                category=Category.objects.get(id=row['category'])
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='static/data',
+            help='Папка с файлами выгрузки.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Формат файлов: csv или ndjson (см. dumpyamdbdata).'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Сколько строк читать и записывать за один раз.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить файлы, ничего не записывая в БД.'
+        )
+        parser.add_argument(
+            '--timing',
+            action='store_true',
+            help='Выводить время и скорость загрузки каждой таблицы.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов загружают независимые таблицы.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Папка для контрольных точек: прерванная загрузка '
+                'продолжится с места остановки.'
             )
-            title.save()
-
-        for row in DictReader(
-            open('static/data/genre_title.csv', encoding="utf8")
-        ):
-            genre_title = TitleGenre(
-                id=row['id'],
-                title=Title.objects.get(id=row['title_id']),
-                genre=Genre.objects.get(id=row['genre_id'])
-            )
-            genre_title.save()
-
-        for row in DictReader(open('static/data/review.csv', encoding="utf8")):
-            review = Review(
-                id=row['id'],
-                title=Title.objects.get(id=row['title_id']),
-                text=row['text'],
-                author=User.objects.get(id=row['author']),
-                score=row['score'],
-                pub_date=row['pub_date'],
-            )
-            review.save()
-
-        for row in DictReader(
-            open('static/data/comments.csv', encoding="utf8")
-        ):
-            comment = Comment(
-                id=row['id'],
-                review=Review.objects.get(id=row['review_id']),
-                text=row['text'],
-                author=User.objects.get(id=row['author']),
-                pub_date=row['pub_date'],
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError(
+                'Размер пачки и число процессов должны быть положительными.'
             )
-            comment.save()
 
+        if options['dry_run']:
+            self.check_tables(options)
+            return
+
+        self.workers = options['workers']
+        if options['checkpoint']:
+            os.makedirs(options['checkpoint'], exist_ok=True)
+
+        for stage in loading_stages():
+            for name, rows, seconds in self.load_stage(stage, options):
+                self.report(TABLES_BY_NAME[name], rows, seconds, options)
+
+        self.reset_sequences()
+        rebuild_ratings()
+        refresh_rankings()
         self.stdout.write('Объекты загруженны в базу данных.')
+
+    def load_stage(self, stage, options):
+        """Загружает независимые таблицы, по возможности параллельно."""
+        names = [table.name for table in stage]
+        options = {
+            key: options[key]
+            for key in ('path', 'format', 'batch_size', 'checkpoint')
+        }
+        workers = min(self.workers, len(names))
+        if workers <= 1:
+            return [load_table(name, options) for name in names]
+
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context('fork')
+        ) as executor:
+            return list(executor.map(
+                load_table, names, [options] * len(names)
+            ))
+
+    def reset_sequences(self):
+        """Сдвигает счётчики id за максимальные загруженные значения."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [table.model for table in TABLES]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def check_tables(self, options):
+        """
+        Проверяет значения полей и ссылки между таблицами без записи.
+
+        В памяти держатся только id таблиц, на которые ссылаются другие:
+        комментарии, например, проверяются построчно и не запоминаются.
+        """
+        referenced = {
+            model for table in TABLES for model in table.relations.values()
+        }
+        known_ids = {}
+        failed = False
+        for table in TABLES:
+            started = monotonic()
+            ids = set() if table.model in referenced else None
+            errors = 0
+            rows = 0
+            path = table.path(options['path'], options['format'])
+            name = os.path.basename(path)
+            # В csv первая строка файла — заголовок.
+            first_line = 2 if options['format'] == 'csv' else 1
+            for line, row in enumerate(read_rows(path), start=first_line):
+                rows += 1
+                problems = self.check_row(table, row, known_ids)
+                if problems:
+                    errors += 1
+                    if errors <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(
+                            f'{name}:{line}: {problems}'
+                        )
+                elif ids is not None:
+                    ids.add(int(row['id']))
+            if ids is not None:
+                known_ids[table.model] = ids
+            self.report(table, rows, monotonic() - started, options)
+            if errors:
+                failed = True
+                self.stderr.write(
+                    f'{name}: ошибок в строках: {errors}'
+                )
+
+        if failed:
+            raise CommandError('Файлы содержат ошибки.')
+        self.stdout.write('Файлы прошли проверку.')
+
+    def check_row(self, table, row, known_ids):
+        checked = table.fields.values()
+        try:
+            missing = [
+                column for column, model in table.relations.items()
+                if row.get(column)
+                and int(row[column]) not in known_ids.get(model, ())
+            ]
+            if missing:
+                return f'нет объектов для {", ".join(missing)}'
+            table.build(row).clean_fields(exclude=[
+                field.name for field in table.model._meta.fields
+                if field not in checked or field.is_relation
+            ])
+        except (ValidationError, ValueError) as error:
+            return error
+        return None
+
+    def report(self, table, rows, seconds, options):
+        if options['timing']:
+            speed = rows / seconds if seconds else 0
+            self.stdout.write(
+                f'{table.name}: {rows} строк за {seconds:.2f} с '
+                f'({speed:.0f} строк/с)'
+            )
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import Change
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет старые записи журнала изменений. Клиенты с более '
+        'старым токеном получат ответ 410 и синхронизируются заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CHANGES_RETENTION_DAYS,
+            help='Сколько дней хранить записи.'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        boundary = Change.objects.filter(created__lt=cutoff).order_by(
+            '-id'
+        ).first()
+        if boundary is None:
+            self.stdout.write('Удалять нечего.')
+            return
+        # Последняя удаляемая запись остаётся меткой: токены до неё
+        # получают ответ 410, а пропуски в id не дают ложных срабатываний.
+        with transaction.atomic():
+            deleted, _ = Change.objects.filter(id__lt=boundary.id).delete()
+            Change.objects.filter(id=boundary.id).update(
+                action=Change.PRUNED
+            )
+        self.stdout.write(f'Удалено записей журнала: {deleted + 1}')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ratings import (find_rating_drift, find_stats_drift,
+                             rebuild_ratings)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги и статистику произведений по отзывам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не изменяя.'
+        )
+
+    def handle(self, *args, **options):
+        drift = find_rating_drift()
+
+        if options['check']:
+            for title in drift:
+                self.stdout.write(
+                    f'{title.pk}: сохранено {title.rating_sum}/'
+                    f'{title.rating_count}, по отзывам '
+                    f'{title.actual_sum}/{title.actual_count}'
+                )
+            stats_drift, missing = find_stats_drift()
+            for stats in stats_drift:
+                self.stdout.write(
+                    f'{stats.pk}: статистика расходится с отзывами'
+                )
+            for title in missing:
+                self.stdout.write(f'{title.pk}: нет статистики')
+            if drift.exists() or stats_drift.exists() or missing.exists():
+                raise CommandError('Рейтинги расходятся с отзывами.')
+            self.stdout.write('Расхождений не найдено.')
+            return
+
+        updated = rebuild_ratings()
+        self.stdout.write(f'Рейтинги пересчитаны: {updated} произведений.')
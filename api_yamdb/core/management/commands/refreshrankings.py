@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import invalidate
+from reviews.rankings import KINDS, refresh_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает места произведений для ?ordering=rating '
+        'и ?ordering=trending.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            choices=KINDS,
+            help='Какие рейтинги пересчитать, по умолчанию все.'
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_rankings(options['kind'] or KINDS)
+        invalidate('titles:list')
+        for kind, places in written.items():
+            self.stdout.write(f'{kind}: мест {places}')
@@ -0,0 +1,44 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.mail import deliver_queued
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящей почты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько писем отправлять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь снова и снова.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда в очереди нечего отправлять.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+
+        while True:
+            sent, failed = deliver_queued(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, отложено: {failed}.'
+                )
+            if sent + failed == options['batch_size']:
+                continue
+            if not options['loop']:
+                return
+            sleep(options['interval'])
@@ -0,0 +1,129 @@
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+def _labels(pairs):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Гистограмма в памяти процесса.
+
+    Хранит число наблюдений в каждой корзине, их сумму и количество
+    отдельно для каждого набора меток. У каждого процесса gunicorn
+    свои гистограммы.
+    """
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(
+                key, ([0] * (len(self.buckets) + 1), 0)
+            )
+            counts[index] += 1
+            self._series[key] = counts, total + value
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def render(self):
+        """Строки гистограммы в текстовом формате Prometheus."""
+        with self._lock:
+            series = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._series.items()
+            }
+        lines = [
+            f'# HELP {self.name} {self.description}',
+            f'# TYPE {self.name} histogram',
+        ]
+        for key in sorted(series):
+            counts, total = series[key]
+            seen = 0
+            bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, counts):
+                seen += count
+                labels = _labels(key + (('le', bound),))
+                lines.append(f'{self.name}_bucket{{{labels}}} {seen}')
+            labels = _labels(key)
+            lines.append(f'{self.name}_sum{{{labels}}} {_number(total)}')
+            lines.append(f'{self.name}_count{{{labels}}} {seen}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'yamdb_request_duration_seconds',
+    'Время обработки запроса.',
+    LATENCY_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries',
+    'Число запросов к БД за запрос.',
+    QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    'yamdb_db_duration_seconds',
+    'Время запросов к БД за запрос.',
+    LATENCY_BUCKETS
+)
+SERIALIZATION_DURATION = Histogram(
+    'yamdb_serialization_duration_seconds',
+    'Время отрисовки тела ответа рендерером.',
+    LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'yamdb_response_size_bytes',
+    'Размер тела ответа; потоковые ответы не учитываются.',
+    SIZE_BUCKETS
+)
+HISTOGRAMS = (
+    REQUEST_DURATION, DB_QUERIES, DB_DURATION,
+    SERIALIZATION_DURATION, RESPONSE_SIZE,
+)
+# Функции, возвращающие строки метрик, которые считаются не в запросах,
+# а в момент выдачи: например, состояние пулов соединений с БД.
+COLLECTORS = []
+
+
+def register_collector(collector):
+    if collector not in COLLECTORS:
+        COLLECTORS.append(collector)
+
+
+def render_metrics():
+    """Все гистограммы и метрики сборщиков в текстовом формате Prometheus."""
+    lines = [line for histogram in HISTOGRAMS for line in histogram.render()]
+    for collector in COLLECTORS:
+        lines += collector()
+    return ''.join(f'{line}\n' for line in lines)
+
+
+def reset_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
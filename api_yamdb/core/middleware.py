@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core import metrics
+from core.db.routers import ReadRouting, read_routing
+from core.queries import log_queries, request_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Обёртка выполнения SQL: считает запросы и время в БД."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.count += 1
+                self.duration += duration
+
+
+# Счётчик запросов текущего HTTP-запроса. Пулы core.executors переносят
+# контекстные переменные в свои потоки, поэтому запросы к БД из них
+# попадают в тот же счётчик.
+query_timer = ContextVar('query_timer', default=None)
+
+
+def timed_execute(execute, sql, params, many, context):
+    timer = query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    """Ставит timed_execute на соединение любого потока один раз."""
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
+
+
+class RequestMetricsMiddleware:
+    """
+    Записывает в гистограммы core.metrics время запроса, число и время
+    запросов к БД, время отрисовки ответа и его размер по каждому
+    представлению.
+
+    Включается настройкой REQUEST_METRICS, без неё исключается
+    из цепочки при запуске.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(
+            install_query_timer, dispatch_uid='yamdb_query_timer'
+        )
+
+    def __call__(self, request):
+        request._render_duration = 0.0
+        # Соединения, открытые до запуска цепочки, получают обёртку здесь.
+        for connection in connections.all():
+            install_query_timer(connection)
+        queries = QueryTimer()
+        token = query_timer.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            query_timer.reset(token)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        labels = {
+            'view': match.view_name if match else 'unresolved',
+            'method': request.method,
+        }
+        metrics.REQUEST_DURATION.observe(duration, **labels)
+        metrics.DB_QUERIES.observe(queries.count, **labels)
+        metrics.DB_DURATION.observe(queries.duration, **labels)
+        metrics.SERIALIZATION_DURATION.observe(
+            request._render_duration, **labels
+        )
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.observe(len(response.content), **labels)
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF отрисовываются после представления: засекаем render.
+        render = response.render
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                request._render_duration += time.perf_counter() - start
+
+        response.render = timed_render
+        return response
+
+
+def describe_view(request, response):
+    """Представление DRF, его название и сериализатор для журнала."""
+    view = (getattr(response, 'renderer_context', None) or {}).get('view')
+    match = request.resolver_match
+    if view is None:
+        return None, match.view_name if match else 'unresolved', None
+    name = type(view).__name__
+    if getattr(view, 'action', None):
+        name = f'{name}.{view.action}'
+    serializer = None
+    if hasattr(view, 'get_serializer_class'):
+        try:
+            serializer = view.get_serializer_class().__name__
+        except (AssertionError, AttributeError):
+            pass
+    return view, name, serializer
+
+
+class QueryInspectorMiddleware:
+    """
+    Ищет повторяющиеся и медленные запросы к БД.
+
+    Для окружений разработки и тестирования: включается настройкой
+    QUERY_INSPECTOR. Отпечаток, встретившийся за запрос
+    QUERY_REPEAT_THRESHOLD раз и больше (обычно N+1 в сериализаторе),
+    и запросы дольше SLOW_QUERY_MS пишутся в журнал с представлением
+    и сериализатором.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with log_queries() as log:
+            response = self.get_response(request)
+        view, name, serializer = describe_view(request, response)
+        origin = f'{name} ({serializer})' if serializer else name
+        for sql, count in log.repeated(settings.QUERY_REPEAT_THRESHOLD):
+            logger.warning(
+                'Повторяющийся запрос в %s: %d раз: %s', origin, count, sql
+            )
+        for sql, duration in log.slow(settings.SLOW_QUERY_MS / 1000):
+            logger.warning(
+                'Медленный запрос в %s: %.0f мс: %s',
+                origin, duration * 1000, sql
+            )
+        request_queries.send(
+            sender=type(view) if view else None,
+            request=request, view=view, log=log
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает запросам безопасных методов читать с реплик БД.
+
+    После успешной записи ответ получает подписанную куку, и следующие
+    READ_YOUR_WRITES_SECONDS секунд чтения этого клиента идут в основную
+    БД: он сразу видит свой отзыв или комментарий, даже если реплики
+    отстают. Без DATABASE_REPLICAS исключается из цепочки при запуске.
+    Работает и в синхронном, и в асинхронном режиме.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django распознаёт асинхронный экземпляр.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = read_routing.set(self.routing_for(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_routing.reset(token)
+        return self.stick_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = read_routing.set(self.routing_for(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_routing.reset(token)
+        return self.stick_after_write(request, response)
+
+    def routing_for(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        try:
+            request.get_signed_cookie(
+                settings.READ_YOUR_WRITES_COOKIE,
+                salt=settings.READ_YOUR_WRITES_COOKIE,
+                max_age=settings.READ_YOUR_WRITES_SECONDS
+            )
+        except (KeyError, signing.BadSignature):
+            return ReadRouting()
+        return None
+
+    def stick_after_write(self, request, response):
+        if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and (
+            200 <= response.status_code < 300
+        ):
+            response.set_signed_cookie(
+                settings.READ_YOUR_WRITES_COOKIE, '1',
+                salt=settings.READ_YOUR_WRITES_COOKIE,
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+
+    Записывается в той же транзакции, что и объект, ради которого
+    отправляется, а доставляется отдельно командой sendqueuedmail.
+    """
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(max_length=255, verbose_name='Отправитель')
+    recipients = models.TextField(verbose_name='Получатели')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Исходящее письмо'
+        indexes = [
+            models.Index(
+                fields=['next_attempt'],
+                name='outgoing_email_pending_idx',
+                condition=models.Q(sent__isnull=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
+
+
+class CacheVersion(models.Model):
+    """
+    Версия пространства имён кэша ответов API (см. api/cache.py).
+
+    Нужна, когда кэш ответов живёт в памяти процесса: версия в БД видна
+    всем процессам, поэтому изменение из любого воркера gunicorn или
+    команды manage.py сбрасывает кэш во всех. Версия — время последнего
+    изменения в наносекундах.
+    """
+
+    namespace = models.CharField(max_length=255, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+
+    def __str__(self):
+        return f'{self.namespace}: {self.version}'
@@ -0,0 +1,81 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.dispatch import Signal
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_LIST = re.compile(r'\(\?(?:\s*,\s*\?)*\)')
+_SPACE = re.compile(r'\s+')
+_TRANSACTION = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+# Отправляется после запроса, проверенного QueryInspectorMiddleware:
+# view — экземпляр представления DRF или None, log — QueryLog.
+request_queries = Signal()
+
+
+def fingerprint(sql):
+    """
+    SQL без значений: строки и числа заменены на ?, списки IN — на (?).
+
+    Запросы, различающиеся только параметрами, получают один отпечаток.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(?)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryLog:
+    """
+    Обёртка выполнения SQL, записывающая запросы с отпечатками и временем.
+
+    Точки сохранения транзакций не записываются: это не запросы к данным.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(_TRANSACTION):
+                self.queries.append(
+                    (fingerprint(sql), sql, time.perf_counter() - start)
+                )
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, threshold):
+        """Отпечатки, встретившиеся не меньше threshold раз, и их число."""
+        counts = Counter(query[0] for query in self.queries)
+        return [
+            (sql, count) for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def slow(self, threshold):
+        """Запросы дольше threshold секунд с их временем."""
+        return [
+            (sql, duration) for _, sql, duration in self.queries
+            if duration >= threshold
+        ]
+
+
+@contextmanager
+def log_queries():
+    """Записывает в QueryLog запросы ко всем БД внутри блока."""
+    log = QueryLog()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
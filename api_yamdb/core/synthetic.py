@@ -0,0 +1,141 @@
+import csv
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import product
+
+from core.tables import TABLES_BY_NAME
+
+ROLES = ('user', 'user', 'user', 'moderator', 'admin')
+WORDS = (
+    'отличный', 'сюжет', 'скучно', 'герой', 'финал', 'музыка', 'книга',
+    'фильм', 'рекомендую', 'слабо', 'шедевр', 'актёры', 'история',
+)
+SYLLABLES = ('ка', 'ро', 'ми', 'ну', 'ле', 'ва', 'ст', 'ор', 'ин', 'да')
+# Словарь названий: частые слова и несколько тысяч редких псевдослов,
+# чтобы поиск по названию давал реалистичное число совпадений.
+VOCABULARY = WORDS + tuple(
+    ''.join(parts) for parts in product(SYLLABLES, repeat=3)
+) + tuple(
+    ''.join(parts) for parts in product(SYLLABLES[:6], repeat=4)
+)
+START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+class SyntheticDataset:
+    """
+    Генератор выгрузки YaMDb заданного размера в формате loadyamdbdata.
+
+    Строки создаются по одной и сразу пишутся в файл, поэтому размер
+    выгрузки ограничен только диском. При одинаковом seed файлы совпадают.
+    """
+
+    def __init__(self, users=100, categories=5, genres=20, titles=1000,
+                 genres_per_title=2, reviews_per_title=5,
+                 comments_per_review=2, seed=0):
+        self.users = users
+        self.categories = categories
+        self.genres = genres
+        self.titles = titles
+        self.genres_per_title = min(genres_per_title, genres)
+        # Один пользователь пишет не больше одного отзыва на произведение.
+        self.reviews_per_title = min(reviews_per_title, users)
+        self.comments_per_review = comments_per_review
+        self.random = random.Random(seed)
+
+    def text(self, words=8, vocabulary=WORDS):
+        return ' '.join(
+            self.random.choices(vocabulary, k=words)
+        ).capitalize()
+
+    def date(self):
+        return (
+            START + timedelta(seconds=self.random.randrange(10 ** 8))
+        ).isoformat()
+
+    def rows(self, name):
+        return getattr(self, f'{name}_rows')()
+
+    def users_rows(self):
+        for pk in range(1, self.users + 1):
+            yield {
+                'id': pk,
+                'username': f'user{pk}',
+                'email': f'user{pk}@yamdb.fake',
+                'role': self.random.choice(ROLES),
+                'bio': self.text(),
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def category_rows(self):
+        for pk in range(1, self.categories + 1):
+            yield {'id': pk, 'name': f'Категория {pk}', 'slug': f'cat-{pk}'}
+
+    def genre_rows(self):
+        for pk in range(1, self.genres + 1):
+            yield {'id': pk, 'name': f'Жанр {pk}', 'slug': f'genre-{pk}'}
+
+    def titles_rows(self):
+        for pk in range(1, self.titles + 1):
+            yield {
+                'id': pk,
+                'name': self.text(3, VOCABULARY),
+                'year': self.random.randint(1900, 2022),
+                'category': self.random.randint(1, self.categories),
+                'description': self.text(),
+            }
+
+    def genre_title_rows(self):
+        pk = 0
+        for title in range(1, self.titles + 1):
+            for genre in self.random.sample(
+                range(1, self.genres + 1), self.genres_per_title
+            ):
+                pk += 1
+                yield {'id': pk, 'title_id': title, 'genre_id': genre}
+
+    def review_rows(self):
+        pk = 0
+        for title in range(1, self.titles + 1):
+            first_author = self.random.randrange(self.users)
+            for number in range(self.reviews_per_title):
+                pk += 1
+                yield {
+                    'id': pk,
+                    'title_id': title,
+                    'text': self.text(),
+                    'author': (first_author + number) % self.users + 1,
+                    'score': self.random.randint(1, 10),
+                    'pub_date': self.date(),
+                }
+
+    def comments_rows(self):
+        reviews = self.titles * self.reviews_per_title
+        pk = 0
+        for review in range(1, reviews + 1):
+            for _ in range(self.comments_per_review):
+                pk += 1
+                yield {
+                    'id': pk,
+                    'review_id': review,
+                    'text': self.text(),
+                    'author': self.random.randint(1, self.users),
+                    'pub_date': self.date(),
+                }
+
+    def write(self, directory):
+        """Записывает таблицы в папку и возвращает число строк в каждой."""
+        os.makedirs(directory, exist_ok=True)
+        written = {}
+        for name, table in TABLES_BY_NAME.items():
+            with open(
+                table.path(directory), 'w', encoding='utf8', newline=''
+            ) as file:
+                writer = csv.DictWriter(file, fieldnames=list(table.columns))
+                writer.writeheader()
+                written[name] = 0
+                for row in self.rows(name):
+                    writer.writerow(row)
+                    written[name] += 1
+        return written
@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.db import connections, router
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+
+class Table:
+    """Таблица выгрузки: имя файла, модель и соответствие колонок полям."""
+
+    def __init__(self, name, file_name, model, columns):
+        self.name = name
+        self.file_name = file_name
+        self.model = model
+        self.columns = columns
+        self.fields = {
+            column: model._meta.get_field(attname)
+            for column, attname in columns.items()
+        }
+
+    def path(self, directory, file_format='csv'):
+        stem = os.path.splitext(self.file_name)[0]
+        return os.path.join(directory, f'{stem}.{file_format}')
+
+    def build(self, row):
+        """Создаёт объект модели из строки csv без запросов к БД.
+
+        Внешние ключи задаются по id, отсутствующие в файле колонки
+        получают значения по умолчанию.
+        """
+        values = {}
+        for column, field in self.fields.items():
+            value = row.get(column)
+            if value is None:
+                continue
+            if value == '' and field.null:
+                value = None
+            values[field.attname] = field.to_python(value)
+        return self.model(**values)
+
+    def save(self, objects, ignore_conflicts=False):
+        """
+        Записывает пачку объектов с датами из выгрузки.
+
+        Вставка идёт с raw=True, как у loaddata: pre_save полей
+        не вызывается, поэтому auto_now_add не заменяет даты из файла,
+        а каждая строка пишется одним INSERT без повторного UPDATE.
+        Пустые даты заранее получают текущее время. Флаги полей модели
+        не меняются и не влияют на другие потоки процесса.
+        """
+        opts = self.model._meta
+        now = timezone.now()
+        for field in opts.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False
+            ):
+                for obj in objects:
+                    if getattr(obj, field.attname) is None:
+                        setattr(obj, field.attname, now)
+        connection = connections[router.db_for_write(self.model)]
+        with_pk = [obj for obj in objects if obj.pk is not None]
+        without_pk = [obj for obj in objects if obj.pk is None]
+        for batch, fields in (
+            (with_pk, opts.concrete_fields),
+            (without_pk, [f for f in opts.concrete_fields if f != opts.pk]),
+        ):
+            if not batch:
+                continue
+            size = max(connection.ops.bulk_batch_size(fields, batch), 1)
+            for start in range(0, len(batch), size):
+                self.model._base_manager.using(connection.alias)._insert(
+                    batch[start:start + size], fields=fields, raw=True,
+                    ignore_conflicts=ignore_conflicts,
+                )
+
+    @property
+    def relations(self):
+        """Колонки с внешними ключами и модели, на которые они ссылаются."""
+        return {
+            column: field.related_model
+            for column, field in self.fields.items()
+            if field.is_relation
+        }
+
+
+TABLES = (
+    Table('users', 'users.csv', User, {
+        'id': 'id',
+        'username': 'username',
+        'email': 'email',
+        'role': 'role',
+        'bio': 'bio',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    Table('category', 'category.csv', Category, {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }),
+    Table('genre', 'genre.csv', Genre, {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }),
+    Table('titles', 'titles.csv', Title, {
+        'id': 'id',
+        'name': 'name',
+        'year': 'year',
+        'category': 'category_id',
+        'description': 'description',
+    }),
+    Table('genre_title', 'genre_title.csv', TitleGenre, {
+        'id': 'id',
+        'title_id': 'title_id',
+        'genre_id': 'genre_id',
+    }),
+    Table('review', 'review.csv', Review, {
+        'id': 'id',
+        'title_id': 'title_id',
+        'text': 'text',
+        'author': 'author_id',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }),
+    Table('comments', 'comments.csv', Comment, {
+        'id': 'id',
+        'review_id': 'review_id',
+        'text': 'text',
+        'author': 'author_id',
+        'pub_date': 'pub_date',
+    }),
+)
+
+
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+FORMATS = ('csv', 'ndjson')
+
+
+def loading_stages():
+    """
+    Группирует таблицы в этапы загрузки по внешним ключам.
+
+    Таблицы одного этапа не ссылаются друг на друга и могут загружаться
+    параллельно, каждый этап зависит только от предыдущих.
+    """
+    levels = {}
+    for table in TABLES:
+        levels[table.model] = 1 + max(
+            (levels[model] for model in table.relations.values()),
+            default=-1
+        )
+    stages = [[] for _ in range(max(levels.values()) + 1)]
+    for table in TABLES:
+        stages[levels[table.model]].append(table)
+    return stages
+
+
+def read_rows(path):
+    """Построчно читает csv или ndjson, не загружая файл в память целиком."""
+    with open(path, encoding='utf8', newline='') as file:
+        if path.endswith('.ndjson'):
+            yield from (json.loads(line) for line in file if line.strip())
+        else:
+            yield from csv.DictReader(file)
+
+
+def chunked(rows, size):
+    """Разбивает поток строк на пачки по size штук."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,18 @@
+import os
+
+# SERVER_MODE=asgi запускает процессы uvicorn с асинхронным чтением
+# (api_yamdb/asgi.py), по умолчанию — синхронные процессы WSGI.
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'api_yamdb.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'api_yamdb.wsgi:application'
+
+bind = '0:8000'
+
+
+def post_worker_init(worker):
+    # Приложение уже загружено: соединения с БД открываются до первого
+    # запроса, а не во время него.
+    from core.db.pool import prewarm_connections
+    prewarm_connections()
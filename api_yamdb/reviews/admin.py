@@ -12,7 +12,8 @@ class GenreAdmin(admin.ModelAdmin):
 
 class TitleAdmin(admin.ModelAdmin):
     list_display = (
-        'pk', 'name', 'year', 'description',)
+        'pk', 'name', 'year', 'description', 'rating',)
+    readonly_fields = ('rating_sum', 'rating_count')
 
 
 class ReviewAdmin(admin.ModelAdmin):
@@ -0,0 +1,30 @@
+from .models import Change, Comment, Review, Title
+
+# Вид записи в журнале и поле с id родителя.
+TRACKED = {
+    Title: (Change.TITLE, None),
+    Review: (Change.REVIEW, 'title_id'),
+    Comment: (Change.COMMENT, 'review_id'),
+}
+
+
+def change_for(instance, action):
+    model, parent = TRACKED[type(instance)]
+    return Change(
+        model=model,
+        object_id=instance.pk,
+        parent_id=getattr(instance, parent) if parent else None,
+        action=action,
+    )
+
+
+def record_change(instance, action):
+    """Добавляет запись в журнал изменений в текущей транзакции."""
+    change_for(instance, action).save()
+
+
+def record_changes(objects, action):
+    """Журнал для объектов, записанных пакетно в обход сигналов."""
+    Change.objects.bulk_create(
+        [change_for(instance, action) for instance in objects]
+    )
@@ -0,0 +1,73 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:41
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Поиск, триггер и индексы есть только в PostgreSQL; на других СУБД
+# поле остаётся пустым, а фильтр по названию работает через icontains.
+FORWARD_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE FUNCTION reviews_title_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.russian',
+                                  coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('pg_catalog.russian',
+                                     coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER reviews_title_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector()
+    """,
+    'UPDATE reviews_title SET name = name',
+    'CREATE INDEX title_search_vector_idx ON reviews_title '
+    'USING gin (search_vector)',
+    # Выражения совпадают с тем, что Django строит для icontains.
+    'CREATE INDEX title_name_trgm_idx ON reviews_title '
+    'USING gin (UPPER(name::text) gin_trgm_ops)',
+    'CREATE INDEX genre_name_trgm_idx ON reviews_genre '
+    'USING gin (UPPER(name::text) gin_trgm_ops)',
+    'CREATE INDEX category_name_trgm_idx ON reviews_category '
+    'USING gin (UPPER(name::text) gin_trgm_ops)',
+)
+
+BACKWARD_SQL = (
+    'DROP INDEX category_name_trgm_idx',
+    'DROP INDEX genre_name_trgm_idx',
+    'DROP INDEX title_name_trgm_idx',
+    'DROP INDEX title_search_vector_idx',
+    'DROP TRIGGER reviews_title_search_vector_update ON reviews_title',
+    'DROP FUNCTION reviews_title_search_vector()',
+)
+
+
+def run_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_postgresql(FORWARD_SQL), run_postgresql(BACKWARD_SQL)
+        ),
+    ]
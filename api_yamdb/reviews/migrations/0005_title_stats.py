@@ -0,0 +1,78 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    missing = Title.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    while True:
+        batch = list(missing[:2000])
+        if not batch:
+            break
+        TitleStats.objects.bulk_create(
+            [TitleStats(title_id=pk) for pk in batch]
+        )
+
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    stats = {
+        f'score_{score}': Coalesce(Subquery(
+            reviews.filter(score=score).annotate(
+                amount=Count('id')
+            ).values('amount')
+        ), 0)
+        for score in range(1, 11)
+    }
+    TitleStats.objects.update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(amount=Count('id')).values('amount')),
+            0
+        ),
+        last_review_date=Subquery(
+            Review.objects.filter(title=OuterRef('pk')).order_by(
+                '-pub_date'
+            ).values('pub_date')[:1]
+        ),
+        **stats
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('last_review_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего отзыва')),
+            ],
+            options={
+                'verbose_name': 'Статистика произведения',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
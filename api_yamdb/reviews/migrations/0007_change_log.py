@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(choices=[('title', 'Произведение'), ('review', 'Отзыв'), ('comment', 'Комментарий')], max_length=16)),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('parent_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='id произведения или отзыва')),
+                ('action', models.CharField(choices=[('create', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление'), ('pruned', 'Журнал очищен до этой записи')], max_length=16)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'ordering': ['id'],
+            },
+        ),
+    ]
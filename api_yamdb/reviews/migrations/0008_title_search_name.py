@@ -0,0 +1,64 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:12
+
+from django.db import migrations
+
+# Фильтр ?name= ищет по названию, поэтому описание из вектора убирается:
+# иначе слово из описания находило бы произведение с другим названием.
+SEARCH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION reviews_title_search_vector()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {vector};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SEARCH_TRIGGER = """
+    CREATE TRIGGER reviews_title_search_vector_update
+    BEFORE INSERT OR UPDATE OF {columns} ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector()
+"""
+
+NAME_VECTOR = "to_tsvector('pg_catalog.russian', coalesce(NEW.name, ''))"
+
+NAME_AND_DESCRIPTION_VECTOR = (
+    "setweight(to_tsvector('pg_catalog.russian', "
+    "coalesce(NEW.name, '')), 'A') "
+    "|| setweight(to_tsvector('pg_catalog.russian', "
+    "coalesce(NEW.description, '')), 'B')"
+)
+
+
+def rebuild_statements(vector, columns):
+    return (
+        'DROP TRIGGER reviews_title_search_vector_update ON reviews_title',
+        SEARCH_FUNCTION.format(vector=vector),
+        SEARCH_TRIGGER.format(columns=columns),
+        'UPDATE reviews_title SET name = name',
+    )
+
+
+def run_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_postgresql(rebuild_statements(NAME_VECTOR, 'name')),
+            run_postgresql(rebuild_statements(
+                NAME_AND_DESCRIPTION_VECTOR, 'name, description'
+            )),
+        ),
+    ]
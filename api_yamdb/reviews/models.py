@@ -1,4 +1,5 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from users.models import User
@@ -43,10 +44,118 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+    # Заполняется триггером БД из названия и описания (PostgreSQL).
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-id']
         verbose_name = 'Произведение'
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ]
+
+    @property
+    def rating(self):
+        """Средняя оценка произведения, округлённая вниз."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
+    def save(self, *args, **kwargs):
+        # Статистика и журнал изменений пишутся сигналом post_save
+        # в той же транзакции, что и произведение.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+SCORES = range(1, 11)
+
+
+class TitleStats(models.Model):
+    """
+    Распределение оценок и сводка отзывов произведения.
+
+    Обновляется вместе с рейтингом при каждой записи отзыва
+    (см. reviews/ratings.py), поэтому читается одним запросом.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Произведение'
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    last_review_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата последнего отзыва'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика произведения'
+
+    @property
+    def scores(self):
+        """Число отзывов с каждой оценкой от 1 до 10."""
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
+
+
+class TitleRanking(models.Model):
+    """
+    Место произведения в заранее посчитанном рейтинге.
+
+    scope — вид рейтинга: rating, rating:category:<slug>,
+    rating:genre:<slug> или trending. Пересчитывается командой
+    refreshrankings (см. reviews/rankings.py).
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение'
+    )
+    scope = models.CharField(max_length=80, verbose_name='Рейтинг')
+    rank = models.PositiveIntegerField(verbose_name='Место')
+
+    class Meta:
+        ordering = ['scope', 'rank']
+        verbose_name = 'Место в рейтинге'
+        indexes = [
+            models.Index(
+                fields=['scope', 'rank'],
+                name='title_ranking_scope_rank_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'title'],
+                name='unique_title_ranking'
+            )
+        ]
 
 
 class TitleGenre(models.Model):
@@ -86,8 +195,14 @@ class Review(models.Model):
     )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
         verbose_name = 'Отзыв'
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -95,6 +210,29 @@ class Review(models.Model):
             )
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stored_rating = (None, None)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating()
+        return instance
+
+    def remember_rating(self):
+        """Запоминает оценку, уже учтённую в рейтинге произведения."""
+        self._stored_rating = (
+            self.__dict__.get('title_id'),
+            self.__dict__.get('score'),
+        )
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения пересчитывается сигналом post_save,
+        # поэтому он попадает в ту же транзакцию, что и отзыв.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -113,5 +251,59 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Комментарий'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Журнал изменений пишется сигналом post_save в той же транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class Change(models.Model):
+    """
+    Запись журнала изменений произведений, отзывов и комментариев.
+
+    id растёт монотонно и служит токеном синхронизации
+    для /api/v1/changes/?since=.
+    """
+
+    TITLE = 'title'
+    REVIEW = 'review'
+    COMMENT = 'comment'
+    MODELS = (
+        (TITLE, 'Произведение'),
+        (REVIEW, 'Отзыв'),
+        (COMMENT, 'Комментарий'),
+    )
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    PRUNED = 'pruned'
+    ACTIONS = (
+        (CREATE, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+        (PRUNED, 'Журнал очищен до этой записи'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=16, choices=MODELS)
+    object_id = models.PositiveIntegerField(verbose_name='id объекта')
+    parent_id = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='id произведения или отзыва'
+    )
+    action = models.CharField(max_length=16, choices=ACTIONS)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Изменение'
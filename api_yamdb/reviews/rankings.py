@@ -0,0 +1,114 @@
+from datetime import timedelta
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Review, Title, TitleGenre, TitleRanking
+
+RANKING_BATCH_SIZE = 5000
+
+RATING = 'rating'
+TRENDING = 'trending'
+KINDS = ('rating', 'category', 'genre', 'trending')
+
+
+def scope_for(ordering, category=None, genre=None):
+    """Вид рейтинга для параметра ordering и фильтров запроса."""
+    if ordering != RATING:
+        return ordering
+    if category:
+        return f'{RATING}:category:{category}'
+    if genre:
+        return f'{RATING}:genre:{genre}'
+    return RATING
+
+
+def _by_rating(prefix=''):
+    """Сортировка по средней оценке, затем по числу оценок."""
+    average = Cast(f'{prefix}rating_sum', FloatField()) / F(
+        f'{prefix}rating_count'
+    )
+    return (
+        average.desc(), F(f'{prefix}rating_count').desc(), f'{prefix}id'
+    )
+
+
+def _rating_rows():
+    titles = Title.objects.filter(rating_count__gt=0).order_by(
+        *_by_rating()
+    ).values_list('pk', flat=True)
+    for rank, pk in enumerate(titles.iterator(), start=1):
+        yield RATING, pk, rank
+
+
+def _category_rows():
+    titles = Title.objects.filter(
+        rating_count__gt=0, category__isnull=False
+    ).order_by('category_id', *_by_rating()).values_list(
+        'category__slug', 'pk'
+    )
+    for slug, group in groupby(titles.iterator(), key=lambda row: row[0]):
+        for rank, (_, pk) in enumerate(group, start=1):
+            yield f'{RATING}:category:{slug}', pk, rank
+
+
+def _genre_rows():
+    links = TitleGenre.objects.filter(
+        title__rating_count__gt=0
+    ).order_by('genre_id', *_by_rating('title__')).values_list(
+        'genre__slug', 'title_id'
+    )
+    for slug, group in groupby(links.iterator(), key=lambda row: row[0]):
+        for rank, (_, pk) in enumerate(group, start=1):
+            yield f'{RATING}:genre:{slug}', pk, rank
+
+
+def _trending_rows():
+    """Произведения по числу отзывов за последние TRENDING_WINDOW_DAYS."""
+    since = timezone.now() - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    titles = Review.objects.filter(pub_date__gte=since).values(
+        'title'
+    ).annotate(velocity=Count('id')).order_by('-velocity', 'title')
+    for rank, row in enumerate(titles.iterator(), start=1):
+        yield TRENDING, row['title'], rank
+
+
+ROWS = {
+    'rating': (_rating_rows, {'scope': RATING}),
+    'category': (_category_rows, {
+        'scope__startswith': f'{RATING}:category:'
+    }),
+    'genre': (_genre_rows, {'scope__startswith': f'{RATING}:genre:'}),
+    'trending': (_trending_rows, {'scope': TRENDING}),
+}
+
+
+def refresh_rankings(kinds=KINDS):
+    """
+    Пересчитывает рейтинги указанных видов.
+
+    Каждый вид заменяется целиком в своей транзакции, так что читатели
+    видят либо старый рейтинг, либо новый. Возвращает число мест
+    по видам.
+    """
+    written = {}
+    for kind in kinds:
+        rows, old = ROWS[kind]
+        with transaction.atomic():
+            TitleRanking.objects.filter(**old).delete()
+            written[kind] = 0
+            rows = rows()
+            while True:
+                batch = list(islice(rows, RANKING_BATCH_SIZE))
+                if not batch:
+                    break
+                TitleRanking.objects.bulk_create(
+                    TitleRanking(scope=scope, title_id=pk, rank=rank)
+                    for scope, pk, rank in batch
+                )
+                written[kind] += len(batch)
+    return written
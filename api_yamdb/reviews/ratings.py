@@ -0,0 +1,170 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import SCORES, Review, Title, TitleStats
+
+STATS_BATCH_SIZE = 2000
+
+
+def _last_review_date():
+    return Subquery(
+        Review.objects.filter(title=OuterRef('pk')).order_by(
+            '-pub_date'
+        ).values('pub_date')[:1]
+    )
+
+
+def shift_scores(title_id, scores):
+    """
+    Добавляет к рейтингу и статистике произведения оценки scores.
+
+    scores — словарь {оценка: сколько добавить}, для удаления отзыва
+    значение отрицательное.
+    """
+    count = sum(scores.values())
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + sum(
+            score * amount for score, amount in scores.items()
+        ),
+        rating_count=F('rating_count') + count,
+    )
+    changes = {
+        f'score_{score}': F(f'score_{score}') + amount
+        for score, amount in scores.items()
+    }
+    changes['review_count'] = F('review_count') + count
+    changes['last_review_date'] = _last_review_date()
+    stats = TitleStats.objects.filter(pk=title_id)
+    if stats.update(**changes) or count <= 0:
+        return
+    # Статистики нет у произведений, созданных в обход сигналов.
+    TitleStats.objects.get_or_create(title_id=title_id)
+    stats.update(**changes)
+
+
+def remember_stored_rating(review):
+    """Подгружает из БД оценку, если изменяемый отзыв создан не из запроса."""
+    if review.pk is None or review._stored_rating[1] is not None:
+        return
+    stored = Review.objects.filter(pk=review.pk).values_list(
+        'title_id', 'score'
+    ).first()
+    if stored is not None:
+        review._stored_rating = stored
+
+
+def review_saved(review, created):
+    """Учитывает в рейтинге созданный или изменённый отзыв."""
+    title_id, score = review._stored_rating
+    if created:
+        shift_scores(review.title_id, {review.score: 1})
+    elif score is None or (title_id, score) == (
+        review.title_id, review.score
+    ):
+        pass
+    elif title_id == review.title_id:
+        shift_scores(title_id, {score: -1, review.score: 1})
+    else:
+        shift_scores(title_id, {score: -1})
+        shift_scores(review.title_id, {review.score: 1})
+    review.remember_rating()
+
+
+def review_deleted(review):
+    """Убирает из рейтинга удалённый отзыв."""
+    shift_scores(review.title_id, {review.score: -1})
+
+
+def title_created(title):
+    """Заводит пустую статистику для нового произведения."""
+    TitleStats.objects.create(title=title)
+
+
+def _actual_totals():
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    return {
+        'actual_sum': Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        'actual_count': Coalesce(
+            Subquery(reviews.annotate(amount=Count('id')).values('amount')),
+            0
+        ),
+    }
+
+
+def _actual_stats():
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    stats = {
+        f'score_{score}': Coalesce(Subquery(
+            reviews.filter(score=score).annotate(
+                amount=Count('id')
+            ).values('amount')
+        ), 0)
+        for score in SCORES
+    }
+    stats['review_count'] = Coalesce(
+        Subquery(reviews.annotate(amount=Count('id')).values('amount')), 0
+    )
+    stats['last_review_date'] = _last_review_date()
+    return stats
+
+
+def find_rating_drift():
+    """Произведения, у которых сохранённый рейтинг расходится с отзывами."""
+    return Title.objects.annotate(**_actual_totals()).exclude(
+        rating_sum=F('actual_sum'),
+        rating_count=F('actual_count'),
+    ).order_by('pk')
+
+
+def find_stats_drift():
+    """
+    Статистика, расходящаяся с отзывами, и произведения без статистики.
+
+    Дата последнего отзыва не сверяется: она пересчитывается целиком
+    при каждом изменении.
+    """
+    actual = {
+        f'actual_{name}': value
+        for name, value in _actual_stats().items()
+        if name != 'last_review_date'
+    }
+    drift = TitleStats.objects.annotate(**actual).exclude(**{
+        name[len('actual_'):]: F(name) for name in actual
+    })
+    missing = Title.objects.filter(stats__isnull=True)
+    return drift.order_by('pk'), missing.order_by('pk')
+
+
+def _create_missing_stats():
+    missing = Title.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    while True:
+        batch = list(missing[:STATS_BATCH_SIZE])
+        if not batch:
+            return
+        TitleStats.objects.bulk_create(
+            [TitleStats(title_id=pk) for pk in batch],
+            ignore_conflicts=True
+        )
+
+
+def rebuild_ratings():
+    """Пересчитывает рейтинг и статистику всех произведений."""
+    totals = _actual_totals()
+    with transaction.atomic():
+        updated = Title.objects.update(
+            rating_sum=totals['actual_sum'],
+            rating_count=totals['actual_count'],
+        )
+        _create_missing_stats()
+        TitleStats.objects.update(**_actual_stats())
+    return updated
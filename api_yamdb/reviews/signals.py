@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import ratings
+from .changes import record_change
+from .models import Change, Comment, Review, Title
+
+
+@receiver(pre_save, sender=Review)
+def review_pre_save(sender, instance, raw, **kwargs):
+    if not raw:
+        ratings.remember_stored_rating(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_post_save(sender, instance, created, raw, **kwargs):
+    if not raw:
+        ratings.review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def review_post_delete(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+
+@receiver(post_save, sender=Title)
+def title_post_save(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        ratings.title_created(instance)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def object_saved(sender, instance, created, raw, **kwargs):
+    if not raw:
+        record_change(instance, Change.CREATE if created else Change.UPDATE)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def object_deleted(sender, instance, **kwargs):
+    record_change(instance, Change.DELETE)
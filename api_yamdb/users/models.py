@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
 
 CHOICES = (
     ('user', 'Пользователь'),
@@ -22,6 +23,11 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=16, choices=CHOICES, default='user')
     confirmation_code = models.CharField(max_length=50, blank=True)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов'
+    )
 
     @property
     def is_admin(self):
@@ -34,3 +40,48 @@ class User(AbstractUser):
     class Meta:
         ordering = ['id']
         verbose_name = 'Пользователь'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_claims = instance.token_claims()
+        return instance
+
+    def token_claims(self):
+        """
+        Поля, которые попадают в токен и при изменении отзывают его.
+
+        Отзыв срабатывает только в save(): изменение этих полей через
+        QuerySet.update() версию токенов не меняет, после него нужно
+        увеличить token_version тем же запросом.
+        """
+        return tuple(
+            self.__dict__.get(name)
+            for name in (
+                'username', 'role', 'is_superuser', 'is_staff', 'is_active'
+            )
+        )
+
+    def save(self, *args, **kwargs):
+        stored = getattr(self, '_token_claims', None)
+        if stored is None or stored == self.token_claims():
+            super().save(*args, **kwargs)
+        else:
+            using = kwargs.get('using') or router.db_for_write(
+                type(self), instance=self
+            )
+            users = type(self)._base_manager.using(using).filter(pk=self.pk)
+            with transaction.atomic(using=using):
+                # Увеличение в БД блокирует строку до конца транзакции,
+                # поэтому одновременные сохранения получают разные версии.
+                users.update(token_version=F('token_version') + 1)
+                self.token_version = users.values_list(
+                    'token_version', flat=True
+                ).get()
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {
+                        *update_fields, 'token_version'
+                    }
+                super().save(*args, **kwargs)
+        self._token_claims = self.token_claims()
@@ -1,9 +1,36 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.plugins.query_budget',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    from django.core.cache import caches
+    from api.cache import reset_local_versions
+    from api.throttling import reset_throttles
+    for cache in caches.all():
+        cache.clear()
+    reset_throttles()
+    reset_local_versions()
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Небольшая синтетическая выгрузка и число строк в каждой таблице."""
+    from core.synthetic import SyntheticDataset
+    path = str(tmp_path / 'data')
+    written = SyntheticDataset(
+        users=12, categories=3, genres=5, titles=20,
+        reviews_per_title=4, comments_per_review=2, seed=1
+    ).write(path)
+    return path, written
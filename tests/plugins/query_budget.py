@@ -0,0 +1,45 @@
+"""
+Бюджет запросов к БД для представлений api.views.
+
+Представление объявляет query_budget — число или словарь
+{действие: число}. Во время тестов включается QueryInspectorMiddleware,
+и тест падает, если какой-то запрос к такому представлению выполнил
+больше запросов к БД, чем объявлено. Точки сохранения не считаются.
+"""
+import pytest
+
+
+def budget_for(view):
+    budget = getattr(view, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(getattr(view, 'action', None))
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def query_budget(settings):
+    from core.queries import request_queries
+
+    settings.QUERY_INSPECTOR = True
+    exceeded = []
+
+    def check(sender, request, view, log, **kwargs):
+        if sender is None or sender.__module__ != 'api.views':
+            return
+        budget = budget_for(view)
+        if budget is not None and log.count > budget:
+            exceeded.append(
+                f'{request.method} {request.path} '
+                f'({sender.__name__}.{view.action}): '
+                f'{log.count} запросов при бюджете {budget}\n'
+                + '\n'.join(f'  {query[1]}' for query in log.queries)
+            )
+
+    request_queries.connect(check, weak=False)
+    yield
+    request_queries.disconnect(check)
+    if exceeded:
+        pytest.fail(
+            'Превышен бюджет запросов к БД:\n' + '\n'.join(exceeded),
+            pytrace=False
+        )
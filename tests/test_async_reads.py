@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from django.urls import resolve
+
+from api.authentication import access_token_for
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def catalog(transactional_db):
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    author = User.objects.create(username='author', email='a@yamdb.ru')
+    titles = []
+    for number in range(12):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category
+        )
+        title.genre.add(genre)
+        titles.append(title)
+    Review.objects.create(author=author, title=titles[0], text='-', score=8)
+    return titles
+
+
+@pytest.fixture
+def async_urls(settings):
+    settings.ROOT_URLCONF = 'api.async_urls'
+
+
+def async_get(url, **extra):
+    return async_to_sync(AsyncClient().get)(url, **extra)
+
+
+class TestAsyncReads:
+
+    def test_read_routes_are_async(self, async_urls):
+        for url in ('/api/v1/titles/', '/api/v1/titles/1/', '/api/v1/genres/',
+                    '/api/v1/categories/', '/api/v1/titles/1/reviews/',
+                    '/api/v1/titles/1/reviews/1/'):
+            assert asyncio.iscoroutinefunction(resolve(url).func), (
+                f'Проверьте, что чтение {url} асинхронное'
+            )
+        for url in ('/api/v1/titles/bulk/', '/api/v1/users/',
+                    '/api/v1/titles/1/reviews/1/comments/'):
+            assert not asyncio.iscoroutinefunction(resolve(url).func)
+
+    def test_same_responses_as_sync(self, catalog, settings):
+        title = catalog[0]
+        urls = (
+            '/api/v1/titles/', '/api/v1/titles/?page=2',
+            f'/api/v1/titles/{title.id}/', '/api/v1/genres/',
+            '/api/v1/categories/', f'/api/v1/titles/{title.id}/reviews/',
+        )
+        expected = {url: Client().get(url).json() for url in urls}
+        settings.ROOT_URLCONF = 'api.async_urls'
+        for url in urls:
+            response = async_get(url)
+            assert response.status_code == 200
+            assert response.json() == expected[url], (
+                f'Проверьте, что асинхронный ответ {url} совпадает '
+                'с синхронным'
+            )
+
+    def test_page_out_of_range(self, catalog, async_urls):
+        assert async_get('/api/v1/titles/?page=3').status_code == 404
+        assert async_get('/api/v1/titles/?page=x').status_code == 404
+        response = async_get('/api/v1/titles/?page=last')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 2
+
+    def test_writes_still_work(self, catalog, async_urls):
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role='admin'
+        )
+        response = async_to_sync(AsyncClient().post)(
+            '/api/v1/genres/', {'name': 'Комедия', 'slug': 'comedy'},
+            content_type='application/json',
+            authorization=f'Bearer {access_token_for(admin)}'
+        )
+        assert response.status_code == 201
+        assert Genre.objects.filter(slug='comedy').exists()
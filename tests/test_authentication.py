@@ -0,0 +1,106 @@
+import pytest
+from django.db import transaction
+
+from users.models import User
+
+from .utils import count_queries
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create(
+        username='reader', email='reader@yamdb.ru', confirmation_code='code'
+    )
+
+
+def get_token(client, user):
+    response = client.post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': user.confirmation_code,
+    })
+    assert response.status_code == 200
+    return response.json()['token']
+
+
+# Версия токенов попадает в кэш после фиксации транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestStatelessAuthentication:
+
+    def test_authenticated_read_has_no_user_query(
+        self, client, user, settings
+    ):
+        # Оба запроса читают версии кэша из БД.
+        settings.API_CACHE_VERSION_TTL = 0
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        _, anonymous = count_queries(client, 'get', '/api/v1/titles/')
+        response, authenticated = count_queries(
+            client, 'get', '/api/v1/titles/', **auth
+        )
+        assert response.status_code == 200
+        assert authenticated == anonymous, (
+            'Проверьте, что аутентификация по токену не читает пользователя '
+            'из БД'
+        )
+
+    def test_role_change_revokes_token(self, client, user):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        assert client.get('/api/v1/users/me/', **auth).status_code == 200
+
+        user = User.objects.get(pk=user.pk)
+        user.role = 'moderator'
+        user.save()
+        assert client.get('/api/v1/users/me/', **auth).status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены'
+        )
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        assert client.get('/api/v1/users/me/', **auth).status_code == 200
+
+    def test_rename_revokes_token(self, client, user):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        response = client.patch(
+            '/api/v1/users/me/', {'username': 'renamed'},
+            content_type='application/json', **auth
+        )
+        assert response.status_code == 200
+        response = client.get('/api/v1/users/me/', **auth)
+        assert response.status_code == 401, (
+            'Проверьте, что смена имени отзывает токены: имя автора '
+            'берётся из токена'
+        )
+        user.refresh_from_db()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        response = client.get('/api/v1/users/me/', **auth)
+        assert response.json()['username'] == 'renamed'
+
+    def test_rolled_back_change_keeps_token(self, client, user):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        assert client.get('/api/v1/users/me/', **auth).status_code == 200
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                user = User.objects.get(pk=user.pk)
+                user.role = 'admin'
+                user.save()
+                raise RuntimeError
+        assert client.get('/api/v1/users/me/', **auth).status_code == 200, (
+            'Проверьте, что версия токенов попадает в кэш только после '
+            'фиксации транзакции'
+        )
+
+    def test_stale_instances_get_distinct_versions(self, user):
+        first = User.objects.get(pk=user.pk)
+        second = User.objects.get(pk=user.pk)
+        first.role = 'moderator'
+        first.save()
+        second.is_staff = True
+        second.save()
+        assert (first.token_version, second.token_version) == (1, 2), (
+            'Проверьте, что версия токенов увеличивается в БД, а не по '
+            'устаревшему экземпляру'
+        )
+        user.refresh_from_db()
+        assert user.token_version == 2
+
+    def test_deleted_user_token_revoked(self, client, user):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {get_token(client, user)}'}
+        user.delete()
+        assert client.get('/api/v1/titles/', **auth).status_code == 401
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import call_command
+from django.urls import get_resolver
+
+from core.benchmark import ROUTES, compare, run_routes
+
+
+def api_url_names():
+    resolver = get_resolver().namespace_dict['api'][1]
+    return {
+        name for name in resolver.reverse_dict
+        if isinstance(name, str)
+    }
+
+
+class TestBenchmarkRoutes:
+
+    def test_every_api_route_covered(self):
+        missing = api_url_names() - {route.name for route in ROUTES}
+        assert not missing, (
+            f'Добавьте маршруты в core.benchmark.ROUTES: {sorted(missing)}'
+        )
+
+    def test_compare_flags_regressions(self):
+        baseline = {
+            'GET a anonymous': {'p95_ms': 10, 'queries': 3},
+            'GET b anonymous': {'p95_ms': 10, 'queries': 3},
+        }
+        results = {
+            'GET a anonymous': {'p95_ms': 14, 'queries': 3},
+            'GET b anonymous': {'p95_ms': 20, 'queries': 4},
+            'GET c anonymous': {'p95_ms': 100, 'queries': 9},
+        }
+        regressions = compare(results, baseline, tolerance=0.5)
+        assert len(regressions) == 2 and all(
+            line.startswith('GET b anonymous') for line in regressions
+        ), 'Проверьте, что сравниваются p95 с допуском и число запросов'
+
+
+@pytest.mark.django_db
+class TestRunRoutes:
+
+    def test_all_routes_respond(self, dataset):
+        path, _ = dataset
+        call_command('loadyamdbdata', path=path)
+        results = run_routes(requests=2)
+        expected = {
+            route.key(role) for route in ROUTES for role in route.roles
+        }
+        assert set(results) == expected
+        failed = [key for key, result in results.items() if result['errors']]
+        assert not failed, f'Маршруты отвечают ошибкой: {failed}'
+        result = results['GET titles-list anonymous']
+        assert set(result) == {
+            'requests', 'errors', 'p50_ms', 'p95_ms', 'p99_ms',
+            'queries', 'throughput_rps',
+        }
+        assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
@@ -0,0 +1,192 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import access_token_for
+from reviews.models import Category, Genre, Title, TitleGenre, TitleStats
+from users.models import User
+
+
+@pytest.fixture
+def admin_client(client, db):
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.ru', role='admin'
+    )
+    client.defaults['HTTP_AUTHORIZATION'] = (
+        f'Bearer {access_token_for(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def catalog(db):
+    Category.objects.create(name='Фильмы', slug='films')
+    for slug in ('drama', 'comedy', 'horror'):
+        Genre.objects.create(name=slug, slug=slug)
+
+
+def send(client, method, url, items):
+    return getattr(client, method)(
+        url, items, content_type='application/json'
+    )
+
+
+@pytest.mark.django_db
+class TestBulkWrite:
+
+    def test_bulk_create_genres(self, admin_client):
+        response = send(admin_client, 'post', '/api/v1/genres/bulk/', [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ])
+        assert response.status_code == 201
+        assert set(Genre.objects.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+
+    def test_bulk_create_reports_errors_per_item(self, admin_client):
+        Genre.objects.create(name='Драма', slug='drama')
+        response = send(admin_client, 'post', '/api/v1/genres/bulk/', [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Без слага'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ])
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 4 and errors[0] == {}
+        assert 'slug' in errors[1] and 'slug' in errors[2]
+        assert 'slug' in errors[3], (
+            'Проверьте, что повтор слага внутри пакета тоже ошибка'
+        )
+        assert Genre.objects.count() == 1, (
+            'Проверьте, что при ошибках ничего не записывается'
+        )
+
+    def test_bulk_create_titles_resolves_slugs_once(
+        self, admin_client, catalog
+    ):
+        items = [
+            {
+                'name': f'Произведение {number}', 'year': 2000,
+                'category': 'films', 'genre': ['drama', 'comedy'],
+            }
+            for number in range(50)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = send(
+                admin_client, 'post', '/api/v1/titles/bulk/', items
+            )
+        assert response.status_code == 201
+        assert len(response.json()) == 50
+        assert Title.objects.count() == 50
+        assert TitleGenre.objects.count() == 100
+        assert TitleStats.objects.count() == 50
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'token_version' not in query['sql']
+        ]
+        assert len(selects) == 2, (
+            'Проверьте, что категории и жанры читаются одним запросом '
+            f'на модель: {selects}'
+        )
+
+    def test_bulk_create_titles_unknown_slugs(self, admin_client, catalog):
+        response = send(admin_client, 'post', '/api/v1/titles/bulk/', [
+            {'name': 'А', 'year': 2000, 'category': 'films'},
+            {'name': 'Б', 'year': 2000, 'category': 'books'},
+            {'name': 'В', 'year': 2000, 'category': 'films',
+             'genre': ['drama', 'western']},
+        ])
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and 'category' in errors[1]
+        assert 'western' in errors[2]['genre'][0]
+        assert not Title.objects.exists()
+
+    def test_bulk_update_titles(self, admin_client, catalog):
+        titles = [
+            Title.objects.create(name=name, year=2000)
+            for name in ('А', 'Б')
+        ]
+        response = send(admin_client, 'patch', '/api/v1/titles/bulk/', [
+            {'id': titles[0].pk, 'year': 1999, 'genre': ['horror']},
+            {'id': titles[1].pk, 'name': 'Новое', 'category': 'films'},
+        ])
+        assert response.status_code == 200
+        first, second = Title.objects.order_by('pk')
+        assert first.year == 1999 and first.name == 'А'
+        assert list(first.genre.values_list('slug', flat=True)) == ['horror']
+        assert second.name == 'Новое' and second.category.slug == 'films'
+
+    def test_bulk_update_missing_object(self, admin_client, catalog):
+        response = send(admin_client, 'patch', '/api/v1/genres/bulk/', [
+            {'slug': 'drama', 'name': 'Драма'},
+            {'slug': 'western', 'name': 'Вестерн'},
+        ])
+        assert response.status_code == 400
+        assert response.json()[0] == {} and 'slug' in response.json()[1]
+        assert Genre.objects.get(slug='drama').name == 'drama'
+
+    @pytest.mark.parametrize('method', ['patch', 'delete'])
+    def test_bulk_invalid_keys(self, admin_client, catalog, method):
+        title = Title.objects.create(name='А', year=2000)
+        keys = [title.pk, 'abc', '1.5']
+        items = keys if method == 'delete' else [
+            {'id': key, 'year': 1999} for key in keys
+        ]
+        response = send(admin_client, method, '/api/v1/titles/bulk/', items)
+        assert response.status_code == 400, (
+            'Проверьте, что неверный id в пакете даёт ответ 400, а не 500'
+        )
+        errors = response.json()
+        assert errors[0] == {} and 'id' in errors[1] and 'id' in errors[2]
+        assert Title.objects.get().year == 2000
+
+    def test_bulk_keys_compared_after_coercion(self, admin_client, catalog):
+        title = Title.objects.create(name='А', year=2000)
+        response = send(
+            admin_client, 'delete', '/api/v1/titles/bulk/',
+            [title.pk, str(title.pk)]
+        )
+        assert response.status_code == 400
+        assert Title.objects.exists()
+
+    def test_bulk_delete(self, admin_client, catalog):
+        response = send(
+            admin_client, 'delete', '/api/v1/genres/bulk/', ['drama', 'comedy']
+        )
+        assert response.status_code == 204
+        assert list(Genre.objects.values_list('slug', flat=True)) == [
+            'horror'
+        ]
+
+    @pytest.mark.parametrize('resource', ['genres', 'categories'])
+    def test_bulk_slug_reserved(self, admin_client, resource):
+        url = f'/api/v1/{resource}/'
+        response = send(
+            admin_client, 'post', url, {'name': 'Пакет', 'slug': 'bulk'}
+        )
+        assert response.status_code == 400 and 'slug' in response.json(), (
+            'Проверьте, что слаг bulk занят адресом пакетной записи'
+        )
+        response = send(admin_client, 'post', url + 'bulk/', [
+            {'name': 'Пакет', 'slug': 'bulk'}
+        ])
+        assert response.status_code == 400
+        assert 'slug' in response.json()[0]
+
+    def test_bulk_requires_admin(self, client, catalog):
+        response = send(client, 'post', '/api/v1/genres/bulk/', [
+            {'name': 'Вестерн', 'slug': 'western'}
+        ])
+        assert response.status_code == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_invalidates_cache(self, admin_client, catalog, client):
+        assert len(client.get('/api/v1/genres/').json()['results']) == 3
+        send(admin_client, 'post', '/api/v1/genres/bulk/', [
+            {'name': 'Вестерн', 'slug': 'western'}
+        ])
+        assert len(client.get('/api/v1/genres/').json()['results']) == 4
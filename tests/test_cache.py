@@ -0,0 +1,190 @@
+import time
+
+import pytest
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import invalidate, namespace_versions, versions_in_cache
+from core.models import CacheVersion
+from reviews.models import Genre, Review, Title
+from users.models import User
+
+
+# Версии пространств имён меняются после фиксации транзакции, поэтому
+# тестам нужны настоящие транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_genres_cached_and_invalidated(self, client):
+        Genre.objects.create(name='Драма', slug='drama')
+        first = client.get('/api/v1/genres/')
+        second = client.get('/api/v1/genres/')
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос списка жанров берётся из кэша'
+        )
+        assert first.json() == second.json()
+
+        Genre.objects.create(name='Комедия', slug='comedy')
+        third = client.get('/api/v1/genres/')
+        assert third['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение жанров сбрасывает кэш'
+        )
+        assert third.json()['count'] == 2
+
+    def test_title_invalidated_by_review(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        other = Title.objects.create(name='Другое', year=2000)
+        url = f'/api/v1/titles/{title.id}/'
+        other_url = f'/api/v1/titles/{other.id}/'
+        assert client.get(url).json()['rating'] is None
+        client.get(other_url)
+
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.create(author=author, title=title, text='-', score=8)
+
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 8
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв сбрасывает кэш только своего произведения'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_reviews_not_modified(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.create(author=author, title=title, text='-', score=8)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что на совпадающий If-None-Match возвращается 304'
+        )
+        assert response['ETag'] == etag
+
+        other = User.objects.create(username='other', email='o@yamdb.ru')
+        Review.objects.create(author=other, title=title, text='-', score=2)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+        assert response['ETag'] != etag
+
+    def test_deleted_parent_not_modified(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        title.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 404, (
+            'Проверьте, что перед ответом 304 проверяется, что родительский '
+            'объект существует'
+        )
+
+    def test_etag_follows_other_processes(self, client, settings):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        caches['api'].clear()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что ETag не зависит от состояния процесса'
+        )
+
+        # Отзыв, записанный другим процессом: версия меняется в БД.
+        author = User.objects.create(username='author', email='a@yamdb.ru')
+        Review.objects.bulk_create([
+            Review(author=author, title=title, text='-', score=8)
+        ])
+        CacheVersion.objects.update_or_create(
+            namespace=f'reviews:title:{title.id}',
+            defaults={'version': time.time_ns()},
+        )
+        settings.API_CACHE_VERSION_TTL = 0
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что запись из другого процесса меняет ETag'
+        )
+        assert response.json()['count'] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCacheVersions:
+
+    def test_invalidated_after_commit(self):
+        before = namespace_versions('genres')
+        with transaction.atomic():
+            Genre.objects.create(name='Драма', slug='drama')
+            assert namespace_versions('genres') == before, (
+                'Проверьте, что версия кэша меняется только после фиксации '
+                'транзакции'
+            )
+        assert namespace_versions('genres') != before
+
+        changed = namespace_versions('genres')
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Genre.objects.create(name='Комедия', slug='comedy')
+                raise RuntimeError
+        assert namespace_versions('genres') == changed, (
+            'Проверьте, что откаченная запись не сбрасывает кэш'
+        )
+
+    def test_versions_remembered_in_process(self):
+        before = namespace_versions('genres')
+        with CaptureQueriesContext(connection) as context:
+            assert namespace_versions('genres') == before
+        assert not context.captured_queries, (
+            'Проверьте, что версии из БД не перечитываются на каждый запрос'
+        )
+        invalidate('genres')
+        assert namespace_versions('genres') != before, (
+            'Проверьте, что изменение в своём процессе видно сразу'
+        )
+
+    def test_versions_shared_between_processes(self, client, settings):
+        assert not versions_in_cache()
+        Genre.objects.create(name='Драма', slug='drama')
+        client.get('/api/v1/genres/')
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
+
+        # Другой процесс меняет данные и версию в БД, не трогая кэш
+        # в памяти этого процесса.
+        Genre.objects.bulk_create([Genre(name='Комедия', slug='comedy')])
+        CacheVersion.objects.filter(namespace='genres').update(
+            version=F('version') + 1
+        )
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT', (
+            'Проверьте, что версии из БД перечитываются не чаще раза '
+            'в API_CACHE_VERSION_TTL мс'
+        )
+        settings.API_CACHE_VERSION_TTL = 0
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что при кэше в памяти процесса версии хранятся '
+            'в общей БД'
+        )
+        assert response.json()['count'] == 2
+
+    def test_versions_in_shared_cache(self, settings, tmp_path):
+        settings.CACHES = {**settings.CACHES, 'api': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        try:
+            assert versions_in_cache()
+            before = namespace_versions('genres')
+            invalidate('genres')
+            assert namespace_versions('genres') != before
+            assert not CacheVersion.objects.exists(), (
+                'Проверьте, что с общим кэшем версии не пишутся в БД'
+            )
+        finally:
+            caches['api'].clear()
@@ -0,0 +1,141 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+
+from reviews.models import Change, Comment, Review, Title
+from users.models import User
+
+from .utils import count_queries
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(settings):
+    settings.CHANGES_SAFETY_LAG = 0
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create(username='author', email='a@yamdb.ru')
+
+
+def sync(client, since, **params):
+    response = client.get('/api/v1/changes/', {'since': since, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def writer(transactional_db):
+    """Второе соединение с той же БД, как у другого процесса."""
+    if connection.vendor != 'postgresql':
+        pytest.skip('Незавершённые транзакции ищутся только в PostgreSQL')
+    connections.databases['writer'] = dict(connection.settings_dict)
+    yield 'writer'
+    connections['writer'].close()
+    del connections['writer']
+    del connections.databases['writer']
+
+
+@pytest.mark.django_db
+class TestChanges:
+
+    def test_feed_follows_writes(self, client, author):
+        token = client.get('/api/v1/changes/').json()['next']
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=5
+        )
+        review.text = 'Исправленный отзыв'
+        review.save()
+        comment = Comment.objects.create(
+            review=review, author=author, text='Комментарий'
+        )
+        comment.delete()
+
+        feed = sync(client, token)
+        assert [
+            (change['model'], change['action'])
+            for change in feed['changes']
+        ] == [
+            ('title', 'create'),
+            ('review', 'create'),
+            ('review', 'update'),
+            ('comment', 'create'),
+            ('comment', 'delete'),
+        ]
+        review_change = feed['changes'][1]
+        assert review_change['parent_id'] == title.pk
+        assert review_change['data']['text'] == 'Исправленный отзыв', (
+            'Проверьте, что изменения отдают текущее состояние объекта'
+        )
+        assert feed['changes'][3]['data'] is None
+        assert not feed['has_more']
+        assert sync(client, feed['next'])['changes'] == []
+
+    def test_feed_batches(self, client, author):
+        for number in range(5):
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+        first = sync(client, 0, limit=2)
+        assert len(first['changes']) == 2 and first['has_more']
+        second = sync(client, first['next'], limit=2)
+        assert second['changes'][0]['id'] > first['changes'][-1]['id']
+
+    def test_feed_costs_constant_queries(self, client, author):
+        titles = [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(10)
+        ]
+        for title in titles:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        _, queries = count_queries(client, 'get', '/api/v1/changes/?since=0')
+        # Журнал, самая старая запись и по запросу на модель
+        # (произведения с жанрами — два), в PostgreSQL ещё начало самой
+        # старой пишущей транзакции.
+        assert queries == 5 + (connection.vendor == 'postgresql')
+
+    def test_pruned_token_is_gone(self, client, author):
+        for number in range(3):
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+        token = sync(client, 0)['changes'][0]['id']
+        call_command('prunechanges', days=0)
+        Title.objects.create(name='Новое', year=2000)
+        response = client.get('/api/v1/changes/', {'since': token})
+        assert response.status_code == 410, (
+            'Проверьте, что токен старше очищенного журнала даёт ответ 410'
+        )
+        fresh = client.get('/api/v1/changes/').json()['next']
+        assert sync(client, fresh)['changes'] == []
+
+    def test_safety_lag_hides_fresh_changes(self, client, settings):
+        settings.CHANGES_SAFETY_LAG = 60
+        Title.objects.create(name='Произведение', year=2000)
+        assert sync(client, 0)['changes'] == []
+
+    def test_prunechanges(self, db):
+        for number in range(3):
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+        call_command('prunechanges', days=0)
+        assert list(Change.objects.values_list('action', flat=True)) == [
+            Change.PRUNED
+        ]
+
+    def test_invalid_parameters(self, client, db):
+        for params in ({'since': 'x'}, {'since': -1}, {'since': 0,
+                                                       'limit': 0}):
+            response = client.get('/api/v1/changes/', params)
+            assert response.status_code == 400
+
+    def test_open_transaction_holds_back_later_changes(self, client, writer):
+        with transaction.atomic(using=writer):
+            pending = Change.objects.using(writer).create(
+                model=Change.TITLE, object_id=0, action=Change.CREATE
+            )
+            Title.objects.create(name='Произведение', year=2000)
+            assert sync(client, 0)['changes'] == [], (
+                'Проверьте, что записи после id незавершённой транзакции '
+                'не отдаются, сколько бы она ни длилась'
+            )
+        ids = [change['id'] for change in sync(client, 0)['changes']]
+        assert ids[0] == pending.id and len(ids) == 2
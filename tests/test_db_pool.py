@@ -0,0 +1,212 @@
+import json
+import threading
+from io import StringIO
+
+import psycopg2.extensions
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import load_backend
+
+from core import metrics
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql):
+        self.connection.checks += 1
+        if self.connection.broken:
+            raise OSError('соединение разорвано')
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.checks = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+def fake_pool(**options):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    return ConnectionPool(connect, **options), opened
+
+
+class TestConnectionPool:
+
+    def test_connection_reused(self):
+        pool, opened = fake_pool(max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+        assert pool.acquire() is first, (
+            'Проверьте, что пул выдаёт освободившееся соединение'
+        )
+        assert len(opened) == 1
+        assert first.rollbacks == 1, (
+            'Проверьте, что при возврате в пул транзакция откатывается'
+        )
+        assert pool.stats() == {
+            'in_use': 1, 'idle': 0, 'waiting': 0,
+            'created': 1, 'discarded': 0,
+        }
+
+    def test_size_limit_and_waiting(self):
+        pool, opened = fake_pool(max_size=1, timeout=0.05)
+        held = pool.acquire()
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+
+        pool.timeout = 5
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+        waiter.start()
+        while not pool.stats()['waiting']:
+            pass
+        pool.release(held)
+        waiter.join()
+        assert got == [held], (
+            'Проверьте, что ожидающий получает освободившееся соединение'
+        )
+        assert len(opened) == 1
+
+    def test_health_check(self):
+        pool, opened = fake_pool(check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.broken = True
+        replacement = pool.acquire()
+        assert replacement is not connection, (
+            'Проверьте, что неисправное соединение заменяется новым'
+        )
+        assert connection.checks == 1 and connection.closed
+        assert pool.stats()['discarded'] == 1
+
+        pool.release(replacement)
+        replacement.close()
+        assert pool.acquire() is not replacement, (
+            'Проверьте, что закрытое соединение не выдаётся'
+        )
+        assert pool.stats()['discarded'] == 2
+
+    def test_check_interval_skips_fresh(self):
+        pool, _ = fake_pool(check_interval=60)
+        connection = pool.acquire()
+        pool.release(connection)
+        pool.acquire()
+        assert connection.checks == 0
+
+    def test_max_lifetime(self):
+        pool, opened = fake_pool(max_lifetime=1e-9)
+        connection = pool.acquire()
+        pool.release(connection)
+        assert pool.acquire() is not connection
+        assert connection.closed and len(opened) == 2
+
+    def test_fill_and_close(self):
+        pool, opened = fake_pool(min_size=3)
+        pool.fill()
+        assert len(opened) == 3 and pool.stats()['idle'] == 3
+        pool.fill()
+        assert len(opened) == 3
+        pool.close()
+        assert all(connection.closed for connection in opened)
+        assert pool.stats()['idle'] == 0
+
+
+@pytest.mark.django_db
+class TestPooledBackend:
+
+    @pytest.fixture(autouse=True)
+    def postgresql_only(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Пул соединений есть только для PostgreSQL')
+
+    def test_connection_returned_to_pool(self):
+        backend = load_backend('core.db.postgresql')
+        settings_dict = {**connection.settings_dict, 'CONN_MAX_AGE': 0}
+        wrapper = backend.DatabaseWrapper(settings_dict)
+        created = wrapper.pool.stats()['created']
+        try:
+            for _ in range(3):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    assert cursor.fetchone() == (1,)
+                wrapper.close_if_unusable_or_obsolete()
+            stats = wrapper.pool.stats()
+            assert stats['created'] - created <= 1, (
+                'Проверьте, что соединение берётся из пула'
+            )
+            assert stats['idle'] >= 1
+            assert (
+                'yamdb_db_pool_created_total{database="default"}'
+                in metrics.render_metrics()
+            ), 'Проверьте, что состояние пула есть в метриках'
+        finally:
+            wrapper.close()
+            close_pools(settings_dict['NAME'])
+
+    def test_isolation_level_option(self):
+        backend = load_backend('core.db.postgresql')
+        serializable = psycopg2.extensions.ISOLATION_LEVEL_SERIALIZABLE
+        settings_dict = {
+            **connection.settings_dict, 'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                **connection.settings_dict['OPTIONS'],
+                'isolation_level': serializable,
+            },
+        }
+        wrapper = backend.DatabaseWrapper(settings_dict)
+        try:
+            for _ in range(2):
+                # Уровень изоляции действует внутри транзакции.
+                wrapper.set_autocommit(False)
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SHOW transaction_isolation')
+                    assert cursor.fetchone() == ('serializable',), (
+                        'Проверьте, что соединения пула получают '
+                        'OPTIONS["isolation_level"]'
+                    )
+                wrapper.rollback()
+                wrapper.set_autocommit(True)
+                assert wrapper.isolation_level == serializable
+                wrapper.close_if_unusable_or_obsolete()
+        finally:
+            wrapper.close()
+            close_pools(settings_dict['NAME'])
+
+    def test_benchconnections(self):
+        out = StringIO()
+        call_command(
+            'benchconnections', requests=6, threads=2, pool_size=1,
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        assert set(report['speedup_p50']) == {'persistent', 'pool'}
+        assert report['pool']['pool_created'] == 1, (
+            'Проверьте, что потоки делят соединения пула'
+        )
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from api.authentication import access_token_for
+from core.tables import TABLES
+from reviews.models import Category, Genre, Title
+from users.models import User
+
+
+def snapshot():
+    return {
+        table.name: list(
+            table.model.objects.order_by('pk').values_list(
+                *[field.attname for field in table.fields.values()]
+            )
+        )
+        for table in TABLES
+    }
+
+
+def clear_database():
+    for model in (Title, Category, Genre, User):
+        model.objects.all().delete()
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    @pytest.mark.parametrize('file_format', ['csv', 'ndjson'])
+    def test_round_trip(self, dataset, tmp_path, file_format):
+        path, _ = dataset
+        call_command('loadyamdbdata', path=path)
+        before = snapshot()
+
+        export = str(tmp_path / 'export')
+        call_command('dumpyamdbdata', path=export, format=file_format)
+        clear_database()
+        call_command('loadyamdbdata', path=export, format=file_format)
+        assert snapshot() == before, (
+            'Проверьте, что выгрузка dumpyamdbdata загружается обратно '
+            'без изменений'
+        )
+
+    def test_export_endpoint_streams_rows(self, client, dataset):
+        path, written = dataset
+        call_command('loadyamdbdata', path=path)
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role='admin'
+        )
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {access_token_for(admin)}'}
+
+        response = client.get('/api/v1/export/review/', **auth)
+        assert response.status_code == 200
+        assert response.streaming, 'Проверьте, что выгрузка отдаётся потоком'
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert len(lines) == written['review']
+        assert set(json.loads(lines[0])) == {
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+        }
+
+        response = client.get('/api/v1/export/titles/?output=csv', **auth)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,name,year,category,description'
+        assert len(lines) == written['titles'] + 1
+
+    def test_export_endpoint_errors(self, client, db):
+        assert client.get('/api/v1/export/review/').status_code == 401
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role='admin'
+        )
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {access_token_for(admin)}'}
+        assert client.get('/api/v1/export/unknown/', **auth).status_code == 404
+        response = client.get('/api/v1/export/review/?output=xml', **auth)
+        assert response.status_code == 400
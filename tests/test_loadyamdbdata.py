@@ -0,0 +1,150 @@
+import os
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_datetime
+
+from core.management.commands.loadyamdbdata import Command
+from core.tables import TABLES_BY_NAME, read_rows
+from reviews.models import Comment, Review, Title, TitleGenre
+from reviews.ratings import find_rating_drift, find_stats_drift
+from users.models import User
+
+
+def assert_loaded(written):
+    assert User.objects.count() == written['users']
+    assert Title.objects.count() == written['titles']
+    assert TitleGenre.objects.count() == written['genre_title']
+    assert Review.objects.count() == written['review']
+    assert Comment.objects.count() == written['comments'], (
+        'Проверьте, что loadyamdbdata загружает все строки выгрузки'
+    )
+    assert not find_rating_drift().exists(), (
+        'Проверьте, что после загрузки рейтинги пересчитываются'
+    )
+    drift, missing = find_stats_drift()
+    assert not drift.exists() and not missing.exists(), (
+        'Проверьте, что после загрузки статистика произведений пересчитывается'
+    )
+
+
+@pytest.mark.django_db
+class TestLoadYamdbData:
+
+    def test_load_synthetic_dataset(self, dataset):
+        path, written = dataset
+        call_command('loadyamdbdata', path=path, batch_size=7)
+        assert_loaded(written)
+
+    def test_resume_from_checkpoint(self, dataset, tmp_path):
+        path, written = dataset
+        checkpoint = str(tmp_path / 'checkpoint')
+        call_command(
+            'loadyamdbdata', path=path, batch_size=7, checkpoint=checkpoint
+        )
+        # Сбой после записи пачки, но до обновления контрольной точки.
+        Comment.objects.filter(id__gt=10).delete()
+        with open(os.path.join(checkpoint, 'comments.progress'), 'w') as file:
+            file.write('7')
+
+        call_command(
+            'loadyamdbdata', path=path, batch_size=7, checkpoint=checkpoint
+        )
+        assert_loaded(written)
+
+    def test_dry_run_writes_nothing(self, dataset):
+        path, _ = dataset
+        call_command('loadyamdbdata', path=path, dry_run=True)
+        assert not Title.objects.exists()
+
+    def test_dates_from_file(self, dataset):
+        path, _ = dataset
+        call_command('loadyamdbdata', path=path, batch_size=7)
+        for name, model in (('review', Review), ('comments', Comment)):
+            expected = {
+                int(row['id']): parse_datetime(row['pub_date'])
+                for row in read_rows(TABLES_BY_NAME[name].path(path))
+            }
+            assert dict(model.objects.values_list('id', 'pub_date')) == (
+                expected
+            ), 'Проверьте, что даты публикации берутся из выгрузки'
+
+    def test_auto_now_add_untouched(self, dataset):
+        path, _ = dataset
+        with CaptureQueriesContext(connection) as queries:
+            call_command('loadyamdbdata', path=path, batch_size=7)
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(
+                ('UPDATE "reviews_review"', 'UPDATE "reviews_comment"')
+            )
+        ]
+        assert not updates, (
+            'Проверьте, что даты из выгрузки пишутся при вставке, '
+            'без второго прохода UPDATE'
+        )
+        assert Review._meta.get_field('pub_date').auto_now_add, (
+            'Проверьте, что загрузка не отключает auto_now_add у полей '
+            'модели: это влияет на все потоки процесса'
+        )
+        review = Review.objects.first()
+        created = Review.objects.create(
+            title=review.title, author=User.objects.exclude(
+                reviews__title=review.title
+            ).first(), text='Новый', score=5
+        )
+        assert created.pub_date > review.pub_date
+
+    def test_dry_run_keeps_only_referenced_ids(self, dataset, monkeypatch):
+        path, _ = dataset
+        seen = {}
+        check_row = Command.check_row
+
+        def remember(self, table, row, known_ids):
+            seen[table.model] = set(known_ids)
+            return check_row(self, table, row, known_ids)
+
+        monkeypatch.setattr(Command, 'check_row', remember)
+        call_command('loadyamdbdata', path=path, dry_run=True)
+        assert User in seen[Comment] and Review in seen[Comment]
+        assert TitleGenre not in seen[Comment], (
+            'Проверьте, что --dry-run не держит в памяти id таблиц, '
+            'на которые никто не ссылается'
+        )
+
+    def test_dry_run_reports_errors(self, dataset, capsys):
+        path, _ = dataset
+        review_path = TABLES_BY_NAME['review'].path(path)
+        with open(review_path, encoding='utf8') as file:
+            lines = file.read().splitlines()
+        header = lines[0].split(',')
+        broken = dict(zip(header, lines[1].split(',')))
+        broken['score'] = 'десять'
+        broken['author'] = '100000'
+        lines.append(','.join(broken[column] for column in header))
+        with open(review_path, 'w', encoding='utf8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+        with pytest.raises(CommandError):
+            call_command('loadyamdbdata', path=path, dry_run=True)
+        assert f'review.csv:{len(lines)}:' in capsys.readouterr().err, (
+            'Проверьте, что --dry-run сообщает номер строки с ошибкой'
+        )
+        assert not Review.objects.exists()
+
+    @pytest.mark.parametrize('option', ['batch_size', 'workers'])
+    def test_bad_arguments(self, dataset, option):
+        path, _ = dataset
+        with pytest.raises(CommandError):
+            call_command('loadyamdbdata', path=path, **{option: 0})
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_load(dataset):
+    if connection.vendor == 'sqlite':
+        pytest.skip('Процессы не видят общую тестовую базу SQLite в памяти')
+    path, written = dataset
+    call_command('loadyamdbdata', path=path, batch_size=7, workers=3)
+    assert_loaded(written)
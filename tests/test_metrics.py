@@ -0,0 +1,131 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import AsyncClient
+
+from api.authentication import access_token_for
+from api.cache import reset_local_versions
+from core import metrics
+from reviews.models import Genre, Title
+from users.models import User
+
+
+@pytest.fixture
+def metrics_on(settings):
+    settings.REQUEST_METRICS = True
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+def sample(text, name, **labels):
+    """Значение строки name{labels} из ответа в формате Prometheus."""
+    for line in text.splitlines():
+        match = re.match(r'(\w+)\{(.*)\} (\S+)$', line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2)))
+        if found == labels:
+            return float(match.group(3))
+    return None
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_titles_list_recorded(self, client, metrics_on):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(name='Произведение', year=2000)
+        title.genre.add(genre)
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role='admin'
+        )
+        client.get('/api/v1/titles/')
+        body = client.get('/api/v1/titles/').content
+
+        response = client.get(
+            '/api/v1/metrics/',
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(admin)}'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        labels = {'view': 'api:titles-list', 'method': 'GET'}
+        assert sample(
+            text, 'yamdb_request_duration_seconds_count', **labels
+        ) == 2, 'Проверьте, что каждый запрос попадает в гистограмму'
+        assert sample(
+            text, 'yamdb_request_duration_seconds_bucket', le='+Inf', **labels
+        ) == 2
+        assert sample(text, 'yamdb_db_queries_sum', **labels) > 0, (
+            'Проверьте, что считаются запросы к БД'
+        )
+        assert sample(
+            text, 'yamdb_serialization_duration_seconds_count', **labels
+        ) == 2
+        assert sample(
+            text, 'yamdb_response_size_bytes_sum', **labels
+        ) == 2 * len(body), 'Проверьте, что записывается размер ответа'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pool_queries_counted(self, client, metrics_on, settings):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        Title.objects.create(name='Произведение', year=2000).genre.add(genre)
+        client.get('/api/v1/titles/')
+        labels = {'view': 'api:titles-list', 'method': 'GET'}
+        sync = sample(metrics.render_metrics(), 'yamdb_db_queries_sum',
+                      **labels)
+
+        metrics.reset_metrics()
+        caches['api'].clear()
+        reset_local_versions()
+        settings.ROOT_URLCONF = 'api.async_urls'
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/')
+        assert response.status_code == 200
+        assert sample(
+            metrics.render_metrics(), 'yamdb_db_queries_sum', **labels
+        ) == sync, (
+            'Проверьте, что запросы из пулов потоков асинхронного режима '
+            'тоже считаются'
+        )
+
+    def test_unresolved_view(self, client, metrics_on):
+        client.get('/api/v1/nowhere/')
+        text = metrics.render_metrics()
+        assert sample(
+            text, 'yamdb_request_duration_seconds_count',
+            view='unresolved', method='GET'
+        ) == 1
+
+    def test_metrics_admin_only(self, client, metrics_on):
+        user = User.objects.create(username='user', email='user@yamdb.ru')
+        assert client.get('/api/v1/metrics/').status_code == 401
+        response = client.get(
+            '/api/v1/metrics/',
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+        )
+        assert response.status_code == 403
+
+    def test_disabled_by_default(self, client, settings):
+        metrics.reset_metrics()
+        assert settings.REQUEST_METRICS is False
+        client.get('/api/v1/genres/')
+        assert 'yamdb_request_duration_seconds_count' not in (
+            metrics.render_metrics()
+        ), 'Проверьте, что без REQUEST_METRICS метрики не собираются'
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = metrics.Histogram('test_value', 'Тест.', (1, 5))
+        for value in (0.5, 1, 3, 7):
+            histogram.observe(value, view='a"b')
+        lines = histogram.render()
+        assert 'test_value_bucket{view="a\\"b",le="1"} 2' in lines
+        assert 'test_value_bucket{view="a\\"b",le="5"} 3' in lines
+        assert 'test_value_bucket{view="a\\"b",le="+Inf"} 4' in lines
+        assert 'test_value_sum{view="a\\"b"} 11.5' in lines
+        assert 'test_value_count{view="a\\"b"} 4' in lines
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import access_token_for
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+from .utils import count_queries
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create(username='author', email='a@yamdb.ru')
+
+
+@pytest.fixture
+def review(author):
+    title = Title.objects.create(name='Произведение', year=2000)
+    return Review.objects.create(
+        title=title, author=author, text='Отзыв', score=5
+    )
+
+
+def comments_url(title_id, review_id):
+    return f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+
+@pytest.mark.django_db
+class TestNestedLookup:
+
+    def test_comments_of_review_from_other_title(self, client, review):
+        other = Title.objects.create(name='Другое', year=2001)
+        response = client.get(comments_url(other.pk, review.pk))
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв другого произведения даёт ответ 404'
+        )
+
+    def test_comments_of_missing_review(self, client, review):
+        response = client.get(comments_url(review.title_id, 0))
+        assert response.status_code == 404
+
+    def test_comment_post_resolves_path_once(self, client, author, review):
+        auth = f'Bearer {access_token_for(author)}'
+        client.get('/api/v1/titles/', HTTP_AUTHORIZATION=auth)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                comments_url(review.title_id, review.pk),
+                data={'text': 'Комментарий'}, HTTP_AUTHORIZATION=auth
+            )
+        queries = len([
+            query for query in context.captured_queries
+            if 'SAVEPOINT' not in query['sql']
+        ])
+        assert response.status_code == 201
+        assert response.json()['author'] == 'author'
+        # Путь, вставка комментария и запись в журнал изменений.
+        assert queries == 3, (
+            'Проверьте, что создание комментария проверяет путь одним '
+            f'запросом и не перечитывает отзыв и автора: {queries}'
+        )
+        assert Comment.objects.filter(review=review).count() == 1
+
+    def test_comment_list_path_query(self, client, review):
+        _, queries = count_queries(
+            client, 'get', comments_url(review.title_id, review.pk)
+        )
+        # Версии кэша, путь и страница комментариев.
+        assert queries == 3, (
+            'Проверьте, что список комментариев проверяет путь одним '
+            f'запросом: {queries}'
+        )
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.mail import deliver_queued, queue_mail
+from core.models import OutgoingEmail
+from users.models import User
+
+
+def fail_to_send(self, messages):
+    raise SMTPException('сервер недоступен')
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_queues_mail_instead_of_sending(self, client):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/signup/', {
+                'username': 'newbie', 'email': 'newbie@yamdb.ru'
+            })
+        queries = [query['sql'] for query in context.captured_queries]
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        user = User.objects.get(username='newbie')
+        email = OutgoingEmail.objects.get()
+        assert email.recipients == 'newbie@yamdb.ru'
+        assert user.confirmation_code in email.body, (
+            'Проверьте, что письмо в очереди содержит код подтверждения'
+        )
+        inserts = [sql for sql in queries if sql.startswith('INSERT')]
+        assert len(inserts) == 2, (
+            'Проверьте, что пользователь и письмо создаются по одному разу'
+        )
+        updates = [sql for sql in queries if sql.startswith('UPDATE')]
+        assert len(updates) == 1 and 'token_version' not in updates[0], (
+            'Проверьте, что после создания пользователя записывается '
+            'только код подтверждения'
+        )
+        assert default_token_generator.check_token(
+            user, user.confirmation_code
+        ), 'Проверьте, что код выдаёт генератор токенов Django'
+
+    def test_deliver_queued_sends_and_marks_mail(self):
+        queue_mail('Тема', 'Текст', ['reader@yamdb.ru'])
+        assert deliver_queued() == (1, 0)
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['reader@yamdb.ru']
+        assert OutgoingEmail.objects.get().sent is not None
+        assert deliver_queued() == (0, 0), (
+            'Проверьте, что отправленное письмо не отправляется повторно'
+        )
+
+    def test_failed_mail_is_retried_with_backoff(self, monkeypatch, settings):
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        queue_mail('Тема', 'Текст', ['reader@yamdb.ru'])
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail_to_send)
+        assert deliver_queued() == (0, 1)
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1 and 'SMTPException' in email.last_error
+        assert email.next_attempt > timezone.now(), (
+            'Проверьте, что после неудачи письмо откладывается'
+        )
+        assert deliver_queued() == (0, 0)
+
+        monkeypatch.undo()
+        email.next_attempt = timezone.now() - timedelta(seconds=1)
+        email.save()
+        assert deliver_queued() == (1, 0)
+
+    def test_mail_is_given_up_after_max_attempts(self, monkeypatch, settings):
+        settings.OUTBOX_MAX_ATTEMPTS = 1
+        queue_mail('Тема', 'Текст', ['reader@yamdb.ru'])
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail_to_send)
+        deliver_queued()
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        monkeypatch.undo()
+        assert deliver_queued() == (0, 0), (
+            'Проверьте, что письмо не отправляется после последней попытки'
+        )
@@ -0,0 +1,61 @@
+import pytest
+from django.utils import timezone
+
+from reviews.models import Review, Title
+from users.models import User
+
+
+def walk_cursor_pages(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что запрос к {url} возвращает статус 200'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в курсорном режиме количество объектов не считается'
+        )
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_reviews_cursor_pages(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for number in range(25):
+            user = User.objects.create(
+                username=f'user{number}', email=f'user{number}@yamdb.ru'
+            )
+            Review.objects.create(
+                author=user, title=title, text='Текст', score=5
+            )
+        # Одинаковые даты проверяют, что id разрешает совпадения ключа.
+        Review.objects.filter(id__lte=10).update(pub_date=timezone.now())
+
+        expected = list(title.reviews.values_list('id', flat=True))
+        ids = walk_cursor_pages(
+            client, f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        )
+        assert ids == expected, (
+            'Проверьте, что курсорные страницы отзывов идут без пропусков '
+            'и повторов в порядке сортировки модели'
+        )
+
+    def test_titles_cursor_pages(self, client):
+        for number in range(15):
+            Title.objects.create(name=f'Произведение {number % 3}', year=2000)
+
+        expected = list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+        assert walk_cursor_pages(
+            client, '/api/v1/titles/?pagination=cursor'
+        ) == expected
+
+    def test_invalid_cursor(self, client):
+        response = client.get('/api/v1/titles/?pagination=cursor&cursor=xxx')
+        assert response.status_code == 404
@@ -0,0 +1,45 @@
+import pytest
+
+from reviews.models import Category, Genre, Title, TitleGenre
+
+from .utils import assert_constant_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleQueries:
+
+    # Без FAST_LIST_ROWS список собирает TitleReadSerializer по
+    # Prefetch('genre'), с ним — строки values_list() (api/rows.py).
+    @pytest.mark.parametrize('fast_rows', [True, False])
+    def test_titles_list_queries(self, client, settings, fast_rows):
+        settings.FAST_LIST_ROWS = fast_rows
+        category = Category.objects.create(name='Фильмы', slug='films')
+        genres = [
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        ]
+
+        def create_titles(amount):
+            for _ in range(amount):
+                title = Title.objects.create(
+                    name='Произведение', year=2000, category=category
+                )
+                TitleGenre.objects.bulk_create(
+                    TitleGenre(title=title, genre=genre) for genre in genres
+                )
+
+        assert_constant_queries(client, '/api/v1/titles/', create_titles)
+
+    def test_title_retrieve_queries(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+
+        def create_genres(amount):
+            start = title.genre.count()
+            for number in range(start, start + amount):
+                title.genre.add(Genre.objects.create(
+                    name=f'Жанр {number}', slug=f'genre-{number}'
+                ))
+
+        assert_constant_queries(
+            client, f'/api/v1/titles/{title.id}/', create_genres
+        )
@@ -0,0 +1,110 @@
+import logging
+
+import pytest
+
+from core.queries import fingerprint, log_queries
+from reviews.models import Comment, Genre, Review, Title
+from users.models import User
+
+from .plugins.query_budget import budget_for
+from .utils import assert_constant_queries
+
+
+class TestFingerprint:
+
+    def test_literals_normalized(self):
+        first = fingerprint(
+            'SELECT "a"."id" FROM "a" WHERE "a"."name" = \'x\'\'y\' '
+            'AND "a"."score_1" > 10 LIMIT 21'
+        )
+        second = fingerprint(
+            'SELECT  "a"."id" FROM "a" WHERE "a"."name" = \'z\' '
+            'AND "a"."score_1" > 2.5 LIMIT 3'
+        )
+        assert first == second, (
+            'Проверьте, что запросы с разными значениями дают один отпечаток'
+        )
+        assert '"score_1"' in first
+
+    def test_in_lists_collapsed(self):
+        assert fingerprint('SELECT 1 WHERE id IN (%s, %s, %s)') == (
+            fingerprint('SELECT 1 WHERE id IN (%s)')
+        )
+
+
+@pytest.mark.django_db
+class TestQueryInspector:
+
+    def test_repeated_queries_found(self):
+        title = Title.objects.create(name='Произведение', year=2000)
+        with log_queries() as log:
+            for _ in range(3):
+                list(Title.objects.filter(pk=title.pk))
+            Title.objects.count()
+        assert log.count == 4
+        repeated = log.repeated(3)
+        assert len(repeated) == 1 and repeated[0][1] == 3, (
+            'Проверьте, что одинаковые запросы с разными '
+            'параметрами считаются повтором'
+        )
+
+    def test_warnings_name_view_and_serializer(self, client, settings,
+                                               caplog):
+        settings.QUERY_REPEAT_THRESHOLD = 1
+        settings.SLOW_QUERY_MS = 0
+        Title.objects.create(name='Произведение', year=2000)
+        with caplog.at_level(logging.WARNING, logger='core.middleware'):
+            client.get('/api/v1/titles/')
+        messages = [record.getMessage() for record in caplog.records]
+        assert any(
+            message.startswith('Повторяющийся запрос в '
+                               'TitleViewSet.list (TitleReadSerializer)')
+            for message in messages
+        ), 'Проверьте, что в журнале указаны представление и сериализатор'
+        assert any(
+            message.startswith('Медленный запрос') for message in messages
+        )
+
+    def test_reviews_and_comments_without_n_plus_one(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        first = User.objects.create(username='first', email='f@yamdb.ru')
+        review = Review.objects.create(
+            author=first, title=title, text='-', score=5
+        )
+        authors = []
+
+        def create_reviews(amount):
+            for _ in range(amount):
+                author = User.objects.create(
+                    username=f'user{len(authors)}',
+                    email=f'user{len(authors)}@yamdb.ru'
+                )
+                authors.append(author)
+                Review.objects.create(
+                    author=author, title=title, text='-', score=5
+                )
+                Comment.objects.create(author=author, review=review, text='-')
+
+        assert_constant_queries(
+            client, f'/api/v1/titles/{title.id}/reviews/', create_reviews
+        )
+        assert_constant_queries(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            create_reviews
+        )
+
+
+class TestQueryBudget:
+
+    def test_budget_for_action(self):
+        class View:
+            query_budget = {'list': 3}
+            action = 'list'
+
+        assert budget_for(View()) == 3
+        View.action = 'create'
+        assert budget_for(View()) is None
+        View.query_budget = 5
+        assert budget_for(View()) == 5
+        assert budget_for(Genre()) is None
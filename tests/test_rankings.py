@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import CacheVersion
+from reviews.models import Category, Genre, Review, Title, TitleGenre
+from reviews.rankings import refresh_rankings
+from users.models import User
+
+
+def titles_of(response):
+    assert response.status_code == 200
+    return [item['name'] for item in response.json()['results']]
+
+
+@pytest.fixture
+def catalog(db):
+    users = [
+        User.objects.create(username=f'user{number}', email=f'{number}@y.ru')
+        for number in range(3)
+    ]
+    films = Category.objects.create(name='Фильмы', slug='films')
+    books = Category.objects.create(name='Книги', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    scores = {
+        'Хороший фильм': (films, [9, 9]),
+        'Средний фильм': (films, [5]),
+        'Лучшая книга': (books, [10]),
+        'Без оценок': (books, []),
+    }
+    for name, (category, marks) in scores.items():
+        title = Title.objects.create(name=name, year=2000, category=category)
+        TitleGenre.objects.create(title=title, genre=drama)
+        for user, score in zip(users, marks):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score
+            )
+    old = Review.objects.filter(title__name='Хороший фильм')
+    old.update(pub_date=timezone.now() - timedelta(days=30))
+    refresh_rankings()
+
+
+@pytest.mark.django_db
+class TestRankings:
+
+    def test_rating_ordering(self, client, catalog):
+        response = client.get('/api/v1/titles/?ordering=rating')
+        assert titles_of(response) == [
+            'Лучшая книга', 'Хороший фильм', 'Средний фильм'
+        ], 'Проверьте, что ?ordering=rating сортирует по средней оценке'
+
+    def test_rating_ordering_in_category_and_genre(self, client, catalog):
+        response = client.get('/api/v1/titles/?ordering=rating&category=films')
+        assert titles_of(response) == ['Хороший фильм', 'Средний фильм']
+        response = client.get('/api/v1/titles/?ordering=rating&genre=drama')
+        assert titles_of(response) == [
+            'Лучшая книга', 'Хороший фильм', 'Средний фильм'
+        ]
+
+    def test_trending_ordering(self, client, catalog):
+        response = client.get('/api/v1/titles/?ordering=trending')
+        assert titles_of(response) == ['Лучшая книга', 'Средний фильм'], (
+            'Проверьте, что trending учитывает только недавние отзывы'
+        )
+
+    def test_refresh_replaces_rankings(self, client, catalog):
+        title = Title.objects.get(name='Средний фильм')
+        title.reviews.update(score=10)
+        title.rating_sum = 10
+        title.save()
+        refresh_rankings(['rating'])
+        response = client.get('/api/v1/titles/?ordering=rating')
+        # При равной оценке и числе оценок выше созданное раньше.
+        assert titles_of(response) == [
+            'Средний фильм', 'Лучшая книга', 'Хороший фильм'
+        ]
+
+    def test_unknown_ordering_keeps_default(self, client, catalog):
+        response = client.get('/api/v1/titles/?ordering=unknown')
+        assert len(titles_of(response)) == 4
+
+
+# Версии кэша меняются после фиксации транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestRefreshRankingsCommand:
+
+    def test_cached_orderings_invalidated(self, client, catalog):
+        url = '/api/v1/titles/?ordering=rating'
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        # Оценки, изменённые в обход сигналов, сами кэш не сбрасывают.
+        Review.objects.filter(title__name='Средний фильм').update(score=10)
+        Title.objects.filter(name='Средний фильм').update(rating_sum=10)
+        version = CacheVersion.objects.get(namespace='titles:list').version
+
+        call_command('refreshrankings', kind=['rating'])
+        assert CacheVersion.objects.get(
+            namespace='titles:list'
+        ).version > version, (
+            'Проверьте, что refreshrankings меняет общую версию списков, '
+            'которую читают все процессы'
+        )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert titles_of(response)[0] == 'Средний фильм'
@@ -0,0 +1,116 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Review, Title
+from reviews.ratings import find_rating_drift
+from users.models import User
+
+
+@pytest.fixture
+def authors(db):
+    return [
+        User.objects.create(username=f'user{number}', email=f'{number}@y.ru')
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def titles(db):
+    return [
+        Title.objects.create(name=f'Произведение {number}', year=2000)
+        for number in range(2)
+    ]
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count
+
+
+def review(title, author, score):
+    return Review.objects.create(
+        title=title, author=author, text='Отзыв', score=score
+    )
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+
+    def test_create(self, titles, authors):
+        title = titles[0]
+        assert stored(title) == (0, 0) and title.rating is None
+        review(title, authors[0], 7)
+        review(title, authors[1], 4)
+        assert stored(title) == (11, 2), (
+            'Проверьте, что новый отзыв добавляется к сумме и числу оценок'
+        )
+        assert title.rating == 5
+
+    def test_update_score(self, titles, authors):
+        title = titles[0]
+        first = review(title, authors[0], 7)
+        review(title, authors[1], 4)
+        first.score = 10
+        first.save()
+        assert stored(title) == (14, 2), (
+            'Проверьте, что изменение оценки меняет сумму, но не число оценок'
+        )
+        first.text = 'Другой текст'
+        first.save()
+        assert stored(title) == (14, 2)
+
+    def test_update_loaded_review(self, titles, authors):
+        title = titles[0]
+        created = review(title, authors[0], 7)
+        loaded = Review.objects.get(pk=created.pk)
+        loaded.score = 2
+        loaded.save()
+        assert stored(title) == (2, 1), (
+            'Проверьте, что оценка отзыва, загруженного из БД, тоже '
+            'учитывается при изменении'
+        )
+
+    def test_move_to_other_title(self, titles, authors):
+        first, second = titles
+        moved = review(first, authors[0], 6)
+        moved.title = second
+        moved.score = 9
+        moved.save()
+        assert stored(first) == (0, 0)
+        assert stored(second) == (9, 1)
+
+    def test_delete(self, titles, authors):
+        title = titles[0]
+        first = review(title, authors[0], 7)
+        review(title, authors[1], 4)
+        first.delete()
+        assert stored(title) == (4, 1), (
+            'Проверьте, что удалённый отзыв убирается из рейтинга'
+        )
+        Review.objects.filter(title=title).delete()
+        assert stored(title) == (0, 0) and title.rating is None
+
+
+@pytest.mark.django_db
+class TestRebuildRatings:
+
+    def test_repairs_drift(self, titles, authors):
+        first, second = titles
+        review(first, authors[0], 8)
+        review(first, authors[1], 3)
+        Title.objects.filter(pk=first.pk).update(rating_sum=100)
+        Title.objects.filter(pk=second.pk).update(rating_count=5)
+        assert set(find_rating_drift()) == {first, second}
+
+        with pytest.raises(CommandError):
+            call_command('rebuildratings', check=True)
+        assert stored(first) == (100, 2), (
+            'Проверьте, что rebuildratings --check ничего не изменяет'
+        )
+
+        call_command('rebuildratings')
+        assert stored(first) == (11, 2) and stored(second) == (0, 0), (
+            'Проверьте, что rebuildratings пересчитывает рейтинг по отзывам'
+        )
+        assert not find_rating_drift().exists()
+        call_command('rebuildratings', check=True)
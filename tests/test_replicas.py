@@ -0,0 +1,188 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import access_token_for
+from api.cache import reset_local_versions
+from core.db import routers
+from core.models import CacheVersion
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def replica(transactional_db, settings):
+    """Вторая БД, читающая ту же тестовую БД, что и default."""
+    connections.databases['replica1'] = dict(connection.settings_dict)
+    settings.DATABASE_REPLICAS = ['replica1']
+    routers.reset_lags()
+    yield connections['replica1']
+    connections['replica1'].close()
+    del connections['replica1']
+    del connections.databases['replica1']
+    routers.reset_lags()
+
+
+@pytest.fixture
+def title(transactional_db):
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Произведение', year=2000,
+                                 category=category)
+    title.genre.add(genre)
+    return title
+
+
+def settle():
+    """Делает все изменения старше окна, в котором реплика может отставать."""
+    CacheVersion.objects.update(version=0)
+    reset_local_versions()
+
+
+def get_with_queries(client, replica, url, settled=True):
+    # Ответ из кэша API не обращается к БД вовсе.
+    caches['api'].clear()
+    if settled:
+        settle()
+    with CaptureQueriesContext(connection) as primary, \
+            CaptureQueriesContext(replica) as secondary:
+        response = client.get(url)
+    assert response.status_code == 200
+    # Версии пространств имён кэша всегда читаются из основной БД.
+    data = [
+        query for query in primary.captured_queries
+        if 'core_cacheversion' not in query['sql']
+    ]
+    return len(data), len(secondary)
+
+
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica(self, client, replica, title):
+        primary, secondary = get_with_queries(
+            client, replica, f'/api/v1/titles/{title.id}/reviews/'
+        )
+        assert secondary > 0, 'Проверьте, что чтение идёт на реплику'
+        assert primary == 0, (
+            'Проверьте, что при чтении с реплики основная БД не нужна'
+        )
+
+    def test_read_your_writes(self, client, replica, title, settings):
+        user = User.objects.create(username='user', email='user@yamdb.ru')
+        with CaptureQueriesContext(replica) as secondary:
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 8},
+                content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+            )
+        assert response.status_code == 201
+        assert len(secondary) == 0, 'Проверьте, что запись идёт в основную БД'
+        assert settings.READ_YOUR_WRITES_COOKIE in response.cookies, (
+            'Проверьте, что после записи ставится кука чтения из основной БД'
+        )
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        primary, secondary = get_with_queries(client, replica, url)
+        assert primary > 0 and secondary == 0, (
+            'Проверьте, что после записи клиент читает из основной БД'
+        )
+
+        settings.READ_YOUR_WRITES_SECONDS = 0
+        primary, secondary = get_with_queries(client, replica, url)
+        assert primary == 0 and secondary > 0, (
+            'Проверьте, что по истечении READ_YOUR_WRITES_SECONDS чтение '
+            'снова идёт на реплику'
+        )
+
+    def test_failed_write_does_not_stick(self, client, replica, title,
+                                         settings):
+        response = client.post(f'/api/v1/titles/{title.id}/reviews/', {})
+        assert response.status_code == 401
+        assert settings.READ_YOUR_WRITES_COOKIE not in response.cookies
+
+    def test_lagging_replica_skipped(self, client, replica, title,
+                                     monkeypatch, settings):
+        lags = []
+        monkeypatch.setattr(
+            routers, 'replica_lag', lambda alias: lags.append(alias) or 10
+        )
+        primary, secondary = get_with_queries(
+            client, replica, '/api/v1/titles/'
+        )
+        assert primary > 0 and secondary == 0, (
+            'Проверьте, что отставшая реплика не используется'
+        )
+        get_with_queries(client, replica, '/api/v1/titles/')
+        assert lags == ['replica1'], (
+            'Проверьте, что отставание проверяется не на каждый запрос'
+        )
+
+        settings.DATABASE_REPLICA_MAX_LAG = 30
+        routers.reset_lags()
+        primary, secondary = get_with_queries(
+            client, replica, '/api/v1/titles/'
+        )
+        assert primary == 0 and secondary > 0
+
+    def test_async_reads_use_replica(self, replica, title, settings,
+                                     monkeypatch):
+        settings.ROOT_URLCONF = 'api.async_urls'
+        chosen = []
+        db_for_read = routers.ReplicaRouter.db_for_read
+
+        def recorded(router, model, **hints):
+            chosen.append(db_for_read(router, model, **hints))
+            return chosen[-1]
+
+        monkeypatch.setattr(routers.ReplicaRouter, 'db_for_read', recorded)
+        settle()
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/')
+        assert response.status_code == 200
+        assert chosen and set(chosen) == {'replica1'}, (
+            'Проверьте, что асинхронное чтение в пуле потоков тоже идёт '
+            'на реплику'
+        )
+
+    def test_recent_changes_read_from_primary(self, client, replica, title):
+        settle()
+        user = User.objects.create(username='user', email='user@yamdb.ru')
+        Review.objects.create(title=title, author=user, text='-', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        primary, secondary = get_with_queries(
+            client, replica, url, settled=False
+        )
+        assert primary > 0 and secondary == 0, (
+            'Проверьте, что сразу после изменения чтение идёт в основную БД: '
+            'реплика может его ещё не видеть'
+        )
+        primary, secondary = get_with_queries(client, replica, url)
+        assert primary == 0 and secondary > 0
+
+    def test_replica_read_not_cached(self, client, replica, title):
+        user = User.objects.create(username='user', email='user@yamdb.ru')
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {access_token_for(user)}'}
+        get_with_queries(client, replica, '/api/v1/titles/')
+        title.save()
+        # Версия токенов не в кэше: аутентификация читает с реплики
+        # раньше, чем представление узнаёт о свежем изменении.
+        caches['api'].clear()
+        response = client.get('/api/v1/titles/', **auth)
+        assert response.status_code == 200
+        assert 'ETag' not in response, (
+            'Проверьте, что ответ с реплики после свежего изменения '
+            'не получает ETag'
+        )
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200 and 'ETag' in response
+        assert response['X-Cache'] == 'MISS'
+
+    def test_without_replicas(self, client, title):
+        primary = CaptureQueriesContext(connection)
+        with primary:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200 and len(primary) > 0
+        assert 'yamdb_primary' not in response.cookies
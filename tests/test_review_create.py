@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import access_token_for
+from reviews.models import Review, Title
+from users.models import User
+
+AUTHORS = 20
+
+
+@pytest.fixture
+def title(db):
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+def post_review(client, user, title, score=5):
+    return client.post(
+        f'/api/v1/titles/{title.pk}/reviews/',
+        {'text': 'Отзыв', 'score': score},
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}',
+    )
+
+
+def review_queries(queries):
+    """Запросы создания отзыва без служебных SAVEPOINT и проверки токена."""
+    return [
+        query['sql'] for query in queries
+        if 'SAVEPOINT' not in query['sql']
+        and not query['sql'].startswith('SELECT "users_user"."token_version"')
+    ]
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def test_review_post_queries(self, client, title):
+        User.objects.bulk_create(
+            User(username=f'user{number}', email=f'user{number}@yamdb.ru')
+            for number in range(AUTHORS)
+        )
+        counts = set()
+        for user in User.objects.all():
+            with CaptureQueriesContext(connection) as context:
+                response = post_review(client, user, title)
+            assert response.status_code == 201
+            queries = review_queries(context.captured_queries)
+            counts.add(len(queries))
+        # Произведение, вставка отзыва, рейтинг и статистика произведения,
+        # запись в журнал изменений.
+        assert counts == {5}, (
+            'Проверьте, что создание отзыва читает произведение один раз '
+            f'и не проверяет дубликат отдельным запросом: {counts}'
+        )
+        assert Review.objects.count() == AUTHORS
+
+    def test_duplicate_review_is_rejected(self, client, title):
+        user = User.objects.create(username='reader', email='r@yamdb.ru')
+        assert post_review(client, user, title, score=5).status_code == 201
+        response = post_review(client, user, title, score=9)
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Вы уже писали отзыв к данному произведению']
+        }
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг'
+        )
+
+    def test_review_for_missing_title(self, client, title):
+        user = User.objects.create(username='reader', email='r@yamdb.ru')
+        response = client.post(
+            '/api/v1/titles/0/reviews/', {'text': 'Отзыв', 'score': 5},
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}',
+        )
+        assert response.status_code == 404
@@ -0,0 +1,131 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+from core.benchmark import compare_list_paths
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+# Кавычки, обратная косая, управляющие символы, не ASCII и U+2028/2029.
+TRICKY = 'Тест "кавычки" \\ / \n\t\x01 é 😀 \u2028 \u2029 <b>'
+
+
+@pytest.fixture
+def catalog(db):
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name=TRICKY, slug='tricky')
+    films = Category.objects.create(name='Фильмы', slug='films')
+    authors = [
+        User.objects.create(username=f'user{number}',
+                            email=f'user{number}@yamdb.ru')
+        for number in range(3)
+    ]
+    titles = []
+    for number in range(14):
+        title = Title.objects.create(
+            name=f'{TRICKY} {number}', year=1990 + number,
+            description=TRICKY if number % 2 else '',
+            category=films if number % 3 else None,
+        )
+        title.genre.set([drama, comedy][:number % 3])
+        titles.append(title)
+    for number, author in enumerate(authors):
+        review = Review.objects.create(
+            author=author, title=titles[0], text=f'{TRICKY} {number}',
+            score=number + 5
+        )
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=timezone.make_aware(
+                datetime.datetime(2021, 5, 6, 7, 8, 9, number * 123456)
+            )
+        )
+        for other in authors:
+            Comment.objects.create(
+                author=other, review=review, text=TRICKY
+            )
+    return titles
+
+
+def list_urls(titles):
+    title = titles[0]
+    review = title.reviews.order_by('pk').first()
+    return (
+        '/api/v1/titles/',
+        '/api/v1/titles/?page=2',
+        '/api/v1/titles/?page_size=3',
+        '/api/v1/titles/?genre=drama',
+        '/api/v1/titles/?category=films&year=1991',
+        '/api/v1/titles/?name=Тест',
+        '/api/v1/titles/?genre=missing',
+        f'/api/v1/titles/{title.id}/reviews/',
+        f'/api/v1/titles/{titles[1].id}/reviews/',
+        f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+    )
+
+
+class TestRowLists:
+
+    def test_byte_identical_to_serializers(self, client, catalog, settings):
+        responses = {}
+        for fast in (False, True):
+            settings.FAST_LIST_ROWS = fast
+            for url in list_urls(catalog):
+                caches['api'].clear()
+                response = client.get(url)
+                assert response.status_code == 200, url
+                responses.setdefault(url, []).append(response.content)
+        for url, (slow, fast) in responses.items():
+            assert fast == slow, (
+                f'Проверьте, что ответ {url} совпадает с ответом '
+                'сериализатора до байта'
+            )
+
+    def test_cursor_pagination_uses_serializer(self, client, catalog):
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == 200
+        assert response.json()['next'] is not None
+
+    def test_compare_list_paths(self, catalog):
+        results = compare_list_paths(iterations=3)
+        assert set(results) == {'titles', 'reviews', 'comments'}
+        for name, result in results.items():
+            assert result['identical'], (
+                f'Проверьте, что строки {name} совпадают с сериализатором'
+            )
+            assert result['rows']['p50_ms'] <= result['rows']['p95_ms']
+
+    def test_benchrows_arguments(self):
+        with pytest.raises(CommandError):
+            call_command('benchrows', iterations=0)
+
+
+class TestFastJSONRenderer:
+
+    @pytest.mark.parametrize('data', [
+        {'text': TRICKY, 'numbers': [0, -1, 2 ** 62, True, None]},
+        [{'nested': {'list': [TRICKY, 'a' * 1000]}}],
+        {'when': datetime.datetime(2021, 1, 2, 3, 4, 5, 678901,
+                                   tzinfo=datetime.timezone.utc),
+         'day': datetime.date(2021, 1, 2),
+         'money': Decimal('1.50'),
+         'lazy': gettext_lazy('Произведение')},
+        {1: 'ключ не строка'},
+        {'huge': 2 ** 70},
+        'строка',
+    ])
+    def test_same_bytes_as_json_renderer(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_requested(self):
+        data = {'text': TRICKY}
+        media_type = 'application/json; indent=4'
+        assert FastJSONRenderer().render(data, media_type) == (
+            JSONRenderer().render(data, media_type)
+        )
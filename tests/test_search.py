@@ -0,0 +1,48 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def search(self, client, value):
+        response = client.get('/api/v1/titles/', {'name': value})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_search_by_words_and_substring(self, client):
+        Title.objects.create(name='Мастер и Маргарита', year=1967)
+        Title.objects.create(name='Собачье сердце', year=1925)
+
+        assert self.search(client, 'Маргарита') == ['Мастер и Маргарита']
+        assert self.search(client, 'аргар') == ['Мастер и Маргарита'], (
+            'Проверьте, что поиск находит произведения по части названия'
+        )
+
+    def test_name_match_ranked_first(self, client):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Ранжирование доступно только в PostgreSQL')
+        Title.objects.create(name='Сердце', year=1925)
+        Title.objects.create(name='Собачье сердце', year=1925)
+        Title.objects.create(name='Сердца трёх', year=1920)
+
+        assert self.search(client, 'сердце') == [
+            'Сердце', 'Собачье сердце', 'Сердца трёх'
+        ], 'Проверьте, что более точные совпадения ранжируются выше'
+
+    def test_description_not_searched(self, client):
+        Title.objects.create(
+            name='Белая гвардия', year=1925,
+            description='Роман о сердце Киева'
+        )
+        Title.objects.create(name='Собачье сердце', year=1925)
+
+        assert self.search(client, 'сердце') == ['Собачье сердце'], (
+            'Проверьте, что фильтр name ищет только по названию'
+        )
+        title = Title.objects.get(name='Белая гвардия')
+        title.description = 'Сердце'
+        title.save()
+        assert self.search(client, 'сердце') == ['Собачье сердце']
@@ -0,0 +1,224 @@
+import pytest
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+
+from api import throttling
+from api.authentication import access_token_for
+from core.benchmark import throttle_overhead
+from core.metrics import render_metrics
+from reviews.models import Title
+from users.models import User
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttling.LocalBuckets, 'timer', clock)
+    monkeypatch.setattr(throttling.CacheBuckets, 'timer', clock)
+    return clock
+
+
+@pytest.fixture
+def title(db):
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+def post_review(client, user, title):
+    return client.post(
+        f'/api/v1/titles/{title.pk}/reviews/',
+        {'text': 'Отзыв', 'score': 5},
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}',
+    )
+
+
+class TestBuckets:
+
+    @pytest.mark.parametrize('store', ['local', 'cache'])
+    def test_token_bucket(self, clock, store):
+        if store == 'local':
+            buckets = throttling.LocalBuckets(3, 2.0, 100)
+        else:
+            buckets = throttling.CacheBuckets(
+                caches['default'], 'test', 3, 2.0
+            )
+        assert [buckets.take('a') for _ in range(3)] == [0, 0, 0], (
+            'Проверьте, что полная корзина пропускает столько запросов, '
+            'сколько в ней жетонов'
+        )
+        assert buckets.take('a') == pytest.approx(2.0), (
+            'Проверьте, что пустая корзина возвращает время до жетона'
+        )
+        assert buckets.take('b') == 0, (
+            'Проверьте, что у каждого клиента своя корзина'
+        )
+        clock.now += 1.5
+        assert buckets.take('a') == pytest.approx(0.5)
+        clock.now += 0.5
+        assert buckets.take('a') == 0
+        clock.now += 60
+        assert [buckets.take('a') for _ in range(4)][-1] > 0, (
+            'Проверьте, что корзина не наполняется выше ёмкости'
+        )
+
+    def test_stale_buckets_evicted(self, clock):
+        buckets = throttling.LocalBuckets(1, 1.0, 100)
+        for ident in ('a', 'b', 'c'):
+            buckets.take(ident)
+            clock.now += 0.5
+        assert len(buckets) == 2, (
+            'Проверьте, что наполнившиеся корзины удаляются'
+        )
+        clock.now += 10
+        buckets.take('d')
+        assert len(buckets) == 1
+
+    def test_max_buckets(self, clock):
+        buckets = throttling.LocalBuckets(2, 100.0, 3)
+        for ident in 'abcde':
+            buckets.take(ident)
+        assert len(buckets) == 3, (
+            'Проверьте, что корзин в памяти не больше THROTTLE_MAX_BUCKETS'
+        )
+
+    def test_bad_max_buckets(self):
+        with pytest.raises(ImproperlyConfigured):
+            throttling.LocalBuckets(2, 1.0, 0)
+
+    @pytest.mark.parametrize('rate', ['', '0/m', '10', '10/week', 'a/s'])
+    def test_bad_rate(self, rate):
+        with pytest.raises(ImproperlyConfigured):
+            throttling.parse_rate(rate)
+
+    def test_parse_rate(self):
+        assert throttling.parse_rate('120/min') == (120, 0.5)
+        assert throttling.parse_rate('5/h') == (5, 720.0)
+
+
+class TestThrottledEndpoints:
+
+    @pytest.mark.parametrize('alias', ['', 'default'])
+    def test_signup(self, client, db, settings, alias):
+        settings.THROTTLE_RATES = {'signup': '2/h'}
+        settings.THROTTLE_CACHE_ALIAS = alias
+        for _ in range(2):
+            assert client.post('/api/v1/auth/signup/', {}).status_code == 400
+        response = client.post('/api/v1/auth/signup/', {})
+        assert response.status_code == 429, (
+            'Проверьте, что частые регистрации с одного адреса '
+            'отклоняются с кодом 429'
+        )
+        assert response['Retry-After'] == '1800', (
+            'Проверьте, что ответ 429 содержит заголовок Retry-After'
+        )
+        response = client.post(
+            '/api/v1/auth/signup/', {}, REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что корзины ведутся отдельно для каждого адреса'
+        )
+
+    def test_token(self, client, db, settings):
+        settings.THROTTLE_RATES = {'token': '1/m'}
+        assert client.post('/api/v1/auth/token/', {}).status_code == 400
+        response = client.post('/api/v1/auth/token/', {})
+        assert response.status_code == 429
+        assert response['Retry-After'] == '60'
+
+    def test_forwarded_for(self, client, db, settings):
+        settings.THROTTLE_RATES = {'token': '1/m'}
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'NUM_PROXIES': 1
+        }
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = client.post(
+                '/api/v1/auth/token/', {},
+                HTTP_X_FORWARDED_FOR=f'1.1.1.1, {address}'
+            )
+            assert response.status_code == 400, (
+                'Проверьте, что за прокси клиент определяется по адресу, '
+                'который дописал прокси в X-Forwarded-For'
+            )
+
+    def test_forwarded_for_ignored_without_proxy(self, client, db, settings):
+        settings.THROTTLE_RATES = {'token': '1/m'}
+        assert client.post(
+            '/api/v1/auth/token/', {}, HTTP_X_FORWARDED_FOR='10.0.0.1'
+        ).status_code == 400
+        response = client.post(
+            '/api/v1/auth/token/', {}, HTTP_X_FORWARDED_FOR='10.0.0.2'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что без прокси подменённый X-Forwarded-For '
+            'не даёт новой корзины'
+        )
+
+    def test_write_per_user(self, client, title, settings):
+        settings.THROTTLE_RATES = {'write': '1/m'}
+        first, second = (
+            User.objects.create(username=name, email=f'{name}@yamdb.ru')
+            for name in ('first', 'second')
+        )
+        assert post_review(client, first, title).status_code == 201
+        assert post_review(client, first, title).status_code == 429, (
+            'Проверьте, что частые изменения от одного пользователя '
+            'отклоняются'
+        )
+        assert post_review(client, second, title).status_code == 201
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(first)}',
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что ограничение изменений не касается чтения'
+        )
+
+    def test_anonymous_read(self, client, title, settings):
+        settings.THROTTLE_RATES = {'anon_read': '1/m'}
+        user = User.objects.create(username='user', email='user@yamdb.ru')
+        assert client.get('/api/v1/titles/').status_code == 200
+        assert client.get('/api/v1/titles/').status_code == 429
+        response = client.get(
+            '/api/v1/titles/',
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}',
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что ограничение чтения касается только анонимов'
+        )
+
+    def test_disabled_scope(self, client, db, settings):
+        settings.THROTTLE_RATES = {'signup': ''}
+        for _ in range(10):
+            assert client.post('/api/v1/auth/signup/', {}).status_code == 400
+
+    def test_metrics(self, client, db, settings):
+        settings.THROTTLE_RATES = {'token': '1/m'}
+        for _ in range(3):
+            client.post('/api/v1/auth/token/', {})
+        metrics = render_metrics()
+        assert 'yamdb_throttle_buckets{scope="token"} 1' in metrics
+        assert 'yamdb_throttled_total{scope="token"} 2' in metrics
+
+
+class TestThrottleBenchmark:
+
+    def test_throttle_overhead(self):
+        results = throttle_overhead(iterations=200, clients=10)
+        assert set(results) == {'memory', 'cache'}
+        for result in results.values():
+            assert result['throttled'] == 0
+            assert 0 < result['p50_us'] <= result['p95_us']
+        assert results['memory']['buckets'] == 10
+
+    def test_benchthrottle_arguments(self):
+        with pytest.raises(CommandError):
+            call_command('benchthrottle', clients=0)
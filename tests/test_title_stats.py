@@ -0,0 +1,112 @@
+import pytest
+
+from reviews.models import Review, Title, TitleStats
+from reviews.ratings import find_stats_drift, rebuild_ratings
+from users.models import User
+
+from .utils import count_queries
+
+
+@pytest.fixture
+def authors(db):
+    return [
+        User.objects.create(username=f'user{number}', email=f'{number}@y.ru')
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def title(db):
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+def review(title, author, score):
+    return Review.objects.create(
+        title=title, author=author, text='Отзыв', score=score
+    )
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_stats_follow_review_writes(self, client, title, authors):
+        first = review(title, authors[0], 7)
+        review(title, authors[1], 7)
+        last = review(title, authors[2], 3)
+        first.score = 10
+        first.save()
+
+        response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['review_count'] == 3
+        assert data['scores']['7'] == 1 and data['scores']['10'] == 1
+        assert data['scores']['3'] == 1 and sum(data['scores'].values()) == 3
+        assert data['last_review_date'] is not None
+
+        last.delete()
+        stats = TitleStats.objects.get(pk=title.pk)
+        assert stats.review_count == 2 and stats.score_3 == 0
+        assert stats.last_review_date == Review.objects.filter(
+            title=title
+        ).latest('pub_date').pub_date, (
+            'Проверьте, что после удаления дата последнего отзыва '
+            'пересчитывается'
+        )
+        assert find_stats_drift()[0].count() == 0
+
+    def test_missing_title_stats(self, client):
+        response = client.get('/api/v1/titles/0/stats/')
+        assert response.status_code == 404
+        response = client.get('/api/v1/titles/abc/stats/')
+        assert response.status_code == 404, (
+            'Проверьте, что нечисловой id произведения даёт ответ 404'
+        )
+
+    def test_title_without_stats_row(self, client, title):
+        TitleStats.objects.all().delete()
+        response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+        assert response.status_code == 200, (
+            'Проверьте, что для произведения без строки статистики '
+            'возвращается нулевая статистика'
+        )
+        data = response.json()
+        assert data['title'] == title.pk and data['review_count'] == 0
+        assert data['last_review_date'] is None
+        assert not any(data['scores'].values())
+        response = client.get(f'/api/v1/titles/stats/?ids={title.pk}')
+        assert response.json() == [data]
+
+    def test_bulk_stats_in_one_query(self, client, authors):
+        titles = [
+            Title.objects.create(name=f'Произведение {n}', year=2000)
+            for n in range(5)
+        ]
+        for title in titles:
+            review(title, authors[0], 5)
+        ids = ','.join(str(title.pk) for title in reversed(titles))
+        response, queries = count_queries(
+            client, 'get', f'/api/v1/titles/stats/?ids={ids},0'
+        )
+        assert response.status_code == 200
+        assert [item['title'] for item in response.json()] == [
+            title.pk for title in reversed(titles)
+        ], 'Проверьте, что статистика идёт в порядке запрошенных id'
+        assert queries == 1, (
+            f'Проверьте, что статистика читается одним запросом: {queries}'
+        )
+
+    def test_bulk_stats_limits(self, client, settings):
+        settings.TITLE_STATS_MAX_IDS = 2
+        assert client.get('/api/v1/titles/stats/').status_code == 400
+        assert client.get('/api/v1/titles/stats/?ids=a').status_code == 400
+        response = client.get('/api/v1/titles/stats/?ids=1,2,3')
+        assert response.status_code == 400
+
+    def test_rebuild_creates_missing_stats(self, title, authors):
+        review(title, authors[0], 8)
+        TitleStats.objects.all().delete()
+        assert find_stats_drift()[1].count() == 1
+        rebuild_ratings()
+        stats = TitleStats.objects.get(pk=title.pk)
+        assert (stats.review_count, stats.score_8) == (1, 1)
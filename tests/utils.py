@@ -0,0 +1,34 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import reset_local_versions
+
+
+def count_queries(client, method, url, **kwargs):
+    """Выполняет запрос и возвращает ответ и число запросов к БД."""
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    return response, len(context.captured_queries)
+
+
+def assert_constant_queries(client, url, create_objects, sizes=(1, 5, 10)):
+    """
+    Проверяет, что число запросов к url не растёт вместе с размером страницы.
+
+    create_objects(n) должна добавить в БД ещё n объектов, попадающих
+    на первую страницу ответа.
+    """
+    counts = {}
+    created = 0
+    for size in sizes:
+        create_objects(size - created)
+        created = size
+        # Каждый запрос читает версии кэша из БД, как первый.
+        reset_local_versions()
+        response, counts[size] = count_queries(client, 'get', url)
+        assert response.status_code == 200, (
+            f'Проверьте, что запрос к {url} возвращает статус 200'
+        )
+    assert len(set(counts.values())) == 1, (
+        f'Число запросов к {url} зависит от размера страницы: {counts}'
+    )